@@ -0,0 +1,5 @@
+#!/bin/zsh
+
+set -e -u -o pipefail
+root=$(cd -- "$(dirname "$0")"/.. && pwd)
+"$root"/.venv/bin/python -m multiviewer.atv_fake "$@"
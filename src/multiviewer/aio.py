@@ -25,8 +25,8 @@ event_loop.set_exception_handler(handler)
 asyncio.set_event_loop(event_loop)
 
 
-def call_later(seconds: float, f: Callable[[], object]) -> None:
-    event_loop.call_later(seconds, f)
+def call_later(seconds: float, f: Callable[[], object]) -> asyncio.TimerHandle:
+    return event_loop.call_later(seconds, f)
 
 
 async def wait_for(a: Awaitable[T], *, timeout: float) -> T | None:
@@ -87,6 +87,12 @@ class Task(asyncio.Task[T]):
         return task
 
 
+async def cancel(*tasks: asyncio.Task[Any]) -> None:
+    for task in tasks:
+        task.cancel()
+    await gather(*tasks, return_exceptions=True)
+
+
 def run_coroutine_threadsafe(a: Coroutine[Any, Any, T]) -> T:
     return asyncio.run_coroutine_threadsafe(a, event_loop).result()
 
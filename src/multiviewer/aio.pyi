@@ -29,8 +29,11 @@ event_loop: asyncio.AbstractEventLoop
 
 def run_coroutine_threadsafe(a: Awaitable[T]) -> T: ...
 def gather(*aws: Awaitable[T]) -> Awaitable[list[T]]: ...
+async def cancel(*tasks: asyncio.Task[Any]) -> None:
+    """Cancels tasks and waits until they're done."""
+
 async def sleep(delay: float) -> None: ...
-def call_later(seconds: float, f: Callable[[], None]) -> None: ...
+def call_later(seconds: float, f: Callable[[], None]) -> asyncio.TimerHandle: ...
 def run_event_loop(main: Coroutine[Any, Any, T]) -> None: ...
 async def wait_for(a: Awaitable[T], *, timeout: float) -> T | None: ...
 async def open_connection(host: str, port: int) -> tuple[StreamReader, StreamWriter]: ...
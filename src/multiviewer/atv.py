@@ -1,109 +1,344 @@
 # atv.py — persistent Apple TV control with synchronous API
 
+from __future__ import annotations
+
 # Standard library
 import asyncio
 import dataclasses
-import socket
+import importlib
 import time
-from asyncio import Queue
-from typing import cast
-
-# Third-party
-import pyatv
-from pyatv.interface import AppleTV
-from pyatv.storage.file_storage import FileStorage
-
-from . import aio, config, json_field
-from .aio import Task
+from collections import deque
 
 # Local package
+from . import aio, json_field, recorder, startup
+from .aio import Event, Task
+from .atv_backend import AtvBackend, AtvDevice, AtvListener, PlayState
 from .base import *
+from .jtech import Power
 from .tv import TV
 
-PYATV_STORAGE_PATH = Path(__file__).resolve().with_name("pyatv.conf")
-
-
-async def load_pyatv_storage() -> FileStorage:
-    if not PYATV_STORAGE_PATH.exists():
-        fail("pyatv config not found", PYATV_STORAGE_PATH)
-    storage = FileStorage(PYATV_STORAGE_PATH.as_posix(), aio.event_loop)
-    await storage.load()
-    return storage
-
-
-def log_connection_info(tv: TV, apple_tv: AppleTV, device: object, host_ip: str) -> None:
-    service_id = getattr(apple_tv.service, "identifier", None)
-    info = apple_tv.device_info
-    airplay_id = getattr(info, "output_device_id", None)
-    mac = getattr(info, "mac", None)
-    device_id = getattr(device, "identifier", None)
-    log(
-        "apple tv connected",
-        tv=tv.name,
-        host=config.TV_HOSTS[tv],
-        host_ip=host_ip,
-        device_id=device_id or "?",
-        service_id=service_id or "?",
-        airplay_id=airplay_id or "?",
-        mac=mac or "?",
+
+class ConnectionState(MyStrEnum):
+    DISCONNECTED = auto()
+    CONNECTING = auto()
+    CONNECTED = auto()
+
+
+# Once connected, we check each Apple TV's connection every HEALTH_CHECK_INTERVAL seconds.
+# After a failed connect, we retry with exponential backoff between RECONNECT_MIN_BACKOFF
+# and RECONNECT_MAX_BACKOFF seconds.
+HEALTH_CHECK_INTERVAL = 30.0
+HEALTH_CHECK_TIMEOUT = 5.0
+RECONNECT_MIN_BACKOFF = 1.0
+RECONNECT_MAX_BACKOFF = 60.0
+
+
+# Multi-step sequences (wake, screensaver, launch) wait for the TV to report that it is
+# ready for the next step, but no longer than these timeouts, which are the fixed sleeps
+# we used before we listened for updates.
+WAKE_TIMEOUT = 8.0
+STEP_TIMEOUT = 2.0
+
+# We fetch each Apple TV's app catalog when we connect to it, and refresh it every
+# APP_LIST_REFRESH seconds, so that apps installed since are launchable by name.
+APP_LIST_REFRESH = 3600.0
+
+
+def app_key(name: str) -> str:
+    # "Apple TV", "apple_tv" and "AppleTV" are all the same app.
+    return "".join(c for c in name.lower() if c.isalnum())
+
+
+@dataclass(slots=True)
+class StepStats:
+    timeout_ms: float
+    count: int = 0
+    timeouts: int = 0
+    command_ms: float = 0.0
+    wait_ms: float = 0.0
+
+    def record(self, *, command_ms: float, wait_ms: float, ready: bool) -> None:
+        self.count += 1
+        self.command_ms += command_ms
+        self.wait_ms += wait_ms
+        if not ready:
+            self.timeouts += 1
+
+    def status(self) -> JSON:
+        n = max(self.count, 1)
+        avg_wait_ms = self.wait_ms / n
+        return {
+            "count": self.count,
+            "timeouts": self.timeouts,
+            "avg_command_ms": round(self.command_ms / n),
+            "avg_wait_ms": round(avg_wait_ms),
+            # How much of the old fixed sleep we no longer wait.
+            "avg_saved_ms": round(self.timeout_ms - avg_wait_ms),
+        }
+
+
+# What an Apple TV is doing, as of its most recent push/power update.  None means unknown,
+# e.g. because we aren't connected.
+@dataclass(slots=True)
+class AtvState:
+    power: Power | None = None
+    play_state: PlayState | None = None
+    app_id: str | None = None
+    app_name: str | None = None
+    title: str | None = None
+    updated_at: float | None = None
+
+    def is_playing(self) -> bool:
+        return self.play_state in (
+            PlayState.PLAYING,
+            PlayState.LOADING,
+            PlayState.SEEKING,
+        )
+
+    def status(self) -> JSON:
+        updated_at = self.updated_at
+        return {
+            "power": self.power,
+            "play_state": self.play_state,
+            "app_id": self.app_id,
+            "app_name": self.app_name,
+            "title": self.title,
+            "age_s": None if updated_at is None else round(time.monotonic() - updated_at),
+        }
+
+
+# pyatv and its protocol stacks take a while to import, so we import them in the
+# background, off the event loop, when the first Apple TV connects.
+pyatv_backend_task: Task[AtvBackend] | None = None
+
+
+async def import_pyatv_backend() -> AtvBackend:
+    module = await aio.event_loop.run_in_executor(
+        None, importlib.import_module, f"{__package__}.atv_pyatv"
     )
+    startup.mark("pyatv imported")
+    return module.PyatvBackend()
+
+
+def pyatv_backend() -> Task[AtvBackend]:
+    global pyatv_backend_task
+    task = pyatv_backend_task
+    if task is None:
+        task = Task[AtvBackend].create("import pyatv", import_pyatv_backend())
+        pyatv_backend_task = task
+    return task
+
+
+class LazyPyatvBackend(AtvBackend):
+    __slots__ = ()
+
+    async def connect(self, tv: TV, listener: AtvListener) -> AtvDevice:
+        backend = await pyatv_backend()
+        return await backend.connect(tv, listener)
 
 
 @dataclass(slots=True)
-class AtvConnection:
+class AtvConnection(AtvListener):
     tv: TV
     should_send_commands_to_device: bool = False
-    apple_tv: AppleTV | None = None
-
-    async def connect(self) -> AppleTV:
+    backend: AtvBackend = field(default_factory=LazyPyatvBackend, repr=False)
+    device: AtvDevice | None = None
+    connection_state: ConnectionState = ConnectionState.DISCONNECTED
+    connect_ms: int | None = None
+    connect_failures: int = 0
+    last_error: str | None = None
+    connect_lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+    disconnected_event: Event = Event.field()
+    keep_alive_task: Task[NoReturn] | None = field(default=None, repr=False)
+    state: AtvState = field(default_factory=AtvState)
+    # The number of push/power updates received, and an event set on each one.
+    updates: int = 0
+    update_event: Event = Event.field()
+    step_stats: dict[str, StepStats] = field(
+        default_factory=dict[str, StepStats], repr=False
+    )
+    # The launchable apps, by bundle id, and by app_key of their names.
+    apps: dict[str, str] = field(default_factory=dict[str, str], repr=False)
+    app_ids_by_key: dict[str, str] = field(default_factory=dict[str, str], repr=False)
+    apps_fetched_at: float | None = None
+    launches_skipped: int = 0
+    wakes_skipped: int = 0
+
+    async def connect(self) -> AtvDevice:
         tv = self.tv
         if False:
             debug_print(tv)
         if not self.should_send_commands_to_device:
             fail("connect should not be called when commands are disabled")
         t0 = time.perf_counter()
-        storage = await load_pyatv_storage()
-        host = config.TV_HOSTS[tv]
-        try:
-            host_ip = socket.gethostbyname(host)
-        except Exception as e:
-            fail(f"could not resolve host {host}", e)
-        devices = await pyatv.scan(aio.event_loop, hosts=[host_ip], storage=storage)
-        if not devices:
-            fail(f"could not connect to {tv}")
-        device = devices[0]
-        apple_tv = await pyatv.connect(device, aio.event_loop, storage=storage)
-        apple_tv.push_updater.stop()
-        log_connection_info(tv, apple_tv, device, host_ip)
-        self.apple_tv = apple_tv
+        device = await self.backend.connect(tv, self)
+        self.device = device
         ms = int((time.perf_counter() - t0) * 1000)
+        self.connect_ms = ms
         log(f"connected to {tv} ({ms}ms)")
-        return apple_tv
+        return device
+
+    async def get_device(self) -> AtvDevice:
+        # The lock ensures that the job queue and keep_alive_forever don't both connect.
+        async with self.connect_lock:
+            if self.device is not None:
+                return self.device
+            self.connection_state = ConnectionState.CONNECTING
+            try:
+                device = await self.connect()
+            except Exception as e:
+                self.connection_state = ConnectionState.DISCONNECTED
+                self.connect_failures += 1
+                self.last_error = repr(e)
+                raise
+            self.connection_state = ConnectionState.CONNECTED
+            self.last_error = None
+            startup.mark(f"{self.tv} connected")
+            # Fetch the app catalog before anyone launches an app by name.
+            if self.apps_fetched_at is None:
+                await self.refresh_apps()
+            return device
+
+    async def refresh_apps(self) -> None:
+        device = self.device
+        if device is None:
+            return
+        # Even if the fetch fails, we don't retry until the next refresh.
+        self.apps_fetched_at = time.monotonic()
+        try:
+            apps = await device.app_list()
+        # Backends raise their own exception types; a failed fetch just leaves the old
+        # list in place.
+        except Exception as e:  # noqa: BLE001
+            log(f"could not fetch apps for {self.tv}", error=repr(e))
+            return
+        self.apps = apps
+        self.app_ids_by_key = {app_key(name): app_id for app_id, name in apps.items()}
+        log(f"fetched {len(apps)} apps for {self.tv}")
+
+    def apps_are_stale(self) -> bool:
+        fetched_at = self.apps_fetched_at
+        return fetched_at is None or time.monotonic() - fetched_at >= APP_LIST_REFRESH
+
+    def resolve_app(self, name: str) -> str:
+        # name is a bundle id, URL, or app name.  We pass on what we can't resolve as is,
+        # e.g. URLs and apps that we haven't fetched yet.
+        if name in self.apps:
+            return name
+        return self.app_ids_by_key.get(app_key(name), name)
+
+    def updated(self) -> None:
+        self.state.updated_at = time.monotonic()
+        self.updates += 1
+        self.update_event.set()
+
+    def update_power(self, power: Power | None) -> None:
+        self.state.power = power
+        self.updated()
+
+    def update_playing(
+        self,
+        play_state: PlayState | None,
+        title: str | None,
+        app_id: str | None,
+        app_name: str | None,
+    ) -> None:
+        state = self.state
+        state.play_state = play_state
+        state.title = title
+        state.app_id = app_id
+        state.app_name = app_name
+        self.updated()
+
+    def lost(self, error: str | None) -> None:
+        if self.device is None:
+            return
+        log(f"lost connection to {self.tv}", error=error)
+        self.device = None
+        self.state = AtvState()
+        self.connection_state = ConnectionState.DISCONNECTED
+        self.last_error = error
+        self.disconnected_event.set()
+
+    async def is_healthy(self) -> bool:
+        device = self.device
+        if device is None:
+            return False
+        try:
+            alive = await aio.wait_for(device.is_alive(), timeout=HEALTH_CHECK_TIMEOUT)
+        # Backends raise their own exception types (pyatv's, OSError, ...), and any of
+        # them means the device isn't healthy.
+        except Exception as e:  # noqa: BLE001
+            self.last_error = repr(e)
+            return False
+        return alive is True
+
+    async def keep_alive_forever(self) -> NoReturn:
+        backoff = RECONNECT_MIN_BACKOFF
+        while True:
+            if self.device is None:
+                try:
+                    await self.get_device()
+                    backoff = RECONNECT_MIN_BACKOFF
+                # This task must keep retrying whatever the backend raises.
+                except Exception as e:  # noqa: BLE001
+                    log(
+                        f"could not connect to {self.tv}, retry in {backoff:.0f}s",
+                        error=e,
+                    )
+                    await aio.sleep(backoff)
+                    backoff = min(2 * backoff, RECONNECT_MAX_BACKOFF)
+                    continue
+            self.disconnected_event.clear()
+            await aio.wait_for(
+                self.disconnected_event.wait(), timeout=HEALTH_CHECK_INTERVAL
+            )
+            if self.device is not None and not await self.is_healthy():
+                log(f"health check failed for {self.tv}", error=self.last_error)
+                await self.close()
+            elif self.apps_are_stale():
+                await self.refresh_apps()
 
-    async def get_apple_tv(self) -> AppleTV:
-        if self.apple_tv is not None:
-            return self.apple_tv
-        self.apple_tv = await self.connect()
-        return self.apple_tv
+    def keep_alive(self) -> None:
+        if self.keep_alive_task is None:
+            self.keep_alive_task = Task[NoReturn].create(
+                f"keep_alive {self.tv}", self.keep_alive_forever()
+            )
+
+    def stop_keep_alive(self) -> None:
+        if self.keep_alive_task is not None:
+            self.keep_alive_task.cancel()
+            self.keep_alive_task = None
+
+    def status(self) -> JSON:
+        return {
+            "state": self.connection_state.value,
+            "connect_ms": self.connect_ms,
+            "connect_failures": self.connect_failures,
+            "error": self.last_error,
+            "apps": len(self.apps),
+            "launches_skipped": self.launches_skipped,
+            "wakes_skipped": self.wakes_skipped,
+            "steps": {step: stats.status() for step, stats in self.step_stats.items()},
+        }
 
     async def close(self) -> None:
         if not self.should_send_commands_to_device:
-            self.apple_tv = None
+            self.device = None
             return
-        if self.apple_tv is not None:
-            apple_tv = self.apple_tv
-            self.apple_tv = None
-            tasks = cast(
-                set[asyncio.Task[Any]],
-                apple_tv.close(),  # pyright: ignore[reportUnknownMemberType]
-            )
-            await aio.gather(*tasks)
+        if self.device is not None:
+            device = self.device
+            self.device = None
+            self.state = AtvState()
+            self.connection_state = ConnectionState.DISCONNECTED
+            self.disconnected_event.set()
+            await device.close()
 
     async def do_command(self, command: str, args: list[str]):
         if not self.should_send_commands_to_device:
             return
-        apple_tv = await self.get_apple_tv()
-        await getattr(apple_tv.remote_control, command)(*args)
+        device = await self.get_device()
+        await device.remote_control(command, args)
 
     async def home(self):
         await self.do_command("home", [])
@@ -150,47 +385,176 @@ class AtvConnection:
     async def volume_up(self):
         await self.do_command("volume_up", [])
 
+    async def run_step(
+        self,
+        step: str,
+        action: Callable[[], Awaitable[None]],
+        *,
+        ready: Callable[[], bool],
+        timeout: float,
+    ) -> None:
+        # Run action, then wait until ready() or timeout seconds, whichever is first.
+        t0 = time.perf_counter()
+        await action()
+        t1 = time.perf_counter()
+        deadline = t1 + timeout
+        while not ready():
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            self.update_event.clear()
+            await aio.wait_for(self.update_event.wait(), timeout=remaining)
+        t2 = time.perf_counter()
+        is_ready = ready()
+        stats = self.step_stats.get(step)
+        if stats is None:
+            stats = StepStats(timeout_ms=timeout * 1000)
+            self.step_stats[step] = stats
+        stats.record(
+            command_ms=(t1 - t0) * 1000, wait_ms=(t2 - t1) * 1000, ready=is_ready
+        )
+        log(
+            f"{self.tv} {step}",
+            command_ms=int((t1 - t0) * 1000),
+            wait_ms=int((t2 - t1) * 1000),
+            ready=is_ready,
+        )
+
+    def updated_since(self, n: int) -> Callable[[], bool]:
+        return lambda: self.updates > n
+
     async def screensaver(self) -> None:
         if not self.should_send_commands_to_device:
             return
-        await self.home()
-        await aio.sleep(2)
-        await self.home()
-        await aio.sleep(2)
+        # Each home press changes what's on screen; the push updater tells us when the
+        # TV has gotten there.
+        await self.run_step(
+            "screensaver.home1",
+            self.home,
+            ready=self.updated_since(self.updates),
+            timeout=STEP_TIMEOUT,
+        )
+        await self.run_step(
+            "screensaver.home2",
+            self.home,
+            ready=self.updated_since(self.updates),
+            timeout=STEP_TIMEOUT,
+        )
         await self.menu()
 
     async def sleep(self) -> None:
         if not self.should_send_commands_to_device:
             return
-        apple_tv = await self.get_apple_tv()
-        await apple_tv.power.turn_off()
+        device = await self.get_device()
+        await device.turn_off()
 
     async def wake(self) -> None:
         if not self.should_send_commands_to_device:
             return
-        apple_tv = await self.get_apple_tv()
-        await apple_tv.power.turn_on()
-        await aio.sleep(8)
+        device = await self.get_device()
+        await self.run_step(
+            "wake.turn_on",
+            device.turn_on,
+            ready=lambda: self.state.power == Power.ON,
+            timeout=WAKE_TIMEOUT,
+        )
         await self.screensaver()
 
-    async def launch(self, url: str) -> None:
+    async def wake_if_asleep(self) -> None:
         if not self.should_send_commands_to_device:
             return
-        apple_tv = await self.get_apple_tv()
-        await apple_tv.apps.launch_app(url)
-        await aio.sleep(2)
-        await apple_tv.remote_control.select()
-        await apple_tv.remote_control.select()
+        # Connecting tells us the TV's power state.
+        await self.get_device()
+        if self.state.power == Power.ON:
+            self.wakes_skipped += 1
+            log(f"{self.tv} is already on")
+            return
+        await self.wake()
+
+    async def launch(self, app: str) -> None:
+        if not self.should_send_commands_to_device:
+            return
+        device = await self.get_device()
+        url = self.resolve_app(app)
+        if url == self.state.app_id:
+            # Already in the foreground, so launching would just cost us the wait.
+            self.launches_skipped += 1
+            log(f"{self.tv} {url} is already in the foreground")
+            return
+        await self.run_step(
+            "launch.launch_app",
+            lambda: device.launch_app(url),
+            ready=self.updated_since(self.updates),
+            timeout=STEP_TIMEOUT,
+        )
+        await device.remote_control("select", [])
+        await device.remote_control("select", [])
 
 
 Job: TypeAlias = Callable[[], Awaitable[None]]
 
 
+class JobKind(MyStrEnum):
+    NAVIGATION = auto()
+    SCREENSAVER = auto()
+    POWER = auto()
+
+    # The next job to run is the oldest pending job with the highest priority.
+    def priority(self) -> int:
+        match self:
+            case JobKind.NAVIGATION:
+                return 0
+            case JobKind.SCREENSAVER:
+                return 1
+            case JobKind.POWER:
+                return 2
+
+
+# A navigation press that has waited in the queue longer than STALE_AFTER seconds is
+# dropped; the user has long since moved on.
+STALE_AFTER = 3.0
+
+# Pressing these twice is the same as not pressing them at all.
+TOGGLE_COMMANDS = frozenset(["play_pause"])
+
+
+@dataclass(slots=True)
+class AtvJob:
+    name: str
+    kind: JobKind
+    run: Job = field(repr=False)
+    # When the most recent press merged into this job was enqueued.
+    enqueued_at: float
+    count: int = 1
+
+    def is_stale(self) -> bool:
+        return (
+            self.kind == JobKind.NAVIGATION
+            and time.monotonic() - self.enqueued_at > STALE_AFTER
+        )
+
+
+@dataclass(slots=True)
+class QueueStats:
+    max_depth: int = 0
+    completed: int = 0
+    failed: int = 0
+    coalesced: int = 0
+    dropped_stale: int = 0
+    dropped_superseded: int = 0
+    cancelled: int = 0
+
+
 @dataclass(slots=True)
 class ATV:
     atv: AtvConnection
-    queue: Queue[Job] = field(default_factory=lambda: Queue[Job](), repr=False)
+    pending: deque[AtvJob] = field(default_factory=lambda: deque[AtvJob](), repr=False)
+    stats: QueueStats = field(default_factory=QueueStats)
+    synced_event: Event = Event.field()
+    wake_event: Event = Event.field()
     task: Task[NoReturn] = field(init=False, repr=False)
+    running: AtvJob | None = None
+    running_task: Task[None] | None = field(default=None, repr=False)
     in_screensaver: bool = False
 
     def __post_init__(self) -> None:
@@ -200,96 +564,233 @@ class ATV:
 
     async def process_queue_forever(self) -> NoReturn:
         while True:
-            job = await self.queue.get()
+            job = self.next_job()
+            if job is None:
+                self.synced_event.set()
+                self.wake_event.clear()
+                await self.wake_event.wait()
+                continue
             if False:
                 debug_print("dequeue", job)
-            try:
-                await self.run_job_with_retry(job)
-            finally:
-                self.queue.task_done()
-
-    async def run_job_with_retry(self, job: Job) -> None:
+            if job.is_stale():
+                self.stats.dropped_stale += job.count
+                log(f"dropping stale {job.name} x{job.count} for {self.atv.tv}")
+                continue
+            # We run the job in its own task, so that a newer power command can cancel it.
+            task = Task[None].create(
+                f"{self.atv.tv} {job.name}", self.run_job_with_retry(job)
+            )
+            self.running = job
+            self.running_task = task
+            await asyncio.wait([task])
+            self.running = None
+            self.running_task = None
+            if task.cancelled():
+                self.stats.cancelled += job.count
+                log(f"cancelled {job.name} for {self.atv.tv}")
+
+    def next_job(self) -> AtvJob | None:
+        if not self.pending:
+            return None
+        job = max(self.pending, key=lambda job: job.kind.priority())
+        self.pending.remove(job)
+        return job
+
+    async def run_job_with_retry(self, job: AtvJob) -> None:
+        # A coalesced job is job.count presses, which we send one by one.  pyatv has no
+        # repeat count: its InputActions are a single tap, a double tap, which tvOS treats
+        # as a gesture of its own, and a hold, which scrolls as far as the TV gets while
+        # it's held, not a number of items.
+        done = 0
         attempts = 0
         while attempts < 2:
             attempts += 1
             try:
-                await job()
+                # On retry, only send the presses that didn't go through, so that, e.g.,
+                # a down x5 still moves down 5 items.
+                while done < job.count:
+                    recorder.record(recorder.Kind.ATV_JOB, f"{self.atv.tv} {job.name}")
+                    await job.run()
+                    done += 1
+                self.stats.completed += job.count
                 return
             except Exception as e:
                 log_exc(e)
                 debug_print(self)
                 await self.close()
                 if attempts == 2:
+                    self.stats.completed += done
+                    self.stats.failed += job.count - done
+                    recorder.dump(f"{self.atv.tv} job failure")
                     return
 
     async def synced(self) -> None:
-        await self.queue.join()
+        await self.synced_event.wait()
 
     async def close(self) -> None:
         await self.atv.close()
 
-    def enqueue(self, job: Job, *, mark_screensaver: bool = False) -> None:
+    def drop_pending(self, should_drop: Callable[[AtvJob], bool]) -> None:
+        for job in self.pending:
+            if should_drop(job):
+                self.stats.dropped_superseded += job.count
+        self.pending = deque(job for job in self.pending if not should_drop(job))
+
+    def is_pending_or_running(self, name: str) -> bool:
+        running = self.running
+        if running is not None and running.name == name:
+            return True
+        return any(job.name == name for job in self.pending)
+
+    # supersede drops pending and running jobs that a new power or screensaver job makes
+    # pointless, and returns whether the new job itself is needed.
+    def supersede(self, name: str, kind: JobKind) -> bool:
+        # Pending navigation is pointless once the TV is going to sleep, wake, or enter
+        # the screensaver.
+        self.drop_pending(lambda job: job.kind == JobKind.NAVIGATION)
+        match kind:
+            case JobKind.NAVIGATION:
+                return True
+            case JobKind.SCREENSAVER:
+                return not self.is_pending_or_running(name)
+            case JobKind.POWER:
+                # The most recent power command wins, e.g. a sleep drops a pending wake
+                # and the screensaver that would follow it.
+                self.drop_pending(lambda _: True)
+                running = self.running
+                if running is not None and running.name == name:
+                    return False
+                if self.running_task is not None:
+                    self.running_task.cancel()
+                return True
+
+    def enqueue(
+        self,
+        name: str,
+        job: Job,
+        *,
+        kind: JobKind = JobKind.NAVIGATION,
+        mark_screensaver: bool = False,
+    ) -> None:
         self.in_screensaver = mark_screensaver
         if False:
-            debug_print("enqueue")
-        self.queue.put_nowait(job)
+            debug_print("enqueue", name)
+        now = time.monotonic()
+        last = self.pending[-1] if self.pending else None
+        if (
+            kind == JobKind.NAVIGATION
+            and last is not None
+            and last.name == name
+            and not last.is_stale()
+        ):
+            # Collapse a run of identical presses into one job.
+            if name in TOGGLE_COMMANDS:
+                # The pending toggle and this press cancel out.
+                self.pending.pop()
+                self.stats.coalesced += 2
+            else:
+                last.count += 1
+                last.enqueued_at = now
+                self.stats.coalesced += 1
+        elif kind == JobKind.NAVIGATION or self.supersede(name, kind):
+            self.pending.append(AtvJob(name, kind, job, now))
+        self.stats.max_depth = max(self.stats.max_depth, self.depth())
+        self.synced_event.clear()
+        self.wake_event.set()
+
+    def depth(self) -> int:
+        return sum(job.count for job in self.pending)
+
+    def status(self) -> JSON:
+        stats = self.stats
+        return {
+            "connection": self.atv.status(),
+            "state": self.atv.state.status(),
+            "depth": self.depth(),
+            "max_depth": stats.max_depth,
+            "completed": stats.completed,
+            "failed": stats.failed,
+            "coalesced": stats.coalesced,
+            "dropped_stale": stats.dropped_stale,
+            "dropped_superseded": stats.dropped_superseded,
+            "cancelled": stats.cancelled,
+            "running": None if self.running is None else self.running.name,
+        }
+
+    def state(self) -> AtvState:
+        return self.atv.state
 
     def is_in_screensaver(self) -> bool:
+        # Prefer what the TV tells us; fall back to our guess, based on whether the last
+        # command we sent it was screensaver.
+        state = self.atv.state
+        if state.power == Power.OFF:
+            return True
+        if state.is_playing():
+            return False
         return self.in_screensaver
 
     def down(self):
-        self.enqueue(self.atv.down)
+        self.enqueue("down", self.atv.down)
 
     def home(self):
-        self.enqueue(self.atv.home)
+        self.enqueue("home", self.atv.home)
 
-    def launch(self, url: str):
-        self.enqueue(lambda: self.atv.launch(url))
+    def launch(self, app: str):
+        self.enqueue(f"launch {app}", lambda: self.atv.launch(app))
 
     def left(self):
-        self.enqueue(self.atv.left)
+        self.enqueue("left", self.atv.left)
 
     def menu(self):
-        self.enqueue(self.atv.menu)
+        self.enqueue("menu", self.atv.menu)
 
     def next(self):
-        self.enqueue(self.atv.next)
+        self.enqueue("next", self.atv.next)
 
     def play_pause(self):
-        self.enqueue(self.atv.play_pause)
+        self.enqueue("play_pause", self.atv.play_pause)
 
     def previous(self):
-        self.enqueue(self.atv.previous)
+        self.enqueue("previous", self.atv.previous)
 
     def right(self):
-        self.enqueue(self.atv.right)
+        self.enqueue("right", self.atv.right)
 
     def screensaver(self):
-        self.enqueue(self.atv.screensaver, mark_screensaver=True)
+        self.enqueue(
+            "screensaver",
+            self.atv.screensaver,
+            kind=JobKind.SCREENSAVER,
+            mark_screensaver=True,
+        )
 
     def select(self):
-        self.enqueue(self.atv.select)
+        self.enqueue("select", self.atv.select)
 
     def sleep(self):
-        self.enqueue(self.atv.sleep)
+        self.enqueue("sleep", self.atv.sleep, kind=JobKind.POWER)
 
     def stop(self):
-        self.enqueue(self.atv.stop)
+        self.enqueue("stop", self.atv.stop)
 
     def top_menu(self):
-        self.enqueue(self.atv.top_menu)
+        self.enqueue("top_menu", self.atv.top_menu)
 
     def up(self):
-        self.enqueue(self.atv.up)
+        self.enqueue("up", self.atv.up)
 
     def volume_down(self):
-        self.enqueue(self.atv.volume_down)
+        self.enqueue("volume_down", self.atv.volume_down)
 
     def volume_up(self):
-        self.enqueue(self.atv.volume_up)
+        self.enqueue("volume_up", self.atv.volume_up)
 
     def wake(self):
-        self.enqueue(self.atv.wake)
+        self.enqueue("wake", self.atv.wake, kind=JobKind.POWER)
+
+    def wake_if_asleep(self):
+        self.enqueue("wake_if_asleep", self.atv.wake_if_asleep, kind=JobKind.POWER)
 
 
 @dataclass(slots=True)
@@ -302,6 +803,19 @@ class ATVs:
     def field(cls):
         return dataclasses.field(default_factory=ATVs, metadata=json_field.omit)
 
+    @classmethod
+    def with_backend(cls, backend: AtvBackend) -> ATVs:
+        return cls(
+            by_tv={
+                tv: ATV(
+                    AtvConnection(
+                        tv, should_send_commands_to_device=True, backend=backend
+                    )
+                )
+                for tv in TV.all()
+            }
+        )
+
     def set_should_send_commands_to_device(self, b: bool) -> None:
         for atv in self.by_tv.values():
             atv.atv.should_send_commands_to_device = b
@@ -317,9 +831,26 @@ class ATVs:
             self.atv(tv).sleep()
         await self.synced()
 
+    def wake_sleeping(self) -> None:
+        for tv in TV.all():
+            self.atv(tv).wake_if_asleep()
+
+    def keep_connected(self) -> None:
+        # Connect to all the Apple TVs concurrently, and keep them connected, so that
+        # commands don't pay for a scan and connect.
+        for atv in self.by_tv.values():
+            atv.atv.keep_alive()
+
+    def status(self) -> JSON:
+        return {tv.name: atv.status() for tv, atv in self.by_tv.items()}
+
     async def shutdown(self):
+        for atv in self.by_tv.values():
+            atv.atv.stop_keep_alive()
         await self.synced()
         await aio.gather(*(atv.close() for atv in self.by_tv.values()))
+        # Stop the job queues, so that their tasks don't outlive us.
+        await aio.cancel(*(atv.task for atv in self.by_tv.values()))
 
     def atv(self, tv: TV) -> ATV:
         return self.by_tv[tv]
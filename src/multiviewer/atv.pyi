@@ -1,13 +1,59 @@
-"""For controlling Apple TVs, using the pyatv library."""
+"""For controlling Apple TVs, via a backend (atv_backend.py), normally pyatv."""
 
 # Local package
+from .atv_backend import AtvBackend, PlayState
 from .base import *
+from .jtech import Power
 from .tv import TV
 
+@dataclass(slots=True)
+class AtvState:
+    """
+    What an Apple TV is doing, kept up to date by the backend's push and power updates, so
+    reading it costs no network round trip.  None means unknown, e.g. because we aren't
+    connected.
+    """
+
+    power: Power | None
+    play_state: PlayState | None
+    app_id: str | None
+    app_name: str | None
+    title: str | None
+
+    def is_playing(self) -> bool: ...
+
+@dataclass(slots=True)
+class QueueStats:
+    """Counts of Apple TV presses, by what happened to them."""
+
+    max_depth: int
+    completed: int
+    failed: int
+    coalesced: int
+    dropped_stale: int
+    dropped_superseded: int
+    cancelled: int
+
 class ATV:
-    """ "A controller for a single Apple TV."""
+    """
+    A controller for a single Apple TV.  Commands are queued and sent to the TV in the
+    background, highest priority first: power, then screensaver, then navigation.  Runs
+    of identical navigation presses are collapsed into one job, stale navigation presses
+    are dropped, and power/screensaver commands supersede pending navigation.  A power
+    command also supersedes pending power/screensaver jobs, and cancels the running job,
+    so that e.g. sleep takes effect immediately, even mid-wake.
+    """
 
-    def is_in_screensaver(self) -> bool: ...
+    stats: QueueStats
+
+    def state(self) -> AtvState: ...
+    def is_in_screensaver(self) -> bool:
+        """
+        Whether the TV is off or idle in the screensaver, per its state if known, or else
+        per whether the last command we sent it was screensaver.
+        """
+
+    def status(self) -> JSON: ...
 
     # Navigation
     def home(self) -> None: ...
@@ -28,10 +74,17 @@ class ATV:
     def stop(self) -> None: ...
     def volume_down(self) -> None: ...
     def volume_up(self) -> None: ...
-    def launch(self, bundle_id: str) -> None: ...
+    def launch(self, app: str) -> None:
+        """
+        Launches app, a bundle id, URL, or app name, e.g. "Netflix", looked up in the TV's
+        app catalog.  Does nothing if the app is already in the foreground.
+        """
+
     def screensaver(self) -> None: ...
     def sleep(self) -> None: ...
     def wake(self) -> None: ...
+    def wake_if_asleep(self) -> None:
+        """Wakes the TV, unless it reports that it's already on."""
 
 @dataclass(slots=True)
 class ATVs:
@@ -39,9 +92,20 @@ class ATVs:
 
     @classmethod
     def field(cls) -> ATVs: ...
+    @classmethod
+    def with_backend(cls, backend: AtvBackend) -> ATVs:
+        """Controllers for all Apple TVs, that send commands to backend."""
+
     def atv(self, tv: TV) -> ATV: ...
     async def power_on(self) -> None: ...
     async def power_off(self) -> None: ...
+    def wake_sleeping(self) -> None:
+        """In the background, wakes those TVs that aren't already on."""
+
     def set_should_send_commands_to_device(self, b: bool) -> None: ...
+    def keep_connected(self) -> None:
+        """Connect to all Apple TVs in the background, and keep them connected."""
+
+    def status(self) -> JSON: ...
     async def synced(self) -> None: ...
     async def shutdown(self) -> None: ...
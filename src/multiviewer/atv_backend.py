@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+# Local package
+from .base import *
+from .jtech import Power
+from .tv import TV
+
+
+class PlayState(MyStrEnum):
+    IDLE = auto()
+    LOADING = auto()
+    PAUSED = auto()
+    PLAYING = auto()
+    SEEKING = auto()
+    STOPPED = auto()
+
+
+class AtvListener:
+    __slots__ = ()
+
+    def lost(self, error: str | None) -> None:
+        pass
+
+    def update_power(self, power: Power | None) -> None:
+        pass
+
+    def update_playing(
+        self,
+        play_state: PlayState | None,
+        title: str | None,
+        app_id: str | None,
+        app_name: str | None,
+    ) -> None:
+        pass
+
+
+class AtvDevice:
+    __slots__ = ()
+
+    async def remote_control(self, command: str, args: list[str]) -> None:
+        fail("remote_control not implemented")
+
+    async def turn_on(self) -> None:
+        fail("turn_on not implemented")
+
+    async def turn_off(self) -> None:
+        fail("turn_off not implemented")
+
+    async def launch_app(self, url: str) -> None:
+        fail("launch_app not implemented")
+
+    async def app_list(self) -> dict[str, str]:
+        fail("app_list not implemented")
+
+    async def is_alive(self) -> bool:
+        fail("is_alive not implemented")
+
+    async def close(self) -> None:
+        pass
+
+
+class AtvBackend:
+    __slots__ = ()
+
+    async def connect(self, tv: TV, listener: AtvListener) -> AtvDevice:
+        fail("connect not implemented")
@@ -0,0 +1,57 @@
+"""
+The interface between an Apple TV connection and the thing that actually talks to the
+Apple TV.  The real backend uses pyatv (atv_pyatv.py); a fake one (atv_fake.py) simulates
+Apple TVs in-process, for load testing without the hardware.
+"""
+
+# Local package
+from .base import *
+from .jtech import Power
+from .tv import TV
+
+class PlayState(MyStrEnum):
+    IDLE = auto()
+    LOADING = auto()
+    PAUSED = auto()
+    PLAYING = auto()
+    SEEKING = auto()
+    STOPPED = auto()
+
+class AtvListener:
+    """What a backend tells the connection about, as it happens."""
+
+    def lost(self, error: str | None) -> None:
+        """The device connection closed (error None) or failed."""
+
+    def update_power(self, power: Power | None) -> None: ...
+    def update_playing(
+        self,
+        play_state: PlayState | None,
+        title: str | None,
+        app_id: str | None,
+        app_name: str | None,
+    ) -> None: ...
+
+class AtvDevice:
+    """A connected Apple TV."""
+
+    async def remote_control(self, command: str, args: list[str]) -> None:
+        """Presses a remote button, e.g. remote_control("down", [])."""
+
+    async def turn_on(self) -> None: ...
+    async def turn_off(self) -> None: ...
+    async def launch_app(self, url: str) -> None: ...
+    async def app_list(self) -> dict[str, str]:
+        """The launchable apps, as a map from bundle id to name."""
+
+    async def is_alive(self) -> bool:
+        """Does a round trip to the device, for health checks."""
+
+    async def close(self) -> None: ...
+
+class AtvBackend:
+    async def connect(self, tv: TV, listener: AtvListener) -> AtvDevice:
+        """
+        Connects to tv's Apple TV.  The backend calls listener with the device's initial
+        power and playing state, and with subsequent changes.
+        """
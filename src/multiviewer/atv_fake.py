@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+# Standard library
+import argparse
+import json
+import random
+import sys
+import time
+
+# Local package
+from . import aio
+from .atv import ATVs
+from .atv_backend import AtvBackend, AtvDevice, AtvListener, PlayState
+from .base import *
+from .jtech import Power
+from .tv import TV
+
+Latency: TypeAlias = tuple[float, float]
+
+FAKE_APPS = {
+    "com.apple.TVWatchList": "TV",
+    "com.google.ios.youtube": "YouTube",
+    "com.netflix.Netflix": "Netflix",
+}
+
+
+@dataclass(slots=True)
+class FakeStats:
+    connects: int = 0
+    commands: int = 0
+    disconnects: int = 0
+    launches: int = 0
+
+
+@dataclass(slots=True)
+class FakeBackend(AtvBackend):
+    # Latencies are (min, max) seconds, drawn uniformly.
+    connect_latency: Latency = (0.0, 0.0)
+    command_latency: Latency = (0.0, 0.0)
+    # How long after turn_on/turn_off the Apple TV reports its new power state.
+    power_transition: float = 0.0
+    # The probability that any given command drops the connection.
+    disconnect_probability: float = 0.0
+    seed: int = 0
+    random: random.Random = field(init=False, repr=False)
+    # Power persists across reconnects, like a real Apple TV.
+    power_by_tv: dict[TV, Power] = field(default_factory=dict[TV, Power])
+    stats: FakeStats = field(default_factory=FakeStats)
+
+    def __post_init__(self) -> None:
+        self.random = random.Random(self.seed)
+
+    async def delay(self, latency: Latency) -> None:
+        lo, hi = latency
+        if hi > 0:
+            await aio.sleep(self.random.uniform(lo, hi))
+
+    async def connect(self, tv: TV, listener: AtvListener) -> AtvDevice:
+        await self.delay(self.connect_latency)
+        self.stats.connects += 1
+        device = FakeDevice(self, tv, listener)
+        listener.update_power(self.power_by_tv.setdefault(tv, Power.OFF))
+        listener.update_playing(PlayState.IDLE, None, None, None)
+        return device
+
+
+@dataclass(slots=True)
+class FakeDevice(AtvDevice):
+    backend: FakeBackend
+    tv: TV
+    listener: AtvListener
+    play_state: PlayState = PlayState.IDLE
+    app_id: str | None = None
+    closed: bool = False
+
+    async def command(self) -> None:
+        backend = self.backend
+        if self.closed:
+            fail(f"fake {self.tv} is closed")
+        await backend.delay(backend.command_latency)
+        if self.closed:
+            fail(f"fake {self.tv} is closed")
+        backend.stats.commands += 1
+        if backend.random.random() < backend.disconnect_probability:
+            backend.stats.disconnects += 1
+            self.closed = True
+            self.listener.lost("fake disconnect")
+            fail(f"fake {self.tv} disconnected")
+
+    def push(self) -> None:
+        if not self.closed:
+            app_name = None if self.app_id is None else FAKE_APPS.get(self.app_id)
+            self.listener.update_playing(self.play_state, None, self.app_id, app_name)
+
+    def set_power(self, power: Power) -> None:
+        def update() -> None:
+            self.backend.power_by_tv[self.tv] = power
+            if not self.closed:
+                self.listener.update_power(power)
+
+        if self.backend.power_transition > 0:
+            aio.call_later(self.backend.power_transition, update)
+        else:
+            update()
+
+    async def remote_control(self, command: str, args: list[str]) -> None:
+        await self.command()
+        match command:
+            case "home" | "top_menu":
+                self.play_state, self.app_id = PlayState.IDLE, None
+            case "play_pause":
+                self.play_state = (
+                    PlayState.PAUSED
+                    if self.play_state == PlayState.PLAYING
+                    else PlayState.PLAYING
+                )
+            case "stop":
+                self.play_state = PlayState.STOPPED
+            case _:
+                pass
+        self.push()
+
+    async def turn_on(self) -> None:
+        await self.command()
+        self.set_power(Power.ON)
+
+    async def turn_off(self) -> None:
+        await self.command()
+        self.set_power(Power.OFF)
+
+    async def launch_app(self, url: str) -> None:
+        await self.command()
+        self.backend.stats.launches += 1
+        self.play_state, self.app_id = PlayState.LOADING, url
+        self.push()
+
+    async def app_list(self) -> dict[str, str]:
+        await self.command()
+        return dict(FAKE_APPS)
+
+    async def is_alive(self) -> bool:
+        await self.command()
+        return True
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+NAVIGATION = ["down", "up", "left", "right", "select", "menu", "play_pause"]
+
+
+async def load_test(args: argparse.Namespace) -> JSON:
+    backend = FakeBackend(
+        connect_latency=(args.connect_ms[0] / 1000, args.connect_ms[1] / 1000),
+        command_latency=(args.command_ms[0] / 1000, args.command_ms[1] / 1000),
+        power_transition=args.power_ms / 1000,
+        disconnect_probability=args.disconnect_probability,
+        seed=args.seed,
+    )
+    atvs = ATVs.with_backend(backend)
+    atvs.keep_connected()
+    r = random.Random(args.seed)
+    t0 = time.perf_counter()
+    for i in range(args.bursts):
+        for _ in range(args.burst_size):
+            atv = atvs.atv(r.choice(TV.all()))
+            x = r.random()
+            if x < args.power_fraction:
+                (atv.wake if r.random() < 0.5 else atv.sleep)()
+            elif x < 2 * args.power_fraction:
+                atv.screensaver()
+            else:
+                getattr(atv, r.choice(NAVIGATION))()
+        if i + 1 < args.bursts:
+            await aio.sleep(r.uniform(0, args.gap_ms / 1000))
+    await atvs.synced()
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+    result: JSON = {
+        "elapsed_ms": round(elapsed_ms),
+        "presses": args.bursts * args.burst_size,
+        "backend": {
+            "connects": backend.stats.connects,
+            "commands": backend.stats.commands,
+            "disconnects": backend.stats.disconnects,
+            "launches": backend.stats.launches,
+        },
+        "atvs": atvs.status(),
+    }
+    await atvs.shutdown()
+    return result
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Load test the Apple TV job queues against fake Apple TVs"
+    )
+    parser.add_argument("--bursts", type=int, default=20)
+    parser.add_argument("--burst-size", type=int, default=10)
+    parser.add_argument(
+        "--gap-ms", type=float, default=500, help="max gap between bursts"
+    )
+    parser.add_argument("--connect-ms", type=float, nargs=2, default=(200, 1500))
+    parser.add_argument("--command-ms", type=float, nargs=2, default=(20, 150))
+    parser.add_argument("--power-ms", type=float, default=1000)
+    parser.add_argument("--disconnect-probability", type=float, default=0.02)
+    parser.add_argument(
+        "--power-fraction",
+        type=float,
+        default=0.05,
+        help="fraction of presses that are power (and, separately, screensaver)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="log like the daemon")
+    args = parser.parse_args(argv)
+    RunMode.set(RunMode.Daemon if args.verbose else RunMode.Testing)
+    result: list[JSON] = []
+
+    async def run() -> None:
+        result.append(await load_test(args))
+
+    aio.run_event_loop(run())
+    print(json.dumps(result[0], indent=2))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,44 @@
+"""
+Fake Apple TVs, for load testing the Apple TV job queues and reconnection without the
+hardware.  The fake backend simulates connect and command latency, random disconnects, and
+delayed power transitions.  Run a load test with:
+
+    python -m multiviewer.atv_fake --help
+"""
+
+# Standard library
+import argparse
+
+# Local package
+from .atv_backend import AtvBackend
+from .base import *
+from .jtech import Power
+from .tv import TV
+
+# The fake Apple TVs' app catalog: names by bundle id.
+FAKE_APPS: dict[str, str]
+
+@dataclass(slots=True)
+class FakeStats:
+    connects: int
+    commands: int
+    disconnects: int
+    launches: int
+
+@dataclass(slots=True)
+class FakeBackend(AtvBackend):
+    """
+    Latencies are (min, max) seconds, drawn uniformly from a random generator seeded with
+    seed, so runs are repeatable.
+    """
+
+    connect_latency: tuple[float, float] = ...
+    command_latency: tuple[float, float] = ...
+    power_transition: float = ...
+    disconnect_probability: float = ...
+    seed: int = ...
+    power_by_tv: dict[TV, Power] = ...
+    stats: FakeStats = ...
+
+async def load_test(args: argparse.Namespace) -> JSON: ...
+def main(argv: list[str] | None = None) -> None: ...
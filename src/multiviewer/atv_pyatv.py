@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+# Standard library
+import asyncio
+from typing import cast
+
+# Third-party
+import pyatv
+from pyatv.const import DeviceState, PowerState
+from pyatv.exceptions import NotSupportedError
+from pyatv.interface import (
+    AppleTV,
+    DeviceListener,
+    Playing,
+    PowerListener,
+    PushListener,
+)
+from pyatv.storage.file_storage import FileStorage
+
+# Local package
+from . import aio, config, resolver
+from .atv_backend import AtvBackend, AtvDevice, AtvListener, PlayState
+from .base import *
+from .jtech import Power
+from .tv import TV
+
+PYATV_STORAGE_PATH = Path(__file__).resolve().with_name("pyatv.conf")
+
+
+async def load_pyatv_storage() -> FileStorage:
+    if not PYATV_STORAGE_PATH.exists():
+        fail("pyatv config not found", PYATV_STORAGE_PATH)
+    storage = FileStorage(PYATV_STORAGE_PATH.as_posix(), aio.event_loop)
+    await storage.load()
+    return storage
+
+
+def log_connection_info(tv: TV, apple_tv: AppleTV, device: object, host_ip: str) -> None:
+    service_id = getattr(apple_tv.service, "identifier", None)
+    info = apple_tv.device_info
+    airplay_id = getattr(info, "output_device_id", None)
+    mac = getattr(info, "mac", None)
+    device_id = getattr(device, "identifier", None)
+    log(
+        "apple tv connected",
+        tv=tv.name,
+        host=config.TV_HOSTS[tv],
+        host_ip=host_ip,
+        device_id=device_id or "?",
+        service_id=service_id or "?",
+        airplay_id=airplay_id or "?",
+        mac=mac or "?",
+    )
+
+
+def power_of(power_state: PowerState) -> Power | None:
+    match power_state:
+        case PowerState.On:
+            return Power.ON
+        case PowerState.Off:
+            return Power.OFF
+        case _:
+            return None
+
+
+PLAY_STATE_OF_DEVICE_STATE = {
+    DeviceState.Idle: PlayState.IDLE,
+    DeviceState.Loading: PlayState.LOADING,
+    DeviceState.Paused: PlayState.PAUSED,
+    DeviceState.Playing: PlayState.PLAYING,
+    DeviceState.Seeking: PlayState.SEEKING,
+    DeviceState.Stopped: PlayState.STOPPED,
+}
+
+
+class UpdateListener(PushListener, PowerListener):
+    def __init__(self, apple_tv: AppleTV, listener: AtvListener) -> None:
+        self.apple_tv = apple_tv
+        self.listener = listener
+
+    def playstatus_update(self, updater: object, playstatus: Playing) -> None:
+        try:
+            app = self.apple_tv.metadata.app
+        except NotSupportedError:
+            app = None
+        self.listener.update_playing(
+            PLAY_STATE_OF_DEVICE_STATE.get(playstatus.device_state),
+            playstatus.title,
+            None if app is None else app.identifier,
+            None if app is None else app.name,
+        )
+
+    def playstatus_error(self, updater: object, exception: Exception) -> None:
+        pass
+
+    def powerstate_update(self, old_state: PowerState, new_state: PowerState) -> None:
+        self.listener.update_power(power_of(new_state))
+
+
+class ConnectionListener(DeviceListener):
+    def __init__(self, listener: AtvListener) -> None:
+        self.listener = listener
+
+    def connection_lost(self, exception: Exception) -> None:
+        self.listener.lost(repr(exception))
+
+    def connection_closed(self) -> None:
+        self.listener.lost(None)
+
+
+@dataclass(slots=True)
+class PyatvDevice(AtvDevice):
+    apple_tv: AppleTV
+    # pyatv only holds weak references to its listeners, so we keep them alive.
+    connection_listener: ConnectionListener
+    update_listener: UpdateListener
+
+    async def remote_control(self, command: str, args: list[str]) -> None:
+        await getattr(self.apple_tv.remote_control, command)(*args)
+
+    async def turn_on(self) -> None:
+        await self.apple_tv.power.turn_on()
+
+    async def turn_off(self) -> None:
+        await self.apple_tv.power.turn_off()
+
+    async def launch_app(self, url: str) -> None:
+        await self.apple_tv.apps.launch_app(url)
+
+    async def app_list(self) -> dict[str, str]:
+        apps = await self.apple_tv.apps.app_list()
+        return {app.identifier: app.name or app.identifier for app in apps}
+
+    async def is_alive(self) -> bool:
+        await self.apple_tv.metadata.playing()
+        return True
+
+    async def close(self) -> None:
+        tasks = cast(
+            set[asyncio.Task[Any]],
+            self.apple_tv.close(),  # pyright: ignore[reportUnknownMemberType]
+        )
+        await aio.gather(*tasks)
+
+
+@dataclass(slots=True)
+class PyatvBackend(AtvBackend):
+    async def connect(self, tv: TV, listener: AtvListener) -> AtvDevice:
+        storage = await load_pyatv_storage()
+        host = config.TV_HOSTS[tv]
+        host_ip = await resolver.resolve(host)
+        devices = await pyatv.scan(aio.event_loop, hosts=[host_ip], storage=storage)
+        if not devices:
+            resolver.invalidate(host)
+            fail(f"could not connect to {tv}")
+        device = devices[0]
+        apple_tv = await pyatv.connect(device, aio.event_loop, storage=storage)
+        log_connection_info(tv, apple_tv, device, host_ip)
+        return attach(apple_tv, listener)
+
+
+def attach(apple_tv: AppleTV, listener: AtvListener) -> PyatvDevice:
+    """Wraps a connected apple_tv, forwarding its updates to listener."""
+    device = PyatvDevice(
+        apple_tv,
+        connection_listener=ConnectionListener(listener),
+        update_listener=UpdateListener(apple_tv, listener),
+    )
+    apple_tv.listener = device.connection_listener
+    apple_tv.power.listener = device.update_listener
+    apple_tv.push_updater.listener = device.update_listener
+    listener.update_power(power_of(apple_tv.power.power_state))
+    # Starting the push updater sends us the current playing state.
+    apple_tv.push_updater.start()
+    return device
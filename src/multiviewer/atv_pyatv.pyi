@@ -0,0 +1,19 @@
+"""The Apple TV backend that talks to real Apple TVs, using the pyatv library."""
+
+# Third-party
+from pyatv.interface import AppleTV
+
+# Local package
+from .atv_backend import AtvBackend, AtvDevice, AtvListener
+from .base import *
+
+@dataclass(slots=True)
+class PyatvBackend(AtvBackend): ...
+
+class PyatvDevice(AtvDevice): ...
+
+def attach(apple_tv: AppleTV, listener: AtvListener) -> PyatvDevice:
+    """
+    Wraps a connected apple_tv, forwarding its connection, power and push updates to
+    listener for as long as the returned device is referenced.
+    """
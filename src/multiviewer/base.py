@@ -1,13 +1,18 @@
 from __future__ import annotations
 
 # Standard library
+import atexit
 import datetime
 import inspect
+import json
 import os
 import pprint
+import queue
 import sys
+import threading
 import time
 import traceback
+import types
 from collections.abc import Awaitable, Callable, Coroutine, Mapping
 from dataclasses import dataclass, field
 from enum import StrEnum as _StrEnum
@@ -61,6 +66,9 @@ RunMode.current = None
 SELF_BASENAME = os.path.basename(__file__)
 SELF_MODNAME = __name__
 
+# file_and_line's result for each (code, line), so that we format each location once.
+locations: dict[tuple[types.CodeType, int], str] = {}
+
 
 def file_and_line(max_steps: int = 50) -> str:
     f = inspect.currentframe()
@@ -68,14 +76,19 @@ def file_and_line(max_steps: int = 50) -> str:
     try:
         while f and steps < max_steps:
             co = f.f_code
+            key = (co, f.f_lineno)
+            location = locations.get(key)
+            if location is not None:
+                return location
             filename = co.co_filename or ""
             base = os.path.basename(filename) if filename else ""
             modname = f.f_globals.get("__name__", "")
             is_self = (base == SELF_BASENAME) or (modname == SELF_MODNAME)
             is_synthetic = base in ("", "<string>", "<stdin>")
             if not is_self and not is_synthetic:
-                line = f.f_lineno or "?"
-                return f"{base}:{line}:{co.co_name}"
+                location = f"{base}:{f.f_lineno or '?'}:{co.co_name}"
+                locations[key] = location
+                return location
             f = f.f_back
             steps += 1
         return "?:?"
@@ -84,16 +97,126 @@ def file_and_line(max_steps: int = 50) -> str:
         del f
 
 
+# Logging only enqueues a record; log_writer formats and writes it on its own thread, so
+# that logging never blocks the event loop.  A record is (time, event, fields, location)
+# for log, (time, text, None, None) for preformatted text, or a threading.Event that the
+# writer sets once it has written everything before it.
+LogRecord: TypeAlias = (
+    tuple[float, str, dict[str, object] | None, str | None] | threading.Event
+)
+log_records: queue.SimpleQueue[LogRecord] = queue.SimpleQueue()
+log_writer_thread: threading.Thread | None = None
+log_writer_lock = threading.Lock()
+
+# If set by log_to_file, records are also written to this file as JSON lines, which is
+# rotated to .1, .2, ... once it exceeds max_bytes.
+json_log_path: Path | None = None
+json_log_max_bytes = 0
+json_log_backups = 0
+
+
+def log_to_file(path: Path, max_bytes: int, backups: int) -> None:
+    global json_log_path, json_log_max_bytes, json_log_backups
+    json_log_path = path
+    json_log_max_bytes = max_bytes
+    json_log_backups = backups
+
+
+def format_time(t: float) -> str:
+    now = datetime.datetime.fromtimestamp(t)
+    return f"{now.strftime('%Y-%m-%d %H:%M:%S')}.{now.microsecond // 1000:03d}"
+
+
+def rotate_json_log(path: Path) -> None:
+    for i in range(json_log_backups - 1, 0, -1):
+        older = path.with_name(f"{path.name}.{i}")
+        if older.exists():
+            older.replace(path.with_name(f"{path.name}.{i + 1}"))
+    if json_log_backups > 0:
+        path.replace(path.with_name(f"{path.name}.1"))
+    else:
+        path.unlink()
+
+
+def write_json_log(file: Any, t: float, event: str, fields: dict[str, object]) -> Any:
+    path = json_log_path
+    if path is None:
+        return None
+    if file is None or file.name != str(path):
+        file = path.open("a")
+    record = {"t": round(t, 3), "event": event, **fields}
+    file.write(json.dumps(record, default=str) + "\n")
+    if file.tell() >= json_log_max_bytes:
+        file.close()
+        rotate_json_log(path)
+        file = path.open("a")
+    return file
+
+
+def log_writer() -> NoReturn:
+    pid = os.getpid()
+    json_file: Any = None
+    while True:
+        record = log_records.get()
+        try:
+            if isinstance(record, threading.Event):
+                record.set()
+                continue
+            t, event, fields, location = record
+            if fields is None:
+                sys.stdout.write(event)
+            else:
+                parts = [f"{format_time(t)} [mvd {pid}]", event]
+                for k, v in fields.items():
+                    parts.append(f"{k}={v}")
+                sys.stdout.write(" ".join(parts) + "\n")
+                json_fields = fields if location is None else {**fields, "at": location}
+                json_file = write_json_log(json_file, t, event, json_fields)
+            if log_records.empty():
+                sys.stdout.flush()
+                if json_file is not None:
+                    json_file.flush()
+        # Fields are arbitrary objects whose str() can raise anything, and if this
+        # thread dies, logging stops for good.
+        except Exception:  # noqa: BLE001
+            traceback.print_exc()
+
+
+def enqueue_log(record: LogRecord) -> None:
+    global log_writer_thread
+    if log_writer_thread is None:
+        with log_writer_lock:
+            if log_writer_thread is None:
+                thread = threading.Thread(target=log_writer, name="log", daemon=True)
+                thread.start()
+                log_writer_thread = thread
+    log_records.put(record)
+
+
+def flush_log(timeout: float = 1.0) -> None:
+    if log_writer_thread is None:
+        return
+    written = threading.Event()
+    log_records.put(written)
+    written.wait(timeout)
+
+
+atexit.register(flush_log)
+
+
 def log(event: str, **fields: object) -> None:
     if RunMode.get() != RunMode.Daemon:
         return
-    now = datetime.datetime.now()
-    ts = f"{now.strftime('%Y-%m-%d %H:%M:%S')}.{now.microsecond // 1000:03d}"
-    pid = os.getpid()
-    parts = [f"{ts} [mvd {pid}]", event]
+    # Format mutable values now, rather than on the writer thread.
     for k, v in fields.items():
-        parts.append(f"{k}={v}")
-    print(" ".join(parts))
+        if not isinstance(v, (str, int, float, bool, type(None))):
+            fields[k] = str(v)
+    location = file_and_line() if json_log_path is not None else None
+    enqueue_log((time.time(), event, fields, location))
+
+
+def log_text(text: str) -> None:
+    enqueue_log((time.time(), text, None, None))
 
 
 def log_exc(e: Exception) -> None:
@@ -101,7 +224,7 @@ def log_exc(e: Exception) -> None:
         return
     fl = file_and_line()
     log(f"{fl} exception")
-    traceback.print_exc()
+    log_text(traceback.format_exc())
     debug_print(e)
 
 
@@ -119,14 +242,15 @@ def debug_print(*args: Any) -> None:
     last_ts = now
     pid = os.getpid()
     fl = file_and_line()
-    pprint.pprint(
+    # We format here, because args may change before the writer gets to them.
+    text = pprint.pformat(
         (f"[mvd {pid}] ({dt}ms) {fl}", *args),
         indent=indent,
         width=width,
         depth=depth,
         sort_dicts=False,
     )
-    sys.stdout.flush()
+    log_text(text + "\n")
 
 
 def fail(*args: object) -> NoReturn:
@@ -220,12 +344,14 @@ __all__ = [
     "Dict",
     "fail",
     "field",
+    "flush_log",
     "Generic",
     "JSON",
     "Jsonable",
     "List",
     "log",
     "log_exc",
+    "log_to_file",
     "Mapping",
     "MyStrEnum",
     "NoReturn",
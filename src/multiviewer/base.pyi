@@ -89,7 +89,19 @@ def debug_print(*args: Any) -> None:
     """pretty prints the supplied arguments"""
 
 def log(event: str, **fields: Any) -> None:
-    """outputs a timestamped line and the supplied fields"""
+    """
+    outputs a timestamped line and the supplied fields.  Only enqueues them; a background
+    thread does the formatting and output.
+    """
+
+def log_to_file(path: Path, max_bytes: int, backups: int) -> None:
+    """
+    Also log to path, as JSON lines that include the code location.  When path exceeds
+    max_bytes, it is rotated to path.1, and so on up to path.<backups>.
+    """
+
+def flush_log(timeout: float = 1.0) -> None:
+    """Waits, for at most timeout seconds, for the log to be written.  Runs at exit."""
 
 def log_exc(e: Exception) -> None: ...
 
@@ -108,12 +120,14 @@ __all__ = [
     "Dict",
     "fail",
     "field",
+    "flush_log",
     "Generic",
     "JSON",
     "Jsonable",
     "List",
     "log",
     "log_exc",
+    "log_to_file",
     "Mapping",
     "MyStrEnum",
     "NoReturn",
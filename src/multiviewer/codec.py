@@ -0,0 +1,359 @@
+from __future__ import annotations
+
+# Standard library
+import argparse
+import dataclasses
+import itertools
+import json
+import sys
+import time
+import types
+import typing
+from enum import Enum
+from typing import cast
+
+# Local package
+from . import aio, json_field
+from .base import *
+from .jtech import Color, Hdmi, PipLocation
+from .jtech_output import JtechOutput, Pip, WindowContents
+from .mv_screen import MvScreen
+from .volume import Volume
+
+T = TypeVar("T")
+Encoder = Callable[[Any], Any]
+Expr = Callable[[str], str]
+
+# Generated functions and the constants they refer to live in this namespace, and refer
+# to each other by name, so that (mutually) recursive dataclasses work.
+namespace: dict[str, Any] = {}
+names: dict[type, str] = {}
+sources: dict[type, str] = {}
+counter = itertools.count()
+
+PRIMITIVES = (int, float, str, bool, type(None))
+
+
+def fresh(prefix: str) -> str:
+    return f"{prefix}{next(counter)}"
+
+
+def constant(value: object, prefix: str = "c") -> str:
+    name = fresh(prefix)
+    namespace[name] = value
+    return name
+
+
+def is_omitted(f: dataclasses.Field[Any]) -> bool:
+    return f.metadata.get("dataclasses_json") is json_field.omit["dataclasses_json"]
+
+
+def field_type(cls: type, f: dataclasses.Field[Any]) -> Any:
+    t = f.type
+    if isinstance(t, str):
+        t = eval(t, vars(sys.modules[cls.__module__]))
+    return t
+
+
+def is_union(t: Any) -> bool:
+    return typing.get_origin(t) in (typing.Union, types.UnionType)
+
+
+def is_enum(t: Any) -> bool:
+    return isinstance(t, type) and issubclass(t, Enum)
+
+
+def is_dataclass(t: Any) -> bool:
+    return isinstance(t, type) and dataclasses.is_dataclass(t)
+
+
+def serialized_fields(cls: type) -> list[tuple[dataclasses.Field[Any], Any]]:
+    return [(f, field_type(cls, f)) for f in dataclasses.fields(cls) if not is_omitted(f)]
+
+
+def name_for(cls: type) -> str:
+    """The suffix of cls's generated functions, generating them if need be."""
+    name = names.get(cls)
+    if name is None:
+        name = fresh(f"{cls.__name__}_")
+        # Register before generating, in case cls refers to itself.
+        names[cls] = name
+        generate(cls, name)
+    return name
+
+
+# Expressions.  Enums encode by value, except in json_dict pairs, which use names, as
+# dataclasses_json and json_field do.
+
+
+def encode_expr(t: Any, x: str, by_name: bool = False) -> str:
+    if t in PRIMITIVES or t is Any:
+        return x
+    if is_enum(t):
+        return f"{x}.name" if by_name else f"{x}.value"
+    if is_dataclass(t):
+        return f"encode_{name_for(t)}({x})"
+    if is_union(t):
+        args = typing.get_args(t)
+        members = tuple(a for a in args if a is not type(None))
+        if len(members) < len(args):
+            v = fresh("v")
+            inner = encode_expr(union_of(members), v, by_name)
+            return f"(None if ({v} := {x}) is None else {inner})"
+        return f"{union_function('encode', members)}({x})"
+    origin = typing.get_origin(t)
+    if origin in (list, tuple):
+        elem_t = typing.get_args(t)[0] if typing.get_args(t) else Any
+        v = fresh("v")
+        return f"[{encode_expr(elem_t, v, by_name)} for {v} in {x}]"
+    if origin is dict:
+        key_t, value_t = typing.get_args(t)
+        k, v = fresh("k"), fresh("v")
+        key = encode_expr(key_t, k, by_name)
+        value = encode_expr(value_t, v, by_name)
+        return f"{{{key}: {value} for {k}, {v} in {x}.items()}}"
+    return x
+
+
+def decode_expr(t: Any, x: str, by_name: bool = False) -> str:
+    if t in PRIMITIVES or t is Any:
+        return x
+    if is_enum(t):
+        return f"{constant(t)}[{x}]" if by_name else f"{constant(t)}({x})"
+    if is_dataclass(t):
+        return f"decode_{name_for(t)}({x})"
+    if is_union(t):
+        args = typing.get_args(t)
+        members = tuple(a for a in args if a is not type(None))
+        if len(members) < len(args):
+            v = fresh("v")
+            inner = decode_expr(union_of(members), v, by_name)
+            return f"(None if ({v} := {x}) is None else {inner})"
+        return f"{union_function('decode', members)}({x})"
+    origin = typing.get_origin(t)
+    if origin in (list, tuple):
+        elem_t = typing.get_args(t)[0] if typing.get_args(t) else Any
+        v = fresh("v")
+        elems = f"[{decode_expr(elem_t, v, by_name)} for {v} in {x}]"
+        return elems if origin is list else f"tuple({elems})"
+    if origin is dict:
+        key_t, value_t = typing.get_args(t)
+        k, v = fresh("k"), fresh("v")
+        key = decode_expr(key_t, k, by_name)
+        value = decode_expr(value_t, v, by_name)
+        return f"{{{key}: {value} for {k}, {v} in {x}.items()}}"
+    return x
+
+
+def union_of(members: tuple[Any, ...]) -> Any:
+    union = members[0]
+    for m in members[1:]:
+        union = union | m
+    return union
+
+
+def union_function(kind: str, members: tuple[Any, ...]) -> str:
+    """
+    Generates a function that dispatches a union of dataclasses on the type when
+    encoding, and on the set of keys when decoding.
+    """
+    if not all(is_dataclass(m) for m in members):
+        fail(f"codec: unsupported union {members}")
+    name = fresh(f"{kind}_union_")
+    lines = [f"def {name}(x):"]
+    if kind == "encode":
+        for m in members:
+            lines.append(f"    if type(x) is {constant(m)}:")
+            lines.append(f"        return encode_{name_for(m)}(x)")
+    else:
+        key_sets: dict[frozenset[str], type] = {}
+        for m in members:
+            keys = frozenset(f.name for f, _ in serialized_fields(m))
+            if keys in key_sets:
+                fail(f"codec: {m} and {key_sets[keys]} have the same fields")
+            key_sets[keys] = m
+            lines.append(f"    if x.keys() == {constant(keys)}:")
+            lines.append(f"        return decode_{name_for(m)}(x)")
+    lines.append(f"    fail('codec: no member of {name} matches', x)")
+    exec_source("\n".join(lines))
+    return name
+
+
+def json_dict_exprs(meta: dict[str, Any], t: Any) -> tuple[Expr, Expr]:
+    """Makers of a json_dict field's encode and decode expressions."""
+    args = typing.get_args(t)
+
+    def exprs(t_or_codec: Any, i: int) -> tuple[Expr, Expr]:
+        if isinstance(t_or_codec, tuple):
+            codec = cast(tuple[Any, Any], t_or_codec)
+            enc, dec = constant(codec[0]), constant(codec[1])
+            return (lambda x: f"{enc}({x})", lambda x: f"{dec}({x})")
+        # Otherwise json_field's codec is for a type, which is also the declared one.
+        t = args[i]
+        return (
+            lambda x: encode_expr(t, x, by_name=True),
+            lambda x: decode_expr(t, x, by_name=True),
+        )
+
+    key_enc, key_dec = exprs(meta["key"], 0)
+    value_enc, value_dec = exprs(meta["value"], 1)
+
+    def encode(x: str) -> str:
+        k, v = fresh("k"), fresh("v")
+        return f"[[{key_enc(k)}, {value_enc(v)}] for {k}, {v} in {x}.items()]"
+
+    def decode(x: str) -> str:
+        k, v = fresh("k"), fresh("v")
+        return f"{{{key_dec(k)}: {value_dec(v)} for {k}, {v} in pairs({x})}}"
+
+    return encode, decode
+
+
+def field_exprs(t: Any) -> tuple[Expr, Expr]:
+    return (lambda x: encode_expr(t, x), lambda x: decode_expr(t, x))
+
+
+def generate(cls: type, name: str) -> None:
+    encodes: list[str] = []
+    init_args: list[str] = []
+    post_init: list[str] = []
+    for f, t in serialized_fields(cls):
+        meta = f.metadata.get("json_dict")
+        if meta is not None:
+            encode, decode = json_dict_exprs(meta, t)
+        else:
+            encode, decode = field_exprs(t)
+        key = repr(f.name)
+        encodes.append(f"        {key}: {encode(f'o.{f.name}')},")
+        value = decode(f"d[{key}]")
+        if not f.init:
+            post_init.append(f"    if {key} in d:")
+            post_init.append(f"        o.{f.name} = {value}")
+        elif f.default is not dataclasses.MISSING:
+            default = constant(f.default)
+            init_args.append(f"        {f.name}={value} if {key} in d else {default},")
+        elif f.default_factory is not dataclasses.MISSING:
+            factory = constant(f.default_factory)
+            init_args.append(f"        {f.name}={value} if {key} in d else {factory}(),")
+        else:
+            init_args.append(f"        {f.name}={value},")
+    cls_name = constant(cls)
+    source = "\n".join(
+        [
+            f"def encode_{name}(o):",
+            "    return {",
+            *encodes,
+            "    }",
+            "",
+            f"def decode_{name}(d):",
+            f"    o = {cls_name}(",
+            *init_args,
+            "    )",
+            *post_init,
+            "    return o",
+        ]
+    )
+    if False:
+        debug_print(source)
+    sources[cls] = source
+    exec_source(source)
+
+
+def pairs(x: Any) -> Any:
+    # Accept a legacy JSON object, as json_field does.
+    if type(x) is dict:
+        return cast(dict[Any, Any], x).items()
+    return x
+
+
+def exec_source(source: str) -> None:
+    namespace.setdefault("fail", fail)
+    namespace.setdefault("pairs", pairs)
+    exec(compile(source, "<codec>", "exec"), namespace)  # noqa: S102
+
+
+def encoder(cls: type) -> Encoder:
+    return namespace[f"encode_{name_for(cls)}"]
+
+
+def decoder(cls: type[T]) -> Callable[[Any], T]:
+    return namespace[f"decode_{name_for(cls)}"]
+
+
+def encode(o: object) -> JSON:
+    return encoder(type(o))(o)
+
+
+def decode(cls: type[T], d: Any) -> T:
+    return decoder(cls)(d)
+
+
+def to_json(o: object, indent: int | None = None) -> str:
+    return json.dumps(encode(o), indent=indent)
+
+
+def from_json(cls: type[T], s: str) -> T:
+    return decode(cls, json.loads(s))
+
+
+def time_per_call(f: Callable[[], object], n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        f()
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def stop_worker(o: object) -> None:
+    # Decoding a Volume starts its worker.
+    if isinstance(o, Volume):
+        cast(Any, o).worker_task.cancel()
+
+
+def benchmark_class(o: Any, n: int) -> JSON:
+    cls: Any = o.__class__
+    s = o.to_json()
+    if to_json(o) != s:
+        fail(f"codec: {cls.__name__} doesn't match dataclasses_json", to_json(o), s)
+    timings: dict[str, Callable[[], object]] = {
+        "dataclasses_json_save_us": lambda: o.to_json(),
+        "codec_save_us": lambda: to_json(o),
+        "dataclasses_json_load_us": lambda: stop_worker(cls.from_json(s)),
+        "codec_load_us": lambda: stop_worker(from_json(cls, s)),
+    }
+    return {label: round(time_per_call(f, n), 1) for label, f in timings.items()}
+
+
+async def benchmark(args: argparse.Namespace) -> JSON:
+    output = JtechOutput(
+        layout=Pip(
+            pip_location=PipLocation.NE,
+            w1=WindowContents(Hdmi.H1, None),
+            w2=WindowContents(Hdmi.H2, Color.RED),
+        ),
+        audio_from=Hdmi.H1,
+    )
+    volume = Volume()
+    results = {
+        type(o).__name__: benchmark_class(o, args.iterations)
+        for o in [MvScreen(), volume, output]
+    }
+    await volume.shutdown()
+    return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the generated codecs")
+    parser.add_argument("--iterations", type=int, default=1000)
+    args = parser.parse_args(argv)
+    RunMode.set(RunMode.Testing)
+    result: list[JSON] = []
+
+    async def run() -> None:
+        result.append(await benchmark(args))
+
+    aio.run_event_loop(run())
+    print(json.dumps(result[0], indent=2))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,31 @@
+"""
+Fast JSON codecs for the dataclasses that make up the multiviewer's state.
+
+dataclasses_json introspects a class's fields on every call, and decodes via marshmallow.
+For each dataclass, this module instead generates (once, on first use) a Python encode
+function and a decode function specialized to its fields, honoring json_field.omit and
+json_dict metadata.  The JSON is the same as dataclasses_json's, so state files written
+by either can be read by the other.  Unions of dataclasses, e.g. JtechOutput.layout, are
+decoded by matching the set of keys.
+
+Benchmark against dataclasses_json with:
+
+    python -m multiviewer.codec
+"""
+
+# Standard library
+import argparse
+
+# Local package
+from .base import *
+
+T = TypeVar("T")
+
+def encode(o: object) -> JSON:
+    """The JSON value for dataclass o, as dataclasses_json's to_dict would produce."""
+
+def decode(cls: type[T], d: Any) -> T: ...
+def to_json(o: object, indent: int | None = None) -> str: ...
+def from_json(cls: type[T], s: str) -> T: ...
+async def benchmark(args: argparse.Namespace) -> JSON: ...
+def main(argv: list[str] | None = None) -> None: ...
@@ -1,4 +1,7 @@
-"""Hosts and ports for devices used by multiviewer."""
+"""
+Hosts and ports for devices used by multiviewer, and persistence, logging and latency
+settings.
+"""
 
 from .tv import TV
 
@@ -14,3 +17,23 @@ TV_HOSTS = {
 
 WF2IR_HOST = "iTach071EC8"
 WF2IR_PORT = 4998
+
+# The command journal is fsynced after every command ("ALWAYS"), at most every
+# JOURNAL_FSYNC_INTERVAL seconds ("INTERVAL"), or only when the OS gets to it ("NEVER").
+JOURNAL_FSYNC = "INTERVAL"
+JOURNAL_FSYNC_INTERVAL = 1.0
+
+# The journal is compacted into a snapshot of the state after this many commands, or this
+# many seconds after the first command since the last snapshot.
+SNAPSHOT_EVERY_COMMANDS = 200
+SNAPSHOT_EVERY_SECONDS = 300.0
+
+# The daemon also logs JSON lines to LOG_JSON_FILE (None to disable), in its working
+# directory, rotated once it exceeds LOG_MAX_BYTES, keeping LOG_BACKUPS old files.
+LOG_JSON_FILE: str | None = "mvd.jsonl"
+LOG_MAX_BYTES = 10_000_000
+LOG_BACKUPS = 3
+
+# The service level objective for the time from receiving a command until the jtech shows
+# its output.
+LATENCY_SLO_MS = 300
@@ -3,6 +3,7 @@ from __future__ import annotations
 # Standard library
 import json
 import threading
+import time
 from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 from typing import cast
 
@@ -22,13 +23,13 @@ class Server(ThreadingHTTPServer):
 
     stop: bool
 
-    run_command: Callable[[list[str]], Awaitable[JSON]]
+    run_command: Callable[[list[str], float], Awaitable[JSON]]
 
     def __init__(
         self,
         server_address: tuple[str, int],
         request_handler_class: type[SimpleHTTPRequestHandler],
-        run_command: Callable[[list[str]], Awaitable[JSON]],
+        run_command: Callable[[list[str], float], Awaitable[JSON]],
     ):
         super().__init__(server_address, request_handler_class)
         self.run_command = run_command
@@ -52,6 +53,7 @@ class RequestHandler(SimpleHTTPRequestHandler):
         self.respond(200, {})
 
     def do_POST(self):
+        received_at = time.monotonic()
         try:
             raw = self.rfile.read(int(self.headers.get("Content-Length", "0")))
             command_json = json.loads(raw.decode())["command"]
@@ -64,7 +66,7 @@ class RequestHandler(SimpleHTTPRequestHandler):
             return
         try:
             response = aio.run_coroutine_threadsafe(
-                cast(Server, self.server).run_command(command.split())
+                cast(Server, self.server).run_command(command.split(), received_at)
             )
             self.respond(200, response)
         except Exception as e:
@@ -72,7 +74,9 @@ class RequestHandler(SimpleHTTPRequestHandler):
             self.respond(400, {})
 
 
-def serve_until_stopped(run_command: Callable[[list[str]], Awaitable[JSON]]) -> Server:
+def serve_until_stopped(
+    run_command: Callable[[list[str], float], Awaitable[JSON]],
+) -> Server:
     if False:
         debug_print(run_command)
     server = Server((HTTP_HOST, HTTP_PORT), RequestHandler, run_command)
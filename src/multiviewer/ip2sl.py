@@ -3,7 +3,7 @@ from __future__ import annotations
 # Standard library
 import contextlib
 
-from . import aio, config
+from . import aio, config, recorder, resolver, startup
 
 # Local package
 from .base import *
@@ -21,12 +21,16 @@ class Connection:
 
     @classmethod
     async def create(cls) -> Connection:
-        reader, writer = await aio.open_connection(config.ITACH_HOST, config.ITACH_PORT)
+        reader, writer = await resolver.open_connection(
+            config.ITACH_HOST, config.ITACH_PORT
+        )
+        startup.mark("jtech connected")
         return Connection(reader=reader, writer=writer)
 
     async def read_line(self) -> str:
         line = await self.reader.readuntil(b"\n")
         response = line.decode("ascii", errors="strict").strip()
+        recorder.record(recorder.Kind.JTECH_RECV, response)
         if False:
             log(f"jtech--> {response}")
         return response
@@ -40,6 +44,7 @@ class Connection:
     async def write_line(self, line: str) -> None:
         if False:
             log(f"jtech<-- {line}")
+        recorder.record(recorder.Kind.JTECH_SEND, line)
         self.writer.write(line.encode("ascii") + TERM)
         await self.writer.drain()
 
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+# Local package
+from .base import *
+
+
+class Protocol(MyStrEnum):
+    NEC = auto()
+    SAMSUNG = auto()
+
+
+# Both protocols send 32 bits, LSB first, each a mark followed by a short (0) or long (1)
+# space.  They differ in the leader: NEC's is a 9ms mark, Samsung's a 4.5ms mark.
+BITS = 32
+NEC_LEADER_MARK_US = 9000
+SAMSUNG_LEADER_MARK_US = 4500
+LEADER_TOLERANCE = 0.25
+
+# A space longer than this ends a frame.
+FRAME_GAP_US = 10000
+
+# The most times one sendir can repeat its IR sequence.
+MAX_REPEAT = 50
+
+
+# Pulse lengths are in carrier cycles, as in sendir.
+@dataclass(frozen=True, slots=True)
+class Timing:
+    leader_mark: int
+    leader_space: int
+    bit_mark: int
+    zero_space: int
+    one_space: int
+
+
+@dataclass(frozen=True, slots=True)
+class Frame:
+    protocol: Protocol
+    address: int
+    command: int
+    timing: Timing
+    # The space after the stop mark.
+    gap: int
+
+    def data(self) -> int:
+        address, command = self.address, self.command
+        match self.protocol:
+            case Protocol.NEC:
+                # Extended NEC has a 16-bit address; plain NEC, an address and its
+                # inverse.
+                high = address >> 8 if address > 0xFF else ~address & 0xFF
+                b0, b1 = address & 0xFF, high
+            case Protocol.SAMSUNG:
+                b0, b1 = address, address
+        return b0 | b1 << 8 | command << 16 | (~command & 0xFF) << 24
+
+    def pulses(self) -> list[int]:
+        t = self.timing
+        data = self.data()
+        pulses = [t.leader_mark, t.leader_space]
+        for i in range(BITS):
+            pulses += [t.bit_mark, t.one_space if data >> i & 1 else t.zero_space]
+        pulses += [t.bit_mark, self.gap]
+        return pulses
+
+
+# Anything we don't recognize as a frame, e.g. the tail of a learned code, is kept as is.
+@dataclass(frozen=True, slots=True)
+class RawFrame:
+    pulses_: tuple[int, ...]
+
+    def pulses(self) -> list[int]:
+        return list(self.pulses_)
+
+
+@dataclass(frozen=True, slots=True)
+class Code:
+    name: str
+    carrier: int
+    frames: tuple[Frame | RawFrame, ...]
+    # The 1-based index of the first pulse that a repeat resends.
+    offset: int = 1
+    connector: str = "1:3"
+
+    def pulses(self, carrier: int | None = None) -> list[int]:
+        pulses = [p for frame in self.frames for p in frame.pulses()]
+        if carrier is None or carrier == self.carrier:
+            return pulses
+        # Pulse lengths are in carrier cycles; keep their durations.
+        return [max(1, round(p * carrier / self.carrier)) for p in pulses]
+
+    def sendir(self, *, id: int, repeat: int = 1, carrier: int | None = None) -> str:
+        carrier = carrier or self.carrier
+        pulses = ",".join(str(p) for p in self.pulses(carrier))
+        return f"sendir,{self.connector},{id},{carrier},{repeat},{self.offset},{pulses}\r"
+
+    def transmit_seconds(self, repeat: int = 1) -> float:
+        pulses = self.pulses()
+        repeated = pulses[self.offset - 1 :]
+        return (sum(pulses) + (repeat - 1) * sum(repeated)) / self.carrier
+
+
+def cycles_to_us(cycles: int, carrier: int) -> float:
+    return cycles * 1_000_000 / carrier
+
+
+def leader_protocol(mark: int, carrier: int) -> Protocol | None:
+    us = cycles_to_us(mark, carrier)
+    for protocol, leader_us in (
+        (Protocol.NEC, NEC_LEADER_MARK_US),
+        (Protocol.SAMSUNG, SAMSUNG_LEADER_MARK_US),
+    ):
+        if abs(us - leader_us) <= leader_us * LEADER_TOLERANCE:
+            return protocol
+    return None
+
+
+def decode_frame(pulses: list[int], carrier: int) -> Frame | RawFrame:
+    raw = RawFrame(tuple(pulses))
+    if len(pulses) != 2 + 2 * BITS + 2:
+        return raw
+    protocol = leader_protocol(pulses[0], carrier)
+    if protocol is None:
+        return raw
+    marks = pulses[2::2]
+    spaces = pulses[3 : 2 + 2 * BITS : 2]
+    bit_mark = marks[0]
+    zero_space, one_space = min(spaces), max(spaces)
+    data = sum(1 << i for i, space in enumerate(spaces) if space == one_space)
+    address = data & 0xFFFF
+    command = data >> 16 & 0xFF
+    # Samsung repeats the address byte; plain NEC sends it and its inverse.
+    if protocol == Protocol.SAMSUNG or data >> 8 & 0xFF == ~data & 0xFF:
+        address &= 0xFF
+    timing = Timing(pulses[0], pulses[1], bit_mark, zero_space, one_space)
+    frame = Frame(protocol, address, command, timing, pulses[-1])
+    # We only accept frames that we'd encode exactly as learned; anything else, e.g. with
+    # jittery timings or a bad checksum, stays raw.
+    if frame.pulses() != pulses:
+        return raw
+    return frame
+
+
+def decode_pulses(pulses: list[int], carrier: int) -> tuple[Frame | RawFrame, ...]:
+    frames: list[Frame | RawFrame] = []
+    start = 0
+    for i in range(1, len(pulses), 2):
+        if cycles_to_us(pulses[i], carrier) > FRAME_GAP_US or i == len(pulses) - 1:
+            frames.append(decode_frame(pulses[start : i + 1], carrier))
+            start = i + 1
+    return tuple(frames)
+
+
+def decode_sendir(name: str, text: str) -> Code:
+    # sendir,<connector>,<ID>,<carrier>,<repeat>,<offset>,<on1>,<off1>,...
+    fields = text.strip().split(",")
+    if len(fields) < 8 or fields[0] != "sendir":
+        fail("not a sendir", text)
+    carrier, offset = int(fields[3]), int(fields[5])
+    pulses = [int(x) for x in fields[6:]]
+    return Code(name, carrier, decode_pulses(pulses, carrier), offset, fields[1])
+
+
+def decode_pronto(name: str, text: str) -> Code:
+    # 0000 <carrier> <once pairs> <repeat pairs> <pulses...>, all hex words, with pulses
+    # in carrier cycles.
+    words = [int(word, 16) for word in text.split()]
+    if len(words) < 4 or words[0] != 0:
+        fail("not a learned Pronto code", text)
+    carrier = round(1_000_000 / (words[1] * 0.241246))
+    once, repeat = words[2], words[3]
+    pulses = words[4:]
+    if len(pulses) != 2 * (once + repeat):
+        fail("Pronto code has the wrong length", text)
+    # A sendir repeat resends the Pronto code's repeat sequence, if it has one.
+    offset = 2 * once + 1 if repeat else 1
+    return Code(name, carrier, decode_pulses(pulses, carrier), offset)
+
+
+# The soundbar's codes, as learned by the WF2IR.
+LEARNED_VOLUME_UP = (
+    "sendir,1:3,1,37878,1,1,"
+    "171,170,22,21,22,21,22,63,22,63,22,21,22,63,22,21,22,21,22,21,22,21,"
+    "22,63,22,63,22,21,22,63,22,21,22,21,22,63,22,63,22,63,22,21,22,63,22,21,22,21,22,21,22,21,"
+    "22,21,22,21,22,63,22,21,22,63,22,63,22,63,22,1779,"
+    "171,170,22,63,22,3650\r"
+)
+
+LEARNED_VOLUME_DOWN = (
+    "sendir,1:3,1,37878,1,1,"
+    "171,170,22,21,22,21,22,63,22,63,22,21,22,63,22,21,22,21,22,21,22,21,"
+    "22,63,22,63,22,21,22,63,22,21,22,21,22,21,22,63,22,63,22,21,22,63,22,21,22,21,22,21,22,63,"
+    "22,21,22,21,22,63,22,21,22,63,22,63,22,63,22,1778,"
+    "171,170,22,63,22,3648\r"
+)
+
+LEARNED_MUTE = (
+    "sendir,1:3,1,37878,1,1,171,170,22,21,22,21,22,63,22,63,22,21,22,63,22,21,22,21,22,21,22,21,"
+    "22,63,22,63,22,21,22,63,22,21,22,21,22,63,22,63,22,63,22,63,22,63,22,21,22,21,22,21,22,21,"
+    "22,21,22,21,22,21,22,21,22,63,22,63,22,63,22,1779,171,170,22,63,22,3651,171,170,22,63,22,4848\r"
+)
+
+VOLUME_UP = decode_sendir("volume_up", LEARNED_VOLUME_UP)
+VOLUME_DOWN = decode_sendir("volume_down", LEARNED_VOLUME_DOWN)
+MUTE = decode_sendir("mute", LEARNED_MUTE)
+
+
+# A sendir, ready to write to the WF2IR.
+@dataclass(frozen=True, slots=True)
+class Command:
+    code: str
+    repeat: int
+    id: int
+    data: bytes
+    transmit_seconds: float
+
+
+def compile_bursts(codes: list[Code]) -> dict[str, tuple[Command, ...]]:
+    # Each (code, repeat) gets its own stable sendir ID, which the WF2IR echoes back in
+    # its completeir.
+    bursts: dict[str, tuple[Command, ...]] = {}
+    for i, code in enumerate(codes):
+        commands: list[Command] = []
+        for repeat in range(1, MAX_REPEAT + 1):
+            id = (i + 1) * 100 + repeat
+            text = code.sendir(id=id, repeat=repeat)
+            seconds = code.transmit_seconds(repeat)
+            commands.append(Command(code.name, repeat, id, text.encode("ascii"), seconds))
+        bursts[code.name] = tuple(commands)
+    return bursts
+
+
+BURSTS = compile_bursts([VOLUME_UP, VOLUME_DOWN, MUTE])
+
+
+def burst(code: Code, repeat: int) -> Command:
+    if not 1 <= repeat <= MAX_REPEAT:
+        fail("bad repeat count", repeat)
+    bursts = BURSTS.get(code.name)
+    if bursts is None:
+        # Not precompiled; build it now.
+        text = code.sendir(id=repeat, repeat=repeat)
+        seconds = code.transmit_seconds(repeat)
+        return Command(code.name, repeat, repeat, text.encode("ascii"), seconds)
+    return bursts[repeat - 1]
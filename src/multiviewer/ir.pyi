@@ -0,0 +1,91 @@
+"""
+IR codes, decoded into structured frames, re-encoded as sendir commands for the WF2IR.
+
+Codes are decoded from learned sendir strings or Pronto hex into NEC/Samsung frames (and
+raw pulses for anything unrecognized), and can be re-encoded with any repeat count and
+carrier.  The soundbar's bursts (each code with each repeat count) are compiled into ready
+to send bytes once, at import.
+"""
+
+# Local package
+from .base import *
+
+class Protocol(MyStrEnum):
+    NEC = auto()
+    SAMSUNG = auto()
+
+# The most times one sendir can repeat its IR sequence.
+MAX_REPEAT: int
+
+@dataclass(frozen=True, slots=True)
+class Timing:
+    """Pulse lengths, in carrier cycles."""
+
+    leader_mark: int
+    leader_space: int
+    bit_mark: int
+    zero_space: int
+    one_space: int
+
+@dataclass(frozen=True, slots=True)
+class Frame:
+    """A 32-bit NEC or Samsung frame, followed by gap cycles of silence."""
+
+    protocol: Protocol
+    address: int
+    command: int
+    timing: Timing
+    gap: int
+
+    def data(self) -> int:
+        """The 32 bits, in the order sent (LSB first)."""
+
+    def pulses(self) -> list[int]: ...
+
+@dataclass(frozen=True, slots=True)
+class RawFrame:
+    pulses_: tuple[int, ...]
+
+    def pulses(self) -> list[int]: ...
+
+@dataclass(frozen=True, slots=True)
+class Code:
+    name: str
+    carrier: int
+    frames: tuple[Frame | RawFrame, ...]
+    offset: int = 1
+    connector: str = "1:3"
+
+    def pulses(self, carrier: int | None = None) -> list[int]:
+        """The code's pulses, in cycles of carrier (default: the code's own carrier)."""
+
+    def sendir(self, *, id: int, repeat: int = 1, carrier: int | None = None) -> str: ...
+    def transmit_seconds(self, repeat: int = 1) -> float: ...
+
+def decode_sendir(name: str, text: str) -> Code: ...
+def decode_pronto(name: str, text: str) -> Code: ...
+
+# The soundbar's codes, as learned by the WF2IR.
+LEARNED_VOLUME_UP: str
+LEARNED_VOLUME_DOWN: str
+LEARNED_MUTE: str
+
+VOLUME_UP: Code
+VOLUME_DOWN: Code
+MUTE: Code
+
+@dataclass(frozen=True, slots=True)
+class Command:
+    """A sendir, ready to write to the WF2IR."""
+
+    code: str
+    repeat: int
+    id: int
+    data: bytes
+    transmit_seconds: float
+
+def burst(code: Code, repeat: int) -> Command:
+    """
+    The sendir that presses code repeat times.  The soundbar's codes are precompiled, with
+    a stable ID per (code, repeat).
+    """
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+# Standard library
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+from typing import TextIO
+
+# Local package
+from . import aio, config
+from .base import *
+
+
+class FsyncPolicy(MyStrEnum):
+    ALWAYS = auto()
+    INTERVAL = auto()
+    NEVER = auto()
+
+
+def path_for(state_path: Path) -> Path:
+    return state_path.with_name(state_path.stem + ".journal")
+
+
+@dataclass(slots=True)
+class Entry:
+    seq: int
+    at: datetime
+    args: list[str]
+    result: JSON
+
+    def to_line(self) -> str:
+        j: JSON = {
+            "seq": self.seq,
+            "at": self.at.isoformat(),
+            "args": self.args,
+            "result": self.result,
+        }
+        return json.dumps(j, separators=(",", ":")) + "\n"
+
+    @classmethod
+    def of_line(cls, line: str) -> Entry:
+        j = json.loads(line)
+        return cls(j["seq"], datetime.fromisoformat(j["at"]), j["args"], j["result"])
+
+
+def read(path: Path) -> list[Entry]:
+    if not path.exists():
+        return []
+    entries: list[Entry] = []
+    for i, line in enumerate(path.read_text().splitlines()):
+        if not line.strip():
+            continue
+        try:
+            entries.append(Entry.of_line(line))
+        except (ValueError, KeyError, TypeError) as e:
+            # Most likely the last line, cut short by a crash.
+            log(f"skipping bad journal line {i + 1}", error=repr(e))
+    return entries
+
+
+@dataclass(slots=True)
+class Journal:
+    path: Path
+    state_path: Path
+    file: TextIO = field(repr=False)
+    seq: int = 0
+    fsync_policy: FsyncPolicy = FsyncPolicy.INTERVAL
+    fsync_interval: float = 1.0
+    # Commands appended since the last snapshot, and when the first of them was.
+    unsnapshotted: int = 0
+    first_unsnapshotted_at: float = 0.0
+    snapshot_scheduled: bool = False
+    last_fsync_at: float = 0.0
+    # Under FsyncPolicy.INTERVAL, fsyncs the lines appended since the last fsync.
+    fsync_timer: asyncio.TimerHandle | None = field(default=None, repr=False)
+    appends: int = 0
+    append_ms: float = 0.0
+    max_append_ms: float = 0.0
+    fsyncs: int = 0
+    snapshots: int = 0
+
+    @classmethod
+    def open(cls, state_path: Path, *, seq: int) -> Journal:
+        path = path_for(state_path)
+        return cls(
+            path,
+            state_path,
+            path.open("a", encoding="utf-8"),
+            seq,
+            FsyncPolicy(config.JOURNAL_FSYNC),
+            config.JOURNAL_FSYNC_INTERVAL,
+        )
+
+    def append(self, at: datetime, args: list[str], result: JSON) -> int:
+        t0 = time.perf_counter()
+        self.seq += 1
+        self.file.write(Entry(self.seq, at, args, result).to_line())
+        # Flushing hands the line to the OS, so it survives our crashing; fsyncing makes
+        # it survive the OS crashing, or the Mac losing power.
+        self.file.flush()
+        match self.fsync_policy:
+            case FsyncPolicy.ALWAYS:
+                self.fsync()
+            case FsyncPolicy.INTERVAL:
+                if time.monotonic() - self.last_fsync_at >= self.fsync_interval:
+                    self.fsync()
+                elif self.fsync_timer is None:
+                    # The next append may not come for a long time, so we don't leave
+                    # this line unsynced until then.
+                    self.fsync_timer = aio.call_later(self.fsync_interval, self.fsync)
+            case FsyncPolicy.NEVER:
+                pass
+        if self.unsnapshotted == 0:
+            self.first_unsnapshotted_at = time.monotonic()
+        self.unsnapshotted += 1
+        ms = (time.perf_counter() - t0) * 1000
+        self.appends += 1
+        self.append_ms += ms
+        self.max_append_ms = max(self.max_append_ms, ms)
+        return self.seq
+
+    def fsync(self) -> None:
+        if self.fsync_timer is not None:
+            self.fsync_timer.cancel()
+            self.fsync_timer = None
+        os.fsync(self.file.fileno())
+        self.fsyncs += 1
+        self.last_fsync_at = time.monotonic()
+
+    def should_snapshot(self) -> bool:
+        if self.snapshot_scheduled or self.unsnapshotted == 0:
+            return False
+        age = time.monotonic() - self.first_unsnapshotted_at
+        return (
+            self.unsnapshotted >= config.SNAPSHOT_EVERY_COMMANDS
+            or age >= config.SNAPSHOT_EVERY_SECONDS
+        )
+
+    def truncate(self) -> None:
+        # Called once the state, including every command so far, is safely in a snapshot.
+        self.file.seek(0)
+        self.file.truncate()
+        self.fsync()
+        self.unsnapshotted = 0
+        self.snapshot_scheduled = False
+        self.snapshots += 1
+
+    def status(self) -> JSON:
+        return {
+            "seq": self.seq,
+            "fsync_policy": self.fsync_policy,
+            "unsnapshotted": self.unsnapshotted,
+            "appends": self.appends,
+            "avg_append_ms": round(self.append_ms / max(self.appends, 1), 3),
+            "max_append_ms": round(self.max_append_ms, 3),
+            "fsyncs": self.fsyncs,
+            "snapshots": self.snapshots,
+        }
+
+    def close(self) -> None:
+        if not self.file.closed:
+            self.file.flush()
+            self.fsync()
+            self.file.close()
@@ -0,0 +1,54 @@
+"""
+An append-only journal of the commands applied to the multiviewer, so that state survives
+a crash (or the Mac sleeping) without our writing the whole state on every press.
+
+Each command is appended as a JSON line with its sequence number, time, args, and result,
+and fsynced per config.JOURNAL_FSYNC.  Periodically, the state is saved as a snapshot,
+recording the last sequence number it includes, and the journal is truncated.  On load,
+commands after the snapshot's sequence number are replayed on top of it.
+"""
+
+# Standard library
+from datetime import datetime
+
+# Local package
+from .base import *
+
+class FsyncPolicy(MyStrEnum):
+    ALWAYS = auto()
+    INTERVAL = auto()
+    NEVER = auto()
+
+def path_for(state_path: Path) -> Path:
+    """The journal that goes with the snapshot at state_path, e.g. state.journal."""
+
+@dataclass(slots=True)
+class Entry:
+    seq: int
+    at: datetime
+    args: list[str]
+    result: JSON
+
+def read(path: Path) -> list[Entry]:
+    """The journal's entries, skipping any line that a crash cut short."""
+
+class Journal:
+    path: Path
+    state_path: Path
+    snapshot_scheduled: bool
+    fsync_policy: FsyncPolicy
+    fsync_interval: float
+
+    @classmethod
+    def open(cls, state_path: Path, *, seq: int) -> Journal:
+        """Opens the journal for state_path, for appending after sequence number seq."""
+
+    def append(self, at: datetime, args: list[str], result: JSON) -> int:
+        """Appends a command, returning its sequence number."""
+
+    def should_snapshot(self) -> bool: ...
+    def truncate(self) -> None:
+        """Empties the journal, once a snapshot includes all of its commands."""
+
+    def status(self) -> JSON: ...
+    def close(self) -> None: ...
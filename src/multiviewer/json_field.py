@@ -106,4 +106,8 @@ def json_dict(key_t_or_codec: Any, val_t_or_codec: Any) -> dict[str, Any]:
             it = pairs
         return {k_dec(k): v_dec(v) for k, v in it}
 
-    return config(encoder=encoder, decoder=decoder)
+    # codec.py generates its own, faster, code from the key and value types.
+    return {
+        **config(encoder=encoder, decoder=decoder),
+        "json_dict": {"key": key_t_or_codec, "value": val_t_or_codec},
+    }
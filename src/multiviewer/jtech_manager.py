@@ -2,18 +2,22 @@
 import dataclasses
 
 # Local package
-from . import aio, json_field
+from . import aio, json_field, latency, recorder
 from .aio import Event, Task
 from .base import *
 from .jtech import Jtech, Power
 from .jtech_output import JtechOutput
 
+PROBE_TIMEOUT = 2.0
+
 
 @dataclass(slots=True)
 class JtechManager:
     should_send_commands_to_device: bool = False
     desired_power: Power | None = None
     desired_output: JtechOutput | None = None
+    # The request that led to desired_output, until the jtech reaches it.
+    desired_request: latency.Request | None = None
     jtech: Jtech = Jtech.field()
     jtech_output: JtechOutput | None = None
     desynced_event: Event = Event.field()
@@ -32,6 +36,9 @@ class JtechManager:
     async def synced(self) -> None:
         await self.synced_event.wait()
 
+    async def shutdown(self) -> None:
+        await aio.cancel(self.task)
+
     def desync(self):
         self.desynced_event.set()
         self.synced_event.clear()
@@ -51,11 +58,32 @@ class JtechManager:
             self.desired_power = desired_power
             self.desync()
 
-    def set_output(self, desired_output: JtechOutput) -> None:
+    def set_output(
+        self, desired_output: JtechOutput, request: latency.Request | None = None
+    ) -> None:
         if desired_output != self.desired_output:
+            if self.desired_request is not None:
+                latency.superseded(self.desired_request)
             self.desired_output = desired_output
+            self.desired_request = request
             self.desync()
 
+    async def probe_power(self) -> Power | None:
+        # Until desired_power is set, sync doesn't send commands, so this doesn't
+        # interleave with it.
+        if self.desired_power is not None:
+            fail("probe_power must be called before setting the power")
+        try:
+            power = await aio.wait_for(self.jtech.read_power(), timeout=PROBE_TIMEOUT)
+        # The connection fails with OSError, or EOFError if it's cut mid-line; a garbled
+        # or unexpected reply fails with ValueError or RuntimeError.
+        except (OSError, EOFError, ValueError, RuntimeError) as e:
+            log("could not read jtech power", error=repr(e))
+            power = None
+        if power is None:
+            await self.jtech.reset()
+        return power
+
     def power_on(self) -> None:
         self.set_power(Power.ON)
 
@@ -85,9 +113,13 @@ class JtechManager:
         desired_output = self.desired_output
         if desired_output is None:
             return True
+        request = self.desired_request
         log(f"setting jtech output: {desired_output}")
         if await desired_output.set(jtech, self.should_abort):
             log("set jtech output finished")
+            if request is not None and request is self.desired_request:
+                latency.reached(request)
+                self.desired_request = None
             await jtech.unmute(force=True)
         else:
             log("set jtech output aborted")
@@ -108,6 +140,7 @@ class JtechManager:
             is_synced = self.jtech_output == desired_output
             if not is_synced:
                 log("jtech output mismatch")
+                recorder.dump("jtech mismatch")
             return is_synced
 
     # The call to self.sync in sync_forever is the only code that sends commands to the
@@ -118,6 +151,7 @@ class JtechManager:
                 self.desynced_event.clear()
                 is_synced = await aio.wait_for(self.sync(), timeout=10)
                 if is_synced is None:
+                    recorder.dump("jtech sync timeout")
                     fail("sync timeout")
                 if is_synced and not self.desynced_event.is_set():
                     self.synced_event.set()
@@ -126,4 +160,5 @@ class JtechManager:
                 log_exc(e)
                 if RunMode.get() == RunMode.Daemon:
                     debug_print(self)
+                recorder.dump("jtech sync failure")
                 await self.jtech.reset()
@@ -3,16 +3,34 @@ Manage the jtech device, by continually syncing the desired power and output.
 """
 
 # Local package
+from . import latency
 from .base import *
+from .jtech import Power
 from .jtech_output import JtechOutput
 
 class JtechManager:
     @classmethod
     def field(cls) -> JtechManager: ...
+    async def probe_power(self) -> Power | None:
+        """
+        Reads the jtech's power, or None if it can't.  Only for use at startup, before
+        setting the desired power.
+        """
+
     def power_on(self) -> None: ...
     def power_off(self) -> None: ...
-    def set_output(self, desired_output: JtechOutput) -> None: ...
+    def set_output(
+        self, desired_output: JtechOutput, request: latency.Request | None = None
+    ) -> None:
+        """
+        Sets the desired output.  request, if any, is the command that led to it, which
+        is reported to latency once the jtech reaches the output.
+        """
+
     def set_should_send_commands_to_device(self, b: bool) -> None: ...
     async def current_output(self) -> JtechOutput: ...
     def synced(self) -> Awaitable[None]:
         """Wait until the jtech is synced to desired power and output."""
+
+    async def shutdown(self) -> None:
+        """Stops syncing the jtech."""
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+# Standard library
+import time
+from collections import deque
+
+# Local package
+from . import config
+from .base import *
+from .loop_monitor import percentile
+
+# Percentiles are over each command's last WINDOW samples.
+WINDOW = 200
+
+
+@dataclass(slots=True)
+class Request:
+    # A command that changed the desired jtech output, and when its HTTP request arrived.
+    command: str
+    received_at: float
+
+
+@dataclass(slots=True)
+class Stats:
+    latencies_ms: deque[float] = field(default_factory=lambda: deque(maxlen=WINDOW))
+    reached: int = 0
+    superseded: int = 0
+    violations: int = 0
+    max_ms: float = 0.0
+
+    def status(self) -> JSON:
+        latencies = sorted(self.latencies_ms)
+        return {
+            "reached": self.reached,
+            "superseded": self.superseded,
+            "violations": self.violations,
+            "p50_ms": round(percentile(latencies, 0.5)),
+            "p90_ms": round(percentile(latencies, 0.9)),
+            "max_ms": round(self.max_ms),
+        }
+
+
+stats: dict[str, Stats] = {}
+
+
+def stats_for(command: str) -> Stats:
+    s = stats.get(command)
+    if s is None:
+        s = Stats()
+        stats[command] = s
+    return s
+
+
+def reached(request: Request) -> None:
+    ms = (time.monotonic() - request.received_at) * 1000
+    s = stats_for(request.command)
+    s.reached += 1
+    s.latencies_ms.append(ms)
+    s.max_ms = max(s.max_ms, ms)
+    if ms > config.LATENCY_SLO_MS:
+        s.violations += 1
+        log(f"{request.command} took {ms:.0f}ms, over the {config.LATENCY_SLO_MS}ms SLO")
+
+
+def superseded(request: Request) -> None:
+    stats_for(request.command).superseded += 1
+
+
+def status() -> JSON:
+    return {
+        "slo_ms": config.LATENCY_SLO_MS,
+        "violations": sum(s.violations for s in stats.values()),
+        "commands": {command: s.status() for command, s in sorted(stats.items())},
+    }
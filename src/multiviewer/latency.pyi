@@ -0,0 +1,22 @@
+"""
+Button-to-screen latency: the time from the HTTP request for a command until the jtech has
+acknowledged the output the command led to.
+
+mvd timestamps each request on receipt.  When a command changes the desired jtech output,
+the JtechManager remembers the Request, and reports it as reached once it has set that
+output, or as superseded if a later command's output replaces it first.  status() reports
+latency percentiles per command, and violations of config.LATENCY_SLO_MS, which are also
+logged.
+"""
+
+# Local package
+from .base import *
+
+@dataclass(slots=True)
+class Request:
+    command: str
+    received_at: float
+
+def reached(request: Request) -> None: ...
+def superseded(request: Request) -> None: ...
+def status() -> JSON: ...
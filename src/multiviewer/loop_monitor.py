@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+# Standard library
+import asyncio
+import os
+import sys
+import sysconfig
+import threading
+import time
+from collections import deque
+from types import FrameType
+
+# Local package
+from . import aio
+from .aio import Task
+from .base import *
+
+# The monitor's task wakes every TICK_INTERVAL seconds; the lag is how much later than
+# that it woke.  Lags of at least STALL_THRESHOLD seconds are stalls, whose culprits the
+# watchdog thread catches in the act.
+TICK_INTERVAL = 0.05
+STALL_THRESHOLD = 0.1
+# Percentiles are over the last LAG_WINDOW ticks, i.e. about a minute.
+LAG_WINDOW = 1200
+# The number of offenders that status reports.
+WORST_OFFENDERS = 10
+STACK_DEPTH = 8
+
+# Frames in these directories are library code, not culprits.
+LIBRARY_DIRS = tuple(
+    {sysconfig.get_path(name) for name in ("stdlib", "platstdlib", "purelib", "platlib")}
+)
+current_frames = sys._current_frames  # pyright: ignore[reportPrivateUsage]
+
+
+def frame_location(frame: FrameType) -> str:
+    co = frame.f_code
+    return f"{os.path.basename(co.co_filename)}:{frame.f_lineno}:{co.co_name}"
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+@dataclass(slots=True)
+class Stall:
+    # What the event loop thread was doing when the watchdog caught it stalled.
+    task: str
+    location: str
+    stack: str
+
+
+@dataclass(slots=True)
+class Offender:
+    task: str
+    location: str
+    stack: str
+    stalls: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    def status(self) -> JSON:
+        return {
+            "task": self.task,
+            "at": self.location,
+            "stack": self.stack,
+            "stalls": self.stalls,
+            "total_ms": round(self.total_ms),
+            "max_ms": round(self.max_ms),
+        }
+
+
+@dataclass(slots=True)
+class Monitor:
+    interval: float = TICK_INTERVAL
+    threshold: float = STALL_THRESHOLD
+    loop_thread_id: int = field(default_factory=threading.get_ident)
+    last_tick: float = field(default_factory=time.monotonic)
+    lags_ms: deque[float] = field(default_factory=lambda: deque(maxlen=LAG_WINDOW))
+    ticks: int = 0
+    max_lag_ms: float = 0.0
+    stalls: int = 0
+    # Set by the watchdog thread, and consumed by the task once the stall ends.
+    stall: Stall | None = None
+    offenders: dict[tuple[str, str], Offender] = field(
+        default_factory=dict[tuple[str, str], Offender]
+    )
+    task: Task[NoReturn] | None = None
+    watchdog: threading.Thread | None = None
+    stop_event: threading.Event = field(default_factory=threading.Event)
+
+    def start(self) -> None:
+        self.task = Task[NoReturn].create("loop_monitor", self.tick_forever())
+        watchdog = threading.Thread(target=self.watch, name="loop_monitor", daemon=True)
+        watchdog.start()
+        self.watchdog = watchdog
+
+    def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+        self.stop_event.set()
+
+    async def tick_forever(self) -> NoReturn:
+        while True:
+            t0 = time.monotonic()
+            self.last_tick = t0
+            await aio.sleep(self.interval)
+            self.record((time.monotonic() - t0 - self.interval) * 1000)
+
+    def record(self, lag_ms: float) -> None:
+        self.ticks += 1
+        self.lags_ms.append(lag_ms)
+        self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+        if lag_ms < self.threshold * 1000:
+            return
+        self.stalls += 1
+        # A stall shorter than the watchdog's polling interval may go uncaught.
+        stall = self.stall or Stall(task="?", location="?", stack="")
+        self.stall = None
+        key = (stall.task, stall.location)
+        offender = self.offenders.get(key)
+        if offender is None:
+            offender = Offender(stall.task, stall.location, stall.stack)
+            self.offenders[key] = offender
+        offender.stalls += 1
+        offender.total_ms += lag_ms
+        offender.max_ms = max(offender.max_ms, lag_ms)
+        log(f"event loop stalled for {lag_ms:.0f}ms", task=stall.task, at=stall.location)
+
+    def watch(self) -> None:
+        while not self.stop_event.wait(self.threshold / 2):
+            overdue = time.monotonic() - self.last_tick - self.interval
+            if self.stall is None and overdue >= self.threshold:
+                self.stall = self.capture()
+
+    def capture(self) -> Stall:
+        task = asyncio.current_task(aio.event_loop)
+        frame = current_frames().get(self.loop_thread_id)
+        frames: list[FrameType] = []
+        while frame is not None:
+            frames.append(frame)
+            frame = frame.f_back
+        # Blame the innermost frame outside of libraries, e.g. the caller of a blocking
+        # library call.
+        ours = [f for f in frames if not f.f_code.co_filename.startswith(LIBRARY_DIRS)]
+        culprit = ours[0] if ours else frames[0] if frames else None
+        return Stall(
+            task="callback" if task is None else task.get_name(),
+            location="?" if culprit is None else frame_location(culprit),
+            stack=";".join(frame_location(f) for f in reversed(frames[:STACK_DEPTH])),
+        )
+
+    def status(self) -> JSON:
+        lags = sorted(self.lags_ms)
+        worst = sorted(self.offenders.values(), key=lambda o: o.max_ms, reverse=True)
+        return {
+            "ticks": self.ticks,
+            "lag_ms": {
+                "p50": round(percentile(lags, 0.5), 1),
+                "p90": round(percentile(lags, 0.9), 1),
+                "p99": round(percentile(lags, 0.99), 1),
+                "max": round(lags[-1] if lags else 0.0, 1),
+            },
+            "max_lag_ms": round(self.max_lag_ms, 1),
+            "stalls": self.stalls,
+            "offenders": [o.status() for o in worst[:WORST_OFFENDERS]],
+        }
+
+
+monitor: Monitor | None = None
+
+
+def start() -> Monitor:
+    global monitor
+    if monitor is None:
+        monitor = Monitor()
+        monitor.start()
+    return monitor
+
+
+def stop() -> None:
+    global monitor
+    if monitor is not None:
+        monitor.stop()
+        monitor = None
+
+
+def status() -> JSON:
+    return None if monitor is None else monitor.status()
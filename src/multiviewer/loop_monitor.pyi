@@ -0,0 +1,31 @@
+"""
+Watches the shared event loop for blocking code, which delays every device worker and
+HTTP response.
+
+A task wakes every TICK_INTERVAL seconds and records how late it woke, i.e. the loop's
+scheduling lag.  When the lag reaches STALL_THRESHOLD, a watchdog thread catches the loop
+thread in the act, recording the running task's name (from aio.Task.create, or
+"callback" for a plain callback) and its stack.  status() reports lag percentiles over
+the last minute and the worst offenders, so blocking regressions show up right away.
+"""
+
+# Local package
+from .base import *
+
+def percentile(sorted_values: list[float], p: float) -> float: ...
+@dataclass(slots=True)
+class Monitor:
+    interval: float = ...
+    threshold: float = ...
+
+    def start(self) -> None:
+        """Starts monitoring.  Must be called on the event loop thread."""
+
+    def stop(self) -> None: ...
+    def status(self) -> JSON: ...
+
+def start() -> Monitor:
+    """Starts the daemon's monitor, if it isn't already running."""
+
+def stop() -> None: ...
+def status() -> JSON: ...
@@ -1,12 +1,26 @@
 from __future__ import annotations
 
 # Standard library
+import asyncio
+import json
 from datetime import datetime, timedelta
 
 # Local package
-from . import json_field
+from . import (
+    aio,
+    codec,
+    journal,
+    json_field,
+    latency,
+    loop_monitor,
+    profiler,
+    recorder,
+    resolver,
+    startup,
+)
 from .atv import ATVs
 from .base import *
+from .journal import Journal
 from .jtech import Power
 from .jtech_manager import JtechManager
 from .mv_screen import Button, MvScreen, RemoteMode
@@ -32,6 +46,9 @@ class VirtualClock:
     def advance(self, seconds: float) -> None:
         self._now += timedelta(seconds=seconds)
 
+    def set(self, now: datetime) -> None:
+        self._now = now
+
 
 DOUBLE_TAP_MAX_DURATION = timedelta(seconds=0.3)
 
@@ -50,6 +67,18 @@ class Multiviewer(Jsonable):
     last_command_at: datetime = field(
         default_factory=lambda: datetime.fromtimestamp(0), metadata=json_field.omit
     )
+    # The sequence number of the last journaled command that this state includes.
+    journal_seq: int = 0
+    journal: Journal | None = field(default=None, metadata=json_field.omit)
+    # Held while a command that changes the state is applied, so that such commands are
+    # applied, and journaled, one at a time.
+    command_lock: asyncio.Lock = field(
+        default_factory=asyncio.Lock, metadata=json_field.omit
+    )
+
+
+# Commands that don't change the state, and so needn't be journaled.
+UNJOURNALED_COMMANDS = frozenset(["Info", "Profile", "Status"])
 
 
 def selected_tv(mv: Multiviewer) -> TV:
@@ -62,6 +91,10 @@ def validate(mv: Multiviewer) -> None:
 
 async def shutdown(mv: Multiviewer) -> None:
     await mv.atvs.shutdown()
+    await mv.jtech_manager.shutdown()
+    await mv.volume.shutdown()
+    if mv.journal is not None:
+        mv.journal.close()
 
 
 def reset(mv: Multiviewer) -> None:
@@ -75,6 +108,11 @@ def set_should_send_commands_to_device(mv: Multiviewer, b: bool) -> None:
     mv.volume.set_should_send_commands_to_device(b)
 
 
+def keep_devices_connected(mv: Multiviewer) -> None:
+    mv.atvs.keep_connected()
+    mv.volume.keep_connected()
+
+
 def use_virtual_clock(mv: Multiviewer) -> None:
     mv.clock = VirtualClock()
 
@@ -104,23 +142,122 @@ async def create() -> Multiviewer:
     return mv
 
 
-async def load(path: Path) -> Multiviewer:
+async def restore(path: Path) -> Multiviewer:
     log(f"loading multiviewer state from {path}")
     try:
-        mv = Multiviewer.from_json(path.read_text())
-        await initialize(mv)
-        return mv
+        mv = codec.from_json(Multiviewer, path.read_text())
     except Exception:
         log("failed to load, creating new multiviewer")
+        mv = Multiviewer()
+    await replay_journal(mv, journal.path_for(path))
+    return mv
+
+
+async def load(path: Path) -> Multiviewer:
+    try:
+        mv = await restore(path)
+        await initialize(mv)
+        return mv
+    # Whatever goes wrong, starting from a fresh multiviewer beats not starting.
+    except Exception as e:  # noqa: BLE001
+        log_exc(e)
+        log("failed to restore, creating new multiviewer")
         return await create()
 
 
+async def restart(path: Path) -> Multiviewer:
+    resumed = False
+    try:
+        mv = await restore(path)
+        jtech_power = None
+        if mv.power == Power.ON:
+            jtech_power = await mv.jtech_manager.probe_power()
+        resumed = await resume_or_initialize(mv, jtech_power)
+    # As in load, a fresh multiviewer beats not starting.
+    except Exception as e:  # noqa: BLE001
+        log_exc(e)
+        log("failed to restore, creating new multiviewer")
+        mv = await create()
+    set_should_send_commands_to_device(mv, True)
+    if resumed:
+        # Now that we send commands, wake those Apple TVs that are asleep.
+        mv.atvs.wake_sleeping()
+    return mv
+
+
+async def resume_or_initialize(mv: Multiviewer, jtech_power: Power | None) -> bool:
+    # If we were on and still are, the screen, remote mode, and volume are as we left
+    # them.
+    if mv.power == Power.ON and jtech_power == Power.ON:
+        log("devices are already on, resuming")
+        mv.jtech_manager.power_on()
+        validate(mv)
+        return True
+    await initialize(mv)
+    return False
+
+
+async def replay_journal(mv: Multiviewer, path: Path) -> None:
+    entries = [entry for entry in journal.read(path) if entry.seq > mv.journal_seq]
+    if not entries:
+        return
+    # Commands see the time they were originally done at, e.g. for double taps.
+    clock = mv.clock
+    virtual_clock = VirtualClock()
+    mv.clock = virtual_clock
+    mismatches = 0
+    try:
+        for entry in entries:
+            virtual_clock.set(entry.at)
+            result = await do_command(mv, entry.args)
+            validate(mv)
+            if json.loads(json.dumps(result)) != entry.result:
+                mismatches += 1
+            mv.journal_seq = entry.seq
+    finally:
+        mv.clock = clock
+    log(f"replayed {len(entries)} commands from {path}", mismatches=mismatches)
+
+
+def start_journal(mv: Multiviewer, path: Path) -> None:
+    mv.journal = Journal.open(path, seq=mv.journal_seq)
+
+
+def record(mv: Multiviewer, args: list[str], result: JSON) -> None:
+    j = mv.journal
+    if j is None or args[0] in UNJOURNALED_COMMANDS:
+        return
+    mv.journal_seq = j.append(now(mv), args, result)
+    if j.should_snapshot():
+        # Snapshot after we've responded to the command.
+        j.snapshot_scheduled = True
+        aio.call_later(0, lambda: snapshot(mv))
+
+
+def snapshot(mv: Multiviewer) -> None:
+    j = mv.journal
+    if j is None:
+        return
+    if mv.command_lock.locked():
+        # The command in flight may have changed the state without having been journaled
+        # yet.  Once it has, the next command to finish schedules another snapshot.
+        j.snapshot_scheduled = False
+        return
+    try:
+        save(mv, j.state_path)
+    except (OSError, RuntimeError) as e:
+        j.snapshot_scheduled = False
+        log_exc(e)
+        return
+    j.truncate()
+
+
 def save(mv: Multiviewer, path: Path) -> None:
     if False:
         debug_print(mv)
     validate(mv)
     tmp = path.with_name(path.name + ".tmp")
-    tmp.write_text(mv.to_json(indent=2))
+    tmp.write_text(codec.to_json(mv, indent=2))
     tmp.replace(path)
 
 
@@ -165,10 +302,29 @@ async def info(mv: Multiviewer) -> str:
     return f"{output} {volume}"
 
 
+def status(mv: Multiviewer) -> JSON:
+    return {
+        "atvs": mv.atvs.status(),
+        "volume": mv.volume.status(),
+        "journal": None if mv.journal is None else mv.journal.status(),
+        "resolver": resolver.status(),
+        "startup": startup.status(),
+        "loop": loop_monitor.status(),
+        "recorder": recorder.status(),
+        "latency": latency.status(),
+    }
+
+
 async def do_command(mv: Multiviewer, args: list[str]) -> JSON:
     if False:
         debug_print(args)
     command = args[0]
+    # Diagnostics work even when the power is off, and aren't presses, so they don't
+    # affect double taps.
+    if command == "Profile":
+        return profiler.command(args[1:])
+    if command == "Status":
+        return status(mv)
     at = now(mv)
     maybe_double_tap = at - mv.last_command_at <= DOUBLE_TAP_MAX_DURATION
     mv.last_command_at = at
@@ -210,7 +366,8 @@ async def do_command(mv: Multiviewer, args: list[str]) -> JSON:
         case "Info":
             return await info(mv)
         case "Launch":
-            atv.launch(args[1])
+            # App names may contain spaces, e.g. "Launch Apple TV".
+            atv.launch(" ".join(args[1:]))
         case "Left" | "W":
             match screen.remote_mode:
                 case RemoteMode.APPLE_TV:
@@ -271,17 +428,29 @@ async def do_command(mv: Multiviewer, args: list[str]) -> JSON:
     return {}
 
 
-def update_devices(mv: Multiviewer):
-    mv.jtech_manager.set_output(mv.screen.render())
+def update_devices(mv: Multiviewer, request: latency.Request | None = None):
+    mv.jtech_manager.set_output(mv.screen.render(), request)
     mv.volume.set_for_tv(selected_tv(mv))
 
 
-async def do_command_and_update_devices(mv: Multiviewer, args: list[str]) -> JSON:
+async def do_command_and_update_devices(
+    mv: Multiviewer, args: list[str], received_at: float | None = None
+) -> JSON:
     if False:
         debug_print(args, mv)
-    result = await do_command(mv, args)
-    validate(mv)
-    update_devices(mv)
+    if args[0] in UNJOURNALED_COMMANDS:
+        result = await do_command(mv, args)
+        validate(mv)
+    else:
+        # A command like Power awaits the devices after changing the state, and commands
+        # from the HTTP server's threads overlap, so we wait for the previous command to
+        # finish.  That way, the journal's order is the order commands were applied in.
+        async with mv.command_lock:
+            result = await do_command(mv, args)
+            validate(mv)
+            record(mv, args, result)
+    request = None if received_at is None else latency.Request(args[0], received_at)
+    update_devices(mv, request)
     return result
 
 
@@ -12,25 +12,59 @@ inputs, and do commands from the user.
 """
 
 # Local package
+from . import latency
+from .atv import ATVs
 from .base import *
+from .jtech import Power
 from .jtech_manager import JtechManager
 
-class Power(MyStrEnum):
-    ON = auto()
-    OFF = auto()
-
 class Multiviewer:
     def __init__(self) -> NoReturn:
         """Undefined. Use create()"""
+    atvs: ATVs
     jtech_manager: JtechManager
 
 async def create() -> Multiviewer: ...
 async def shutdown(mv: Multiviewer) -> None: ...
-async def load(p: Path) -> Multiviewer: ...
+async def load(p: Path) -> Multiviewer:
+    """
+    Loads the state saved at p, if any, and replays any commands journaled since (see
+    journal.pyi).
+    """
+
+async def restart(p: Path) -> Multiviewer:
+    """
+    Like load, but then sends commands to the devices, as the daemon does.  If the state
+    is on and the jtech reports that it is too, the daemon was merely restarted, so we
+    resume without the power-on sequence, which would reset the remote mode and volume.
+    Only Apple TVs that turn out to be asleep are woken, in the background.
+    """
+
+async def resume_or_initialize(mv: Multiviewer, jtech_power: Power | None) -> bool:
+    """
+    The part of restart after loading: resumes, returning True, if mv is on and
+    jtech_power, which the jtech reported or None if it couldn't, is too.  Otherwise, does
+    the full power-on or power-off sequence.
+    """
+
 def save(mv: Multiviewer, p: Path) -> None: ...
-def update_devices(mv: Multiviewer) -> None: ...
+def start_journal(mv: Multiviewer, p: Path) -> None:
+    """Journals subsequent commands, for the state saved at p."""
+
+def snapshot(mv: Multiviewer) -> None:
+    """
+    Saves the state, and truncates the journal, unless a command is in flight, in which
+    case the snapshot is left to the next command.
+    """
+
+def update_devices(mv: Multiviewer, request: latency.Request | None = None) -> None: ...
 def set_should_send_commands_to_device(mv: Multiviewer, b: bool) -> None: ...
-async def do_command_and_update_devices(mv: Multiviewer, args: list[str]) -> JSON: ...
+def keep_devices_connected(mv: Multiviewer) -> None: ...
+async def do_command_and_update_devices(
+    mv: Multiviewer, args: list[str], received_at: float | None = None
+) -> JSON:
+    """received_at is when the command's request arrived, for latency tracking."""
+
 async def describe_jtech_output(mv: Multiviewer) -> str: ...
 def describe_volume(mv: Multiviewer) -> str: ...
 def power(mv: Multiviewer) -> Power: ...
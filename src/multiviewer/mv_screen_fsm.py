@@ -5,8 +5,13 @@ import cProfile
 import hashlib
 import io
 import json
+import mmap
+import os
+import struct
 import sys
-from collections import deque
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pstats import Stats
 
 from .base import *
@@ -154,14 +159,34 @@ class FsmStateMachine:
     def to_pretty_json(self) -> str:
         return json.dumps(self.to_dict(), indent=2)
 
-    def write(self, path: str | Path) -> None:
+    def write_json(self, path: str | Path) -> None:
         p = Path(path)
         p.write_text(self.to_pretty_json())
 
+    def to_bytes(self) -> bytes:
+        """The binary format; see HEADER."""
+        codes = array("I", [button_code(b) for b in self.buttons])
+        states = array("I", [state for state, _ in self.entries])
+        transitions = array("I")
+        for _, successors in self.entries:
+            transitions.extend(successors)
+        if sys.byteorder != "little":
+            for a in (codes, states, transitions):
+                a.byteswap()
+        header = HEADER.pack(
+            MAGIC,
+            len(codes),
+            len(states),
+            self.transitions,
+            1 if self.complete else 0,
+        )
+        return header + codes.tobytes() + states.tobytes() + transitions.tobytes()
+
+    def write(self, path: str | Path) -> None:
+        Path(path).write_bytes(self.to_bytes())
+
     def summary(self) -> dict[str, object]:
-        digest = hashlib.sha256(
-            json.dumps(self.to_dict(), separators=(",", ":")).encode()
-        ).hexdigest()
+        digest = hashlib.sha256(self.to_bytes()).hexdigest()
         return {
             "states": len(self.entries),
             "transitions": self.transitions,
@@ -174,6 +199,90 @@ class FsmStateMachine:
         p.write_text(json.dumps(self.summary(), indent=2))
 
 
+# The binary format is HEADER, then uint32 arrays: the button codes, the states in
+# exploration order, and for each state its successors, one per button and double-tap.
+# Everything is little-endian, which on a little-endian machine lets load_fsm use the
+# mapped file as is.
+MAGIC = b"MVFSM\x00\x00\x01"
+HEADER = struct.Struct("<8sIIII")  # MAGIC, buttons, states, transitions, complete
+
+
+@dataclass(slots=True)
+class MappedFsm:
+    # A binary FSM file, memory-mapped.  states and successors are views of the file.
+    buffer: mmap.mmap
+    buttons: list[Button]
+    states: memoryview
+    successors: memoryview
+    transitions: int
+    complete: bool
+
+    def transitions_of(self, i: int) -> memoryview:
+        """The successors of the i'th state, one per button and double-tap."""
+        n = len(self.buttons) * 2
+        return self.successors[i * n : (i + 1) * n]
+
+    def summary(self) -> dict[str, object]:
+        return {
+            "states": len(self.states),
+            "transitions": self.transitions,
+            "complete": self.complete,
+            "sha256": hashlib.sha256(self.buffer).hexdigest(),
+        }
+
+    def close(self) -> None:
+        self.states.release()
+        self.successors.release()
+        self.buffer.close()
+
+
+def uint32s(view: memoryview) -> memoryview:
+    # The file's little-endian uint32s.  On a little-endian machine, that's view itself;
+    # otherwise, a byteswapped copy.
+    if sys.byteorder == "little":
+        return view.cast("I")
+    a = array("I", view.tobytes())
+    a.byteswap()
+    return memoryview(a)
+
+
+def load_fsm(path: str | Path) -> MappedFsm:
+    with Path(path).open("rb") as f:
+        # This also keeps us from mapping an empty file, which mmap refuses to do.
+        if os.fstat(f.fileno()).st_size < HEADER.size:
+            fail(f"not a binary FSM file: {path}")
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(buffer)
+    try:
+        magic, num_buttons, num_states, transitions, complete = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            fail(f"not a binary FSM file: {path}")
+        states_at = HEADER.size + 4 * num_buttons
+        successors_at = states_at + 4 * num_states
+        end = successors_at + 4 * num_states * num_buttons * 2
+        if len(view) != end:
+            fail(f"truncated binary FSM file: {path}")
+        codes = uint32s(view[HEADER.size : states_at])
+        try:
+            buttons = [Button.of_int(code) for code in codes]
+        finally:
+            codes.release()
+    except Exception:
+        view.release()
+        buffer.close()
+        raise
+    mapped = MappedFsm(
+        buffer=buffer,
+        buttons=buttons,
+        states=uint32s(view[states_at:successors_at]),
+        successors=uint32s(view[successors_at:end]),
+        transitions=transitions,
+        complete=bool(complete),
+    )
+    view.release()
+    return mapped
+
+
 MAX_FSM_STATES = 1 << 19
 
 # Cached defaults to avoid reallocating dictionaries on every hydrate
@@ -233,36 +342,291 @@ def fsm_state_to_screen(state: FsmState) -> MvScreen:
     return screen
 
 
-def explore_fsm(
-    max_states: int = 500_000,
-    validate: bool = True,
-    report_powers_of_two: bool = False,
-) -> FsmStateMachine:
-    """Breadth-first exploration of reachable FSM states."""
-    base = MvScreen()
-    start_state = FsmState.create(base)
-    queue: deque[FsmState] = deque([start_state])
-    visited: list[list[FsmState] | None] = [None] * MAX_FSM_STATES
-    visited[int(start_state)] = []
-    seen = 1
-    transitions = 0
-    next_report = 1
+# A pure-integer implementation of MvScreen.pressed on packed states, without hydrating
+# an MvScreen.  Windows are window codes, 0-3.  Packed states don't include window_tv or
+# pip_location_by_tv, which hydrate resets to their defaults, so within a press every
+# window shows its own TV, and the PIP is in the NE corner.  check_kernel verifies this
+# against MvScreen over all reachable states.
+
+REMOTE_CODE = Button.REMOTE.to_int()
+SELECT_CODE = Button.SELECT.to_int()
+BACK_CODE = Button.BACK.to_int()
+PLAY_PAUSE_CODE = Button.PLAY_PAUSE.to_int()
+ACTIVATE_TV_CODE = Button.ACTIVATE_TV.to_int()
+DEACTIVATE_TV_FIRST_CODE = Button.DEACTIVATE_TV_FIRST.to_int()
+DEACTIVATE_TV_LAST_CODE = Button.DEACTIVATE_TV_LAST.to_int()
+TOGGLE_SUBMODE_CODE = Button.TOGGLE_SUBMODE.to_int()
+ARROW_N_CODE = Button.ARROW_N.to_int()
+ARROW_E_CODE = Button.ARROW_E.to_int()
+ARROW_W_CODE = Button.ARROW_W.to_int()
+ARROW_S_CODE = Button.ARROW_S.to_int()
+
+# The window code an arrow points to in multiview, keyed by (num_active_windows,
+# W1_PROMINENT bit, selected window code, arrow button code); mirrors mv_screen's
+# _arrow_points_to.
+ARROW_POINTS_TO: dict[tuple[int, int, int, int], int] = {
+    # 2 windows, either submode
+    **{(2, m, 0, ARROW_E_CODE): 1 for m in (0, 1)},
+    **{(2, m, 1, ARROW_W_CODE): 0 for m in (0, 1)},
+    # 3 windows, either submode
+    **{
+        (3, m, w, arrow): to
+        for m in (0, 1)
+        for (w, arrow), to in {
+            (0, ARROW_N_CODE): 1,
+            (0, ARROW_E_CODE): 1,
+            (0, ARROW_S_CODE): 2,
+            (1, ARROW_W_CODE): 0,
+            (1, ARROW_S_CODE): 2,
+            (2, ARROW_N_CODE): 1,
+            (2, ARROW_W_CODE): 0,
+        }.items()
+    },
+    # 4 windows, WINDOWS_SAME
+    (4, 0, 0, ARROW_E_CODE): 1,
+    (4, 0, 0, ARROW_W_CODE): 3,
+    (4, 0, 0, ARROW_S_CODE): 2,
+    (4, 0, 1, ARROW_E_CODE): 2,
+    (4, 0, 1, ARROW_W_CODE): 0,
+    (4, 0, 1, ARROW_S_CODE): 3,
+    (4, 0, 2, ARROW_N_CODE): 0,
+    (4, 0, 2, ARROW_E_CODE): 3,
+    (4, 0, 2, ARROW_W_CODE): 1,
+    (4, 0, 3, ARROW_N_CODE): 1,
+    (4, 0, 3, ARROW_E_CODE): 0,
+    (4, 0, 3, ARROW_W_CODE): 2,
+    # 4 windows, W1_PROMINENT
+    (4, 1, 0, ARROW_N_CODE): 1,
+    (4, 1, 0, ARROW_E_CODE): 2,
+    (4, 1, 0, ARROW_S_CODE): 3,
+    (4, 1, 1, ARROW_W_CODE): 0,
+    (4, 1, 1, ARROW_S_CODE): 2,
+    (4, 1, 2, ARROW_N_CODE): 1,
+    (4, 1, 2, ARROW_W_CODE): 0,
+    (4, 1, 2, ARROW_S_CODE): 3,
+    (4, 1, 3, ARROW_N_CODE): 2,
+    (4, 1, 3, ARROW_W_CODE): 0,
+}
+
+
+def pressed_packed(state: int, code: int, maybe_double_tap: bool) -> int:
+    """The packed state after pressing the button with the given code in state."""
+    n = (state & 3) + 1
+    fullscreen = (state >> _LAYOUT_POS) & 1
+    w1_prominent = (state >> _MULTIVIEW_SUBMODE_POS) & 1
+    pip = (state >> _FULLSCREEN_MODE_POS) & 1
+    full_w = (state >> _FULL_WINDOW_POS) & 3
+    pip_w = (state >> _PIP_WINDOW_POS) & 3
+    sel = (state >> _SELECTED_WINDOW_POS) & 3
+    border = (state >> _SELECTED_BORDER_POS) & 1
+    apple_tv = (state >> _REMOTE_MODE_POS) & 1
+    last_button = (state >> _LAST_BUTTON_POS) & 15
+    last_sel = (state >> _LAST_SELECTED_WINDOW_POS) & 3
+
+    double_tap = maybe_double_tap and last_button == code
+    last_button = 0
+    if code >= ARROW_N_CODE:
+        if not fullscreen:
+            border = 1
+            if double_tap:
+                if last_sel == 0 and w1_prominent:
+                    sel = last_sel
+            else:
+                to = ARROW_POINTS_TO.get((n, w1_prominent, sel, code), -1)
+                if to >= 0:
+                    last_button = code
+                    last_sel = sel
+                    sel = to
+        elif not pip:
+            if code == ARROW_E_CODE:
+                full_w = sel = (sel + 1) % n
+            elif code == ARROW_W_CODE:
+                full_w = sel = (sel + n - 1) % n
+        elif double_tap:
+            sel = last_sel
+            if code == ARROW_E_CODE:
+                pip_w = (pip_w + n - 1) % n
+                if pip_w == full_w:
+                    pip_w = (pip_w + n - 1) % n
+            elif code == ARROW_W_CODE:
+                pip_w = (pip_w + 1) % n
+                if pip_w == full_w:
+                    pip_w = (pip_w + 1) % n
+        else:
+            pip_is_selected = sel == pip_w
+            last_sel = sel
+            if code == ARROW_E_CODE:
+                pip_w = (pip_w + 1) % n
+                if pip_w == full_w:
+                    pip_w = (pip_w + 1) % n
+                if pip_is_selected:
+                    sel = pip_w
+            elif code == ARROW_W_CODE:
+                pip_w = (pip_w + n - 1) % n
+                if pip_w == full_w:
+                    pip_w = (pip_w + n - 1) % n
+                if pip_is_selected:
+                    sel = pip_w
+            # With the PIP in the NE corner, N points from the full window to the PIP,
+            # and S from the PIP to the full window.
+            elif pip_is_selected:
+                if code == ARROW_S_CODE:
+                    sel = full_w
+            elif code == ARROW_N_CODE:
+                sel = pip_w
+            last_button = code
+    elif code == REMOTE_CODE:
+        apple_tv ^= 1
+        if not double_tap:
+            last_button = code
+            last_sel = sel
+    elif code == SELECT_CODE:
+        if not fullscreen:
+            fullscreen = 1
+            full_w = sel
+            if pip:
+                pip_w = (full_w + 1) % n
+        elif pip:
+            full_w, pip_w = pip_w, full_w
+            sel = full_w
+    elif code == BACK_CODE:
+        if fullscreen:
+            if n == 1:
+                n = 2
+            fullscreen = 0
+            if w1_prominent:
+                sel = 0
+    elif code == PLAY_PAUSE_CODE:
+        border ^= 1
+    elif code == ACTIVATE_TV_CODE:
+        if n < 4:
+            n += 1
+    elif code in (DEACTIVATE_TV_FIRST_CODE, DEACTIVATE_TV_LAST_CODE):
+        if n > 1:
+            # The selected window's TV moves to insert_at, and the TVs after it up to
+            # insert_at move back a window.
+            insert_at = n - 1 if code == DEACTIVATE_TV_FIRST_CODE else 3
+            old_sel = sel
+            full_is_selected = full_w == sel
+            n -= 1
+            border = 1
+            if sel >= n:
+                sel = n - 1
+            if n == 1:
+                fullscreen = 1
+                pip = 0
+            if fullscreen:
+                if not pip:
+                    full_w = sel
+                elif full_is_selected:
+                    pip_w = moved_window(pip_w, old_sel, insert_at)
+                    full_w = sel = (pip_w + 1) % n
+                else:
+                    full_w = moved_window(full_w, old_sel, insert_at)
+                    pip_w = sel = (full_w + 1) % n
+    elif code == TOGGLE_SUBMODE_CODE:
+        if not fullscreen:
+            w1_prominent ^= 1
+            if w1_prominent:
+                sel = 0
+        elif n >= 2:
+            if pip:
+                pip = 0
+                sel = full_w
+            else:
+                pip = 1
+                pip_w = (full_w + 1) % n
+    else:
+        fail("invalid button code", code)
+
+    return (
+        (n - 1)
+        | fullscreen << _LAYOUT_POS
+        | w1_prominent << _MULTIVIEW_SUBMODE_POS
+        | pip << _FULLSCREEN_MODE_POS
+        | full_w << _FULL_WINDOW_POS
+        | pip_w << _PIP_WINDOW_POS
+        | sel << _SELECTED_WINDOW_POS
+        | border << _SELECTED_BORDER_POS
+        | apple_tv << _REMOTE_MODE_POS
+        | last_button << _LAST_BUTTON_POS
+        | last_sel << _LAST_SELECTED_WINDOW_POS
+    )
 
-    buttons = _BUTTONS
-    transitions_per_state = len(buttons) * 2
-    entries: list[tuple[FsmState, list[FsmState]]] = []
 
-    while queue:
-        state = queue.popleft()
-        assert visited[int(state)] == []
-        transitions_for_state: list[FsmState] = [FsmState(0)] * transitions_per_state
-        for b_idx, button in enumerate(buttons):
+def moved_window(w: int, deactivated: int, insert_at: int) -> int:
+    # Where the TV in window w ends up when deactivating window deactivated.
+    if w < deactivated or w > insert_at:
+        return w
+    if w == deactivated:
+        return insert_at
+    return w - 1
+
+
+def packed_state_is_valid(state: int) -> bool:
+    """The checks of MvScreen.validate that apply to a packed state."""
+    n = (state & 3) + 1
+    fullscreen = (state >> _LAYOUT_POS) & 1
+    pip = (state >> _FULLSCREEN_MODE_POS) & 1
+    if n == 1 and not (fullscreen and not pip):
+        return False
+    if (state >> _SELECTED_WINDOW_POS) & 3 >= n:
+        return False
+    if not fullscreen:
+        return n >= 2
+    if (state >> _FULL_WINDOW_POS) & 3 >= n:
+        return False
+    return not pip or (state >> _PIP_WINDOW_POS) & 3 < n
+
+
+def check_kernel(machine: FsmStateMachine) -> int:
+    """
+    Checks pressed_packed against machine's transitions, which MvScreen computed, and
+    returns the number checked.
+    """
+    codes = [button_code(b) for b in machine.buttons]
+    checked = 0
+    for state, transitions in machine.entries:
+        for b_idx, code in enumerate(codes):
             for d_idx, maybe_double_tap in enumerate((False, True)):
-                state.hydrate(base)
-                base.pressed(button, maybe_double_tap=maybe_double_tap)
+                expected = transitions[b_idx * 2 + d_idx]
+                actual = pressed_packed(state, code, maybe_double_tap)
+                if actual != expected:
+                    fail(
+                        "pressed_packed disagrees with MvScreen",
+                        {
+                            "from": decode_fsm_state_fields(state),
+                            "button": machine.buttons[b_idx],
+                            "double": maybe_double_tap,
+                            "expected": decode_fsm_state_fields(expected),
+                            "actual": decode_fsm_state_fields(FsmState(actual)),
+                        },
+                    )
+                checked += 1
+    return checked
+
+
+def state_transitions(
+    states: array[int], validate: bool, kernel: bool = False
+) -> array[int]:
+    """
+    The successors of each of states, flattened, in button and then double-tap order,
+    computed by MvScreen, or by pressed_packed if kernel.  Runs in the explorer's worker
+    processes.
+    """
+    if kernel:
+        return kernel_transitions(states, validate)
+    screen = MvScreen()
+    successors = array("I")
+    for s in states:
+        state = FsmState(s)
+        for button in _BUTTONS:
+            for maybe_double_tap in (False, True):
+                state.hydrate(screen)
+                screen.pressed(button, maybe_double_tap=maybe_double_tap)
                 if validate:
                     try:
-                        base.validate()
+                        screen.validate()
                     except Exception:
                         print(
                             "validate failed",
@@ -270,41 +634,133 @@ def explore_fsm(
                                 "from": decode_fsm_state_fields(state),
                                 "button": button,
                                 "double": maybe_double_tap,
-                                "after": decode_fsm_state_fields(FsmState.create(base)),
-                                "window_tv": base.window_tv,
-                                "pip_location_by_tv": base.pip_location_by_tv,
+                                "after": decode_fsm_state_fields(FsmState.create(screen)),
+                                "window_tv": screen.window_tv,
+                                "pip_location_by_tv": screen.pip_location_by_tv,
                             },
                             flush=True,
                         )
                         raise
-                key = FsmState.create(base)
-                transitions += 1
-                idx = b_idx * 2 + d_idx
-                transitions_for_state[idx] = key
-                if visited[int(key)] is None:
-                    visited[int(key)] = []
-                    seen += 1
-                    if report_powers_of_two and seen >= next_report:
-                        while next_report <= seen:
-                            print(f"states={seen} transitions={transitions}", flush=True)
-                            next_report *= 2
-                    if seen >= max_states:
-                        return FsmStateMachine(
-                            entries=entries,
-                            buttons=buttons,
-                            transitions=transitions,
-                            complete=False,
-                        )
-                    queue.append(key)
-        visited[int(state)] = transitions_for_state
-        entries.append((state, transitions_for_state))
+                successors.append(FsmState.create(screen))
+    return successors
+
+
+def kernel_transitions(states: array[int], validate: bool) -> array[int]:
+    codes = [button_code(b) for b in _BUTTONS]
+    successors = array("I")
+    for state in states:
+        for code in codes:
+            for maybe_double_tap in (False, True):
+                successor = pressed_packed(state, code, maybe_double_tap)
+                if validate and not packed_state_is_valid(successor):
+                    fail(
+                        "validate failed",
+                        {
+                            "from": decode_fsm_state_fields(FsmState(state)),
+                            "button": Button.of_int(code),
+                            "double": maybe_double_tap,
+                            "after": decode_fsm_state_fields(FsmState(successor)),
+                        },
+                    )
+                successors.append(successor)
+    return successors
+
+
+# Frontiers smaller than this aren't worth shipping to worker processes.
+MIN_PARALLEL_FRONTIER = 512
+# Each worker gets about this many shards per frontier, to balance the load.
+SHARDS_PER_JOB = 4
+
+
+def frontier_transitions(
+    pool: ProcessPoolExecutor | None,
+    frontier: array[int],
+    jobs: int,
+    validate: bool,
+    kernel: bool,
+) -> array[int]:
+    if pool is None or len(frontier) < MIN_PARALLEL_FRONTIER:
+        return state_transitions(frontier, validate, kernel)
+    shard_size = -(-len(frontier) // (jobs * SHARDS_PER_JOB))
+    shards = [frontier[i : i + shard_size] for i in range(0, len(frontier), shard_size)]
+    successors = array("I")
+    # map returns the shards' results in order, which keeps the merge deterministic.
+    expand = partial(state_transitions, validate=validate, kernel=kernel)
+    for shard_successors in pool.map(expand, shards):
+        successors.extend(shard_successors)
+    return successors
+
+
+def explore_fsm(
+    max_states: int = 500_000,
+    validate: bool = True,
+    report_powers_of_two: bool = False,
+    jobs: int = 1,
+    kernel: bool = False,
+) -> FsmStateMachine:
+    """
+    Level-synchronous breadth-first exploration of reachable FSM states.  Each level's
+    frontier is sharded across jobs worker processes, and the successors are merged in
+    frontier order, so the result is the same as a sequential exploration's.  If kernel,
+    transitions are computed by pressed_packed rather than MvScreen.
+    """
+    start_state = FsmState.create(MvScreen())
+    seen_states = bytearray(MAX_FSM_STATES)
+    seen_states[start_state] = 1
+    seen = 1
+    transitions = 0
+    next_report = 1
+
+    buttons = _BUTTONS
+    transitions_per_state = len(buttons) * 2
+    entries: list[tuple[FsmState, list[FsmState]]] = []
+    frontier = array("I", [start_state])
+
+    pool = ProcessPoolExecutor(jobs) if jobs > 1 else None
+    try:
+        while frontier:
+            successors = frontier_transitions(pool, frontier, jobs, validate, kernel)
+            next_frontier = array("I")
+            for i, state in enumerate(frontier):
+                transitions_for_state = [
+                    FsmState(key)
+                    for key in successors[
+                        i * transitions_per_state : (i + 1) * transitions_per_state
+                    ]
+                ]
+                for key in transitions_for_state:
+                    transitions += 1
+                    if not seen_states[key]:
+                        seen_states[key] = 1
+                        seen += 1
+                        if report_powers_of_two and seen >= next_report:
+                            while next_report <= seen:
+                                print(
+                                    f"states={seen} transitions={transitions}",
+                                    flush=True,
+                                )
+                                next_report *= 2
+                        if seen >= max_states:
+                            return FsmStateMachine(
+                                entries=entries,
+                                buttons=buttons,
+                                transitions=transitions,
+                                complete=False,
+                            )
+                        next_frontier.append(key)
+                entries.append((FsmState(state), transitions_for_state))
+            frontier = next_frontier
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
 
     return FsmStateMachine(
         entries=entries, buttons=buttons, transitions=transitions, complete=True
     )
 
 
-DEFAULT_SAVE_PATH = Path(__file__).resolve().parent / "mv_screen_fsm.json"
+DEFAULT_SAVE_PATH = Path(__file__).resolve().parent / "mv_screen_fsm.bin"
+DEFAULT_JSON_PATH = DEFAULT_SAVE_PATH.with_name("mv_screen_fsm.json")
 DEFAULT_SUMMARY_PATH = DEFAULT_SAVE_PATH.with_name("mv_screen_fsm-summary.json")
 
 
@@ -312,11 +768,27 @@ def main(argv: list[str] | None = None) -> None:
     parser = argparse.ArgumentParser(description="Explore mv_screen FSM")
     mode_group = parser.add_mutually_exclusive_group(required=True)
     mode_group.add_argument(
-        "--generate", action="store_true", help="Generate FSM JSON and summary"
+        "--generate", action="store_true", help="Generate the FSM and its summary"
     )
     mode_group.add_argument(
         "--validate", action="store_true", help="Validate current FSM against summary"
     )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help=f"with --generate, also write the FSM as JSON to {DEFAULT_JSON_PATH.name}",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="worker processes to explore with (default: one per core)",
+    )
+    parser.add_argument(
+        "--kernel",
+        action="store_true",
+        help="explore with the integer kernel instead of MvScreen",
+    )
     parser.add_argument(
         "--profile-explore",
         action="store_true",
@@ -336,7 +808,11 @@ def main(argv: list[str] | None = None) -> None:
         max_states=10_000_000,
         validate=True,
         report_powers_of_two=True,
+        jobs=args.jobs,
+        kernel=args.kernel,
     )
+    if not args.kernel:
+        check_kernel(machine)
     if profiler:
         profiler.disable()
         buf = io.StringIO()
@@ -346,6 +822,8 @@ def main(argv: list[str] | None = None) -> None:
 
     if args.generate:
         machine.write(DEFAULT_SAVE_PATH)
+        if args.json:
+            machine.write_json(DEFAULT_JSON_PATH)
         machine.write_summary(summary_path)
         print(
             f"done: states={len(machine.entries)} transitions={machine.transitions} "
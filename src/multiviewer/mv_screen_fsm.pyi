@@ -2,6 +2,85 @@
 CLI wrapper that exhaustively explores the MvScreen state space and writes two artifacts:
 the full FSM (gitignored) and a small summary with a SHA-256 digest (committed).
 
+The FSM is written in a compact binary format (see HEADER): a header, then dense uint32
+arrays of the button codes, the states, and each state's successors.  load_fsm
+memory-maps such a file, without copying on little-endian machines, and the summary's
+digest is over its raw bytes.
+--generate --json also writes the FSM as JSON, for humans.
+
 We rerun this in CI (validate-repo) to detect unintentional changes to the FSM, and run it
-manually when we intentionally regenerate the reference summary.
+manually when we intentionally regenerate the reference summary.  Exploration is a
+level-synchronous breadth-first search whose frontiers are sharded across --jobs worker
+processes (one per core by default); the result doesn't depend on the number of jobs.
+
+pressed_packed is a pure-integer MvScreen.pressed that works directly on packed
+FsmStates.  After exploring with MvScreen, the CLI checks that pressed_packed agrees with
+it on every reachable transition; --kernel explores with pressed_packed instead, which is
+several times faster.
 """
+
+# Standard library
+import mmap
+import struct
+
+# Local package
+from .base import *
+from .mv_screen import Button, MvScreen
+
+MAGIC: bytes
+HEADER: struct.Struct
+
+class FsmState(int):
+    @staticmethod
+    def create(screen: MvScreen) -> FsmState: ...
+    def hydrate(self, screen: MvScreen) -> None: ...
+
+@dataclass(frozen=True, slots=True)
+class FsmStateMachine:
+    entries: list[tuple[FsmState, list[FsmState]]]
+    buttons: list[Button]
+    transitions: int
+    complete: bool
+
+    def to_pretty_json(self) -> str: ...
+    def write_json(self, path: str | Path) -> None: ...
+    def to_bytes(self) -> bytes: ...
+    def write(self, path: str | Path) -> None: ...
+    def summary(self) -> dict[str, object]: ...
+    def write_summary(self, path: str | Path) -> None: ...
+
+@dataclass(slots=True)
+class MappedFsm:
+    buffer: mmap.mmap
+    buttons: list[Button]
+    states: memoryview
+    successors: memoryview
+    transitions: int
+    complete: bool
+
+    def transitions_of(self, i: int) -> memoryview:
+        """The successors of the i'th state, one per button and double-tap."""
+
+    def summary(self) -> dict[str, object]:
+        """The same summary as the FsmStateMachine that was written."""
+
+    def close(self) -> None: ...
+
+def load_fsm(path: str | Path) -> MappedFsm: ...
+def explore_fsm(
+    max_states: int = 500_000,
+    validate: bool = True,
+    report_powers_of_two: bool = False,
+    jobs: int = 1,
+    kernel: bool = False,
+) -> FsmStateMachine: ...
+def pressed_packed(state: int, code: int, maybe_double_tap: bool) -> int:
+    """The packed state after pressing the button with the given code in state."""
+
+def check_kernel(machine: FsmStateMachine) -> int:
+    """
+    Checks pressed_packed against machine's transitions, failing on the first
+    disagreement, and returns the number of transitions checked.
+    """
+
+def main(argv: list[str] | None = None) -> None: ...
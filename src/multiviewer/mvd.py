@@ -6,11 +6,38 @@ import signal
 import subprocess
 import time
 
-from . import aio, http_server, mv
+from . import aio, config, http_server, loop_monitor, mv, recorder, startup
+from .aio import Task
 
 # Local package
 from .base import *
 
+# How long, after SIGTERM, the old mvd has to exit before we SIGKILL it, and how often we
+# check whether it has.
+STOP_TIMEOUT = 2.0
+STOP_POLL_INTERVAL = 0.02
+
+
+def is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+async def stop(pid: int) -> None:
+    log(f"stopping mvd {pid}")
+    os.kill(pid, signal.SIGTERM)
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < STOP_TIMEOUT:
+        if not is_running(pid):
+            log(f"mvd {pid} stopped ({(time.perf_counter() - t0) * 1000:.0f}ms)")
+            return
+        await aio.sleep(STOP_POLL_INTERVAL)
+    log(f"killing stubborn mvd {pid}")
+    os.kill(pid, signal.SIGKILL)
+
 
 async def stop_existing_daemon() -> None:
     try:
@@ -19,49 +46,57 @@ async def stop_existing_daemon() -> None:
             .decode()
             .split()
         )
-        for pid in out:
-            if pid:
-                log(f"stopping mvd {pid}")
-                os.kill(int(pid), signal.SIGTERM)
-                await aio.sleep(1)  # Give the old mvd a second to shutdown
-                try:
-                    os.kill(int(pid), 0)  # Check if process still exists
-                except ProcessLookupError:
-                    continue
-                else:
-                    log(f"killing stubborn mvd {pid}")
-                    os.kill(int(pid), signal.SIGKILL)
     except subprocess.CalledProcessError:
-        pass  # no process using that port
+        return  # no process using that port
+    for pid in out:
+        if pid:
+            await stop(int(pid))
 
 
 async def become_daemon() -> None:
     RunMode.set(RunMode.Daemon)
+    if config.LOG_JSON_FILE is not None:
+        log_to_file(Path(config.LOG_JSON_FILE), config.LOG_MAX_BYTES, config.LOG_BACKUPS)
+    startup.mark("imported")
     log("daemon starting")
+    loop_monitor.start()
     try:
         await stop_existing_daemon()
     except Exception as e:
         log_exc(e)
+    startup.mark("old mvd stopped")
     mvd_state_path = Path("state.json").resolve()
-    the_mv = await mv.load(mvd_state_path)
-    mv.set_should_send_commands_to_device(the_mv, True)
-    mv.update_devices(the_mv)
 
-    async def run_command(args: list[str]) -> JSON:
+    async def load() -> mv.Multiviewer:
+        the_mv = await mv.restart(mvd_state_path)
+        mv.start_journal(the_mv, mvd_state_path)
+        mv.keep_devices_connected(the_mv)
+        mv.update_devices(the_mv)
+        startup.mark("loaded")
+        return the_mv
+
+    # We serve while loading; commands wait for the load to finish.
+    load_task = Task[mv.Multiviewer].create("load", load())
+
+    async def run_command(args: list[str], received_at: float) -> JSON:
         if False:
             debug_print(args)
         if True:
             log(f"{args}")
+        recorder.record(recorder.Kind.HTTP, " ".join(args))
         t0 = time.perf_counter()
         try:
-            return await mv.do_command_and_update_devices(the_mv, args)
+            the_mv = await load_task
+            return await mv.do_command_and_update_devices(the_mv, args, received_at)
         except Exception as e:
             log_exc(e)
         finally:
             dt = (time.perf_counter() - t0) * 1000
             log(f"{args} finished in {dt:.1f}ms")
+            startup.mark("first command")
 
     server = http_server.serve_until_stopped(run_command)
+    startup.mark("serving")
     stop_event = aio.Event()
 
     def handle_sigterm(signum: int, frame: object | None) -> None:
@@ -69,8 +104,10 @@ async def become_daemon() -> None:
         aio.event_loop.call_soon_threadsafe(stop_event.set)
 
     signal.signal(signal.SIGTERM, handle_sigterm)
+    the_mv = await load_task
     await stop_event.wait()
     http_server.stop(server)
-    mv.save(the_mv, mvd_state_path)
+    mv.snapshot(the_mv)
     await mv.shutdown(the_mv)
+    loop_monitor.stop()
     log("daemon stopped")
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+# Standard library
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+
+# Local package
+from .base import *
+
+# Profiles are written here, relative to the daemon's working directory, var/.
+PROFILE_DIR = Path("profiles")
+DEFAULT_SAMPLE_INTERVAL = 0.005
+# The number of functions or stacks in a summary.
+SUMMARY_SIZE = 15
+
+current_frames = sys._current_frames  # pyright: ignore[reportPrivateUsage]
+
+
+class Mode(MyStrEnum):
+    CPROFILE = auto()
+    SAMPLING = auto()
+
+
+def frame_name(frame: FrameType) -> str:
+    co = frame.f_code
+    return f"{os.path.basename(co.co_filename)}:{co.co_name}"
+
+
+@dataclass(slots=True)
+class Sampler:
+    # Samples thread_id's stack every interval seconds, counting each collapsed stack,
+    # i.e. the frame names from the outermost in, separated by ";".
+    thread_id: int
+    interval: float
+    stacks: Counter[str] = field(default_factory=Counter[str])
+    samples: int = 0
+    stop_event: threading.Event = field(default_factory=threading.Event)
+    thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        thread = threading.Thread(target=self.run, name="profiler", daemon=True)
+        thread.start()
+        self.thread = thread
+
+    def run(self) -> None:
+        while not self.stop_event.wait(self.interval):
+            frame = current_frames().get(self.thread_id)
+            names: list[str] = []
+            while frame is not None:
+                names.append(frame_name(frame))
+                frame = frame.f_back
+            del frame
+            self.stacks[";".join(reversed(names))] += 1
+            self.samples += 1
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def write(self, path: Path) -> None:
+        with path.open("w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def summary(self) -> JSON:
+        # Where the time goes: the innermost frames, by number of samples.
+        leaves: Counter[str] = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return {
+            "samples": self.samples,
+            "interval_ms": self.interval * 1000,
+            "top": [
+                {"function": name, "samples": count}
+                for name, count in leaves.most_common(SUMMARY_SIZE)
+            ],
+        }
+
+
+@dataclass(slots=True)
+class Session:
+    mode: Mode
+    path: Path
+    started_at: float = field(default_factory=time.perf_counter)
+    profile: cProfile.Profile | None = None
+    sampler: Sampler | None = None
+
+    def stop(self) -> JSON:
+        seconds = time.perf_counter() - self.started_at
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        profile = self.profile
+        if profile is not None:
+            profile.disable()
+            stats = pstats.Stats(profile)
+            stats.dump_stats(self.path)
+            summary = cprofile_summary(stats)
+        else:
+            sampler = self.sampler
+            assert sampler is not None
+            sampler.stop()
+            sampler.write(self.path)
+            summary = sampler.summary()
+        log(f"profile written to {self.path}")
+        return {
+            "mode": self.mode,
+            "path": str(self.path),
+            "seconds": round(seconds, 1),
+            "summary": summary,
+        }
+
+
+def cprofile_summary(stats: pstats.Stats) -> JSON:
+    profile = stats.get_stats_profile()
+    functions = sorted(
+        profile.func_profiles.items(), key=lambda item: item[1].cumtime, reverse=True
+    )
+    return {
+        "total_ms": round(profile.total_tt * 1000, 1),
+        "top": [
+            {
+                "function": f"{os.path.basename(p.file_name)}:{p.line_number}:{name}",
+                "calls": p.ncalls,
+                "tottime_ms": round(p.tottime * 1000, 1),
+                "cumtime_ms": round(p.cumtime * 1000, 1),
+            }
+            for name, p in functions[:SUMMARY_SIZE]
+        ],
+    }
+
+
+session: Session | None = None
+
+
+def start(
+    mode: Mode,
+    interval: float = DEFAULT_SAMPLE_INTERVAL,
+    directory: Path = PROFILE_DIR,
+) -> JSON:
+    # Profiles the calling thread, i.e. the event loop's.
+    global session
+    if session is not None:
+        fail("already profiling")
+    suffix = "pstats" if mode == Mode.CPROFILE else "collapsed"
+    path = directory / f"{time.strftime('%Y%m%d-%H%M%S')}.{suffix}"
+    s = Session(mode, path)
+    match mode:
+        case Mode.CPROFILE:
+            s.profile = cProfile.Profile()
+            s.profile.enable()
+        case Mode.SAMPLING:
+            s.sampler = Sampler(threading.get_ident(), interval)
+            s.sampler.start()
+    session = s
+    log(f"profiling started ({mode})")
+    return status()
+
+
+def stop() -> JSON:
+    global session
+    s = session
+    if s is None:
+        fail("not profiling")
+    session = None
+    return s.stop()
+
+
+def status() -> JSON:
+    s = session
+    if s is None:
+        return {"profiling": False}
+    return {
+        "profiling": True,
+        "mode": s.mode,
+        "path": str(s.path),
+        "seconds": round(time.perf_counter() - s.started_at, 1),
+    }
+
+
+def command(args: list[str]) -> JSON:
+    match args:
+        case ["start"]:
+            return start(Mode.SAMPLING)
+        case ["start", mode]:
+            return start(Mode(mode.upper()))
+        case ["start", mode, interval_ms]:
+            return start(Mode(mode.upper()), float(interval_ms) / 1000)
+        case ["stop"]:
+            return stop()
+        case _:
+            return status()
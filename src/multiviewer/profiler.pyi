@@ -0,0 +1,32 @@
+"""
+On-demand profiling of the running daemon, via the "Profile" command:
+
+    Profile start [cprofile|sampling] [interval_ms]
+    Profile stop
+    Profile
+
+cprofile traces every call on the event loop thread.  sampling, the default, has a
+background thread sample the event loop thread's stack every interval_ms (default 5).
+Stopping writes the profile under var/profiles/, as pstats for cprofile, or as collapsed
+stacks (for flamegraph.pl or speedscope) for sampling, and returns a summary of where the
+time went.  With no arguments, Profile reports whether we're profiling.
+"""
+
+# Local package
+from .base import *
+
+PROFILE_DIR: Path
+
+class Mode(MyStrEnum):
+    CPROFILE = auto()
+    SAMPLING = auto()
+
+def start(mode: Mode, interval: float = ..., directory: Path = ...) -> JSON:
+    """Starts profiling the calling thread, which should be the event loop's."""
+
+def stop() -> JSON:
+    """Stops profiling, writes the profile, and returns a summary."""
+
+def status() -> JSON: ...
+def command(args: list[str]) -> JSON:
+    """Does the Profile command with args."""
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+# Standard library
+import time
+
+# Local package
+from . import aio
+from .base import *
+
+# The number of events the recorder remembers.
+CAPACITY = 4096
+# Dumps are written here, relative to the daemon's working directory, var/.
+DUMP_DIR = Path("flight")
+# At most one dump per DUMP_MIN_INTERVAL seconds, so a failing device doesn't fill the
+# disk.
+DUMP_MIN_INTERVAL = 60.0
+
+
+class Kind(MyStrEnum):
+    HTTP = auto()
+    JTECH_SEND = auto()
+    JTECH_RECV = auto()
+    ATV_JOB = auto()
+    IR = auto()
+
+
+@dataclass(slots=True)
+class Recorder:
+    # A ring buffer of events, preallocated so that recording an event doesn't allocate.
+    capacity: int = CAPACITY
+    times: list[float] = field(default_factory=list[float])
+    kinds: list[Kind | None] = field(default_factory=list[Kind | None])
+    texts: list[str] = field(default_factory=list[str])
+    recorded: int = 0
+    dumps: int = 0
+    dumps_suppressed: int = 0
+    last_dump_at: float | None = None
+    last_dump_path: Path | None = None
+
+    def __post_init__(self) -> None:
+        self.times = [0.0] * self.capacity
+        self.kinds = [None] * self.capacity
+        self.texts = [""] * self.capacity
+
+    def record(self, kind: Kind, text: str) -> None:
+        i = self.recorded % self.capacity
+        self.times[i] = time.monotonic()
+        self.kinds[i] = kind
+        self.texts[i] = text
+        self.recorded += 1
+
+    def lines(self) -> list[str]:
+        # The remembered events, oldest first, timed relative to now.
+        now = time.monotonic()
+        n = min(self.recorded, self.capacity)
+        lines: list[str] = []
+        for j in range(self.recorded - n, self.recorded):
+            i = j % self.capacity
+            lines.append(f"{self.times[i] - now:10.3f} {self.kinds[i]} {self.texts[i]}")
+        return lines
+
+    def dump(self, reason: str, directory: Path = DUMP_DIR) -> Path | None:
+        now = time.monotonic()
+        last = self.last_dump_at
+        if last is not None and now - last < DUMP_MIN_INTERVAL:
+            self.dumps_suppressed += 1
+            return None
+        self.last_dump_at = now
+        self.dumps += 1
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        path = directory / f"{stamp}-{'-'.join(reason.split())}.txt"
+        self.last_dump_path = path
+        text = "\n".join([f"{stamp} {reason}", *self.lines(), ""])
+        log(f"flight recorder dumped to {path}", reason=reason)
+        # Write the file off the event loop.
+        aio.event_loop.run_in_executor(None, write, path, text)
+        return path
+
+    def status(self) -> JSON:
+        return {
+            "recorded": self.recorded,
+            "dumps": self.dumps,
+            "dumps_suppressed": self.dumps_suppressed,
+            "last_dump": (
+                None if self.last_dump_path is None else str(self.last_dump_path)
+            ),
+        }
+
+
+def write(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+recorder = Recorder()
+
+
+def record(kind: Kind, text: str) -> None:
+    recorder.record(kind, text)
+
+
+def dump(reason: str) -> Path | None:
+    # Only the daemon dumps, so that tests and scripts don't litter.
+    if RunMode.get() != RunMode.Daemon:
+        return None
+    return recorder.dump(reason)
+
+
+def status() -> JSON:
+    return recorder.status()
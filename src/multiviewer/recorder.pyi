@@ -0,0 +1,36 @@
+"""
+A flight recorder: a ring buffer of the daemon's recent HTTP commands, jtech serial
+lines in and out, Apple TV jobs and IR sends, with monotonic timestamps.
+
+Recording is cheap enough to leave on, unlike verbose logging.  When something goes wrong,
+e.g. a jtech sync fails, times out, or reads back a mismatched output, the recorder is
+dumped to a file under var/flight/, at most once per DUMP_MIN_INTERVAL seconds.  Each line
+of a dump is an event's time in seconds relative to the dump, its kind, and its text.
+"""
+
+# Local package
+from .base import *
+
+class Kind(MyStrEnum):
+    HTTP = auto()
+    JTECH_SEND = auto()
+    JTECH_RECV = auto()
+    ATV_JOB = auto()
+    IR = auto()
+
+@dataclass(slots=True)
+class Recorder:
+    capacity: int = ...
+
+    def record(self, kind: Kind, text: str) -> None: ...
+    def lines(self) -> list[str]: ...
+    def dump(self, reason: str, directory: Path = ...) -> Path | None:
+        """Writes the events to a file in directory, unless rate limited."""
+
+    def status(self) -> JSON: ...
+
+def record(kind: Kind, text: str) -> None: ...
+def dump(reason: str) -> Path | None:
+    """Dumps the daemon's recorder, unless rate limited or not running as the daemon."""
+
+def status() -> JSON: ...
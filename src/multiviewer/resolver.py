@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+# Standard library
+import socket
+import time
+
+# Local package
+from . import aio
+from .aio import Task
+from .base import *
+
+# A resolved address is fresh for REFRESH_AFTER seconds.  After that we keep serving it,
+# but kick off a background lookup to refresh it.  Failed lookups are remembered for
+# NEGATIVE_TTL seconds, so a device that is down doesn't cause a lookup per retry.
+REFRESH_AFTER = 60.0
+NEGATIVE_TTL = 5.0
+
+
+@dataclass(slots=True)
+class Entry:
+    host: str
+    ip: str | None = None
+    error: str | None = None
+    resolved_at: float = 0.0
+    last_lookup_ms: float = 0.0
+    max_lookup_ms: float = 0.0
+    lookups: int = 0
+    failures: int = 0
+    hits: int = 0
+    lookup_task: Task[str | None] | None = None
+
+    def age(self) -> float:
+        return time.monotonic() - self.resolved_at
+
+    def status(self) -> JSON:
+        return {
+            "ip": self.ip,
+            "error": self.error,
+            "age_s": round(self.age(), 1),
+            "last_lookup_ms": round(self.last_lookup_ms, 1),
+            "max_lookup_ms": round(self.max_lookup_ms, 1),
+            "lookups": self.lookups,
+            "failures": self.failures,
+            "hits": self.hits,
+        }
+
+
+entries: dict[str, Entry] = {}
+
+
+async def lookup(entry: Entry) -> str | None:
+    host = entry.host
+    t0 = time.perf_counter()
+    try:
+        # getaddrinfo runs in the loop's executor, so a slow mDNS lookup doesn't block
+        # the event loop.
+        infos = await aio.event_loop.getaddrinfo(
+            host, None, family=socket.AF_INET, type=socket.SOCK_STREAM
+        )
+        ip = str(infos[0][4][0])
+        error = None
+    except (OSError, IndexError) as e:
+        ip = None
+        error = repr(e)
+    ms = (time.perf_counter() - t0) * 1000
+    entry.lookups += 1
+    entry.last_lookup_ms = ms
+    entry.max_lookup_ms = max(entry.max_lookup_ms, ms)
+    entry.resolved_at = time.monotonic()
+    if ip is None:
+        entry.failures += 1
+        entry.error = error
+        log(f"could not resolve {host} ({ms:.1f}ms)", error=error)
+        # On a failed refresh, keep serving the previously resolved address.
+        if entry.ip is not None:
+            return entry.ip
+        return None
+    if ip != entry.ip:
+        log(f"resolved {host} -> {ip} ({ms:.1f}ms)")
+    entry.ip = ip
+    entry.error = None
+    return ip
+
+
+def start_lookup(entry: Entry) -> Task[str | None]:
+    task = entry.lookup_task
+    if task is None or task.done():
+        task = Task[str | None].create(f"resolve {entry.host}", lookup(entry))
+        entry.lookup_task = task
+    return task
+
+
+async def resolve(host: str) -> str:
+    entry = entries.get(host)
+    if entry is None:
+        entry = Entry(host)
+        entries[host] = entry
+    if entry.ip is not None:
+        entry.hits += 1
+        if entry.age() >= REFRESH_AFTER:
+            start_lookup(entry)
+        return entry.ip
+    if entry.error is not None and entry.age() < NEGATIVE_TTL:
+        entry.hits += 1
+        fail(f"could not resolve host {host}", entry.error)
+    # Concurrent callers share a single lookup.
+    ip = await start_lookup(entry)
+    if ip is None:
+        fail(f"could not resolve host {host}", entry.error)
+    return ip
+
+
+def invalidate(host: str) -> None:
+    entry = entries.get(host)
+    if entry is not None:
+        entry.ip = None
+        entry.error = None
+
+
+async def open_connection(
+    host: str, port: int
+) -> tuple[aio.StreamReader, aio.StreamWriter]:
+    ip = await resolve(host)
+    try:
+        return await aio.open_connection(ip, port)
+    except OSError:
+        # The device may have moved; re-resolve on the next attempt.
+        invalidate(host)
+        raise
+
+
+def status() -> JSON:
+    return {host: entry.status() for host, entry in sorted(entries.items())}
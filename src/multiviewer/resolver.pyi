@@ -0,0 +1,24 @@
+"""
+Shared async host-name resolver for the device connectors (Apple TVs, IP2SL, WF2IR).
+
+Lookups run off the event loop, so a slow mDNS lookup doesn't stall the other device
+workers or HTTP responses.  Resolved addresses are cached and refreshed in the background;
+failures are cached briefly.  status() reports per-host resolution timing.
+"""
+
+# Local package
+from . import aio
+from .base import *
+
+async def resolve(host: str) -> str:
+    """Returns the IPv4 address of host, failing if it can't be resolved."""
+
+def invalidate(host: str) -> None:
+    """Forget host's cached address, e.g. after a connection to it failed."""
+
+async def open_connection(
+    host: str, port: int
+) -> tuple[aio.StreamReader, aio.StreamWriter]:
+    """Like aio.open_connection, but resolves host via the cache."""
+
+def status() -> JSON: ...
@@ -1,4 +1,12 @@
-from . import aio, mvd
-from .base import *
+# Standard library
+import time
 
+# Taken before the imports below, so that we can time them.
+started_at = time.perf_counter()
+
+# Local package
+from . import aio, mvd, startup  # noqa: E402
+from .base import *  # noqa: E402
+
+startup.start(started_at)
 aio.run_event_loop(mvd.become_daemon())
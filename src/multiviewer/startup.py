@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+# Standard library
+import time
+
+# Local package
+from .base import *
+
+started_at: float | None = None
+# Milliseconds from the start of the process to each phase, in the order reached.
+phases: dict[str, float] = {}
+
+
+def start(at: float) -> None:
+    global started_at
+    started_at = at
+
+
+def mark(phase: str) -> None:
+    if started_at is None or phase in phases:
+        return
+    ms = (time.perf_counter() - started_at) * 1000
+    phases[phase] = ms
+    log(f"startup: {phase} at {ms:.0f}ms")
+
+
+def status() -> JSON:
+    return {phase: round(ms) for phase, ms in phases.items()}
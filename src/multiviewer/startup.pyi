@@ -0,0 +1,16 @@
+"""
+Times the daemon's startup phases, e.g. importing, loading state, serving, connecting to
+each device, and handling the first command, so that we can see where restarts spend
+their time.  status() reports each phase's milliseconds since the process started.
+"""
+
+# Local package
+from .base import *
+
+def start(at: float) -> None:
+    """Starts timing, from at, a time.perf_counter() taken at process start."""
+
+def mark(phase: str) -> None:
+    """Records that phase was reached, unless it was already, or we aren't timing."""
+
+def status() -> JSON: ...
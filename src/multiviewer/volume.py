@@ -2,13 +2,21 @@ from __future__ import annotations
 
 # Standard library
 import dataclasses
+import time
 
 # Local package
-from . import wf2ir
+from . import aio, json_field
 from .aio import Event, Task
 from .base import *
 from .json_field import json_dict
 from .tv import TV
+from .wf2ir import Wf2ir
+
+# If the user toggles mute again within MISSED_MUTE_WINDOW seconds of our sending mute,
+# or reverses the volume within MISSED_STEP_WINDOW seconds of the previous press, the
+# soundbar may have missed a command.
+MISSED_MUTE_WINDOW = 3.0
+MISSED_STEP_WINDOW = 2.0
 
 
 @dataclass_json
@@ -22,6 +30,11 @@ class Volume:
     synced_event: Event = Event.field()
     wake_event: Event = Event.field()
     worker_task: Task[None] = Task.field()
+    wf2ir: Wf2ir = Wf2ir.field()
+    muted_at: float | None = dataclasses.field(default=None, metadata=json_field.omit)
+    # The user's last volume press, and when it was.
+    adjusted_by: int = dataclasses.field(default=0, metadata=json_field.omit)
+    adjusted_at: float | None = dataclasses.field(default=None, metadata=json_field.omit)
     volume_delta_by_tv: dict[TV, int] = dataclasses.field(
         default_factory=lambda: dict.fromkeys(TV.all(), 0),
         metadata=json_dict(TV, int),
@@ -54,6 +67,9 @@ class Volume:
         self.wake_worker()
 
     def toggle_mute(self) -> None:
+        muted_at = self.muted_at
+        if muted_at is not None and time.monotonic() - muted_at < MISSED_MUTE_WINDOW:
+            self.wf2ir.missed()
         self.desired_mute = not self.desired_mute
         self.wake_worker()
 
@@ -74,21 +90,18 @@ class Volume:
             return
         if self.current_mute != self.desired_mute:
             self.current_mute = self.desired_mute
-            await wf2ir.mute()
+            await self.wf2ir.mute()
+            self.muted_at = time.monotonic()
             return
         if self.current_mute:
             return
         diff = self.desired_volume_delta - self.current_volume_delta
         if diff == 0:
             return
-        if diff > 0:
-            self.current_volume_delta += 1
-            await wf2ir.volume_up()
-            return
-        else:
-            self.current_volume_delta -= 1
-            await wf2ir.volume_down()
-            return
+        # Send the whole difference as one burst, e.g. when switching to a TV whose volume
+        # delta differs by several steps.
+        self.current_volume_delta += diff
+        await self.wf2ir.change_volume(diff)
 
     async def sync_forever(self) -> NoReturn:
         while True:
@@ -117,7 +130,30 @@ class Volume:
     def set_should_send_commands_to_device(self, b: bool) -> None:
         self.should_send_commands_to_device = b
 
+    def keep_connected(self) -> None:
+        self.wf2ir.keep_alive()
+
+    def status(self) -> JSON:
+        return {"wf2ir": self.wf2ir.status()}
+
+    async def shutdown(self) -> None:
+        await self.synced()
+        await self.wf2ir.close()
+        await aio.cancel(self.worker_task)
+
     def adjust_volume(self, tv: TV, by: int) -> None:
+        now = time.monotonic()
+        adjusted_at = self.adjusted_at
+        if (
+            adjusted_at is not None
+            and now - adjusted_at < MISSED_STEP_WINDOW
+            and by * self.adjusted_by < 0
+        ):
+            # E.g. up and then straight back down: the soundbar may have taken one press
+            # as two.
+            self.wf2ir.missed()
+        self.adjusted_by = by
+        self.adjusted_at = now
         self.unmute()
         self.volume_delta_by_tv[tv] += by
 
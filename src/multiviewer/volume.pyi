@@ -4,8 +4,13 @@
 # Local package
 from .base import *
 from .tv import TV
+from .wf2ir import Wf2ir
 
+@dataclass(slots=True)
 class Volume:
+    should_send_commands_to_device: bool = ...
+    wf2ir: Wf2ir = ...
+
     @classmethod
     def field(cls) -> Volume: ...
     def adjust_volume(self, tv: TV, by: int) -> None: ...
@@ -17,3 +22,8 @@ class Volume:
     def reset(self) -> None: ...
     def power_on(self) -> None: ...
     def set_should_send_commands_to_device(self, b: bool) -> None: ...
+    def keep_connected(self) -> None:
+        """Keep a connection to the WF2IR open, so volume steps don't pay to connect."""
+
+    def status(self) -> JSON: ...
+    async def shutdown(self) -> None: ...
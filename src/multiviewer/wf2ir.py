@@ -1,35 +1,16 @@
 from __future__ import annotations
 
 # Standard library
+import asyncio
+import dataclasses
 import socket
 import time
 
 # Local package
-from . import aio, config
+from . import aio, config, ir, json_field, recorder, resolver, startup
+from .aio import Event, Task
 from .base import *
 
-IR_VOLUME_UP = (
-    "sendir,1:3,1,37878,1,1,"  # repeat=1, offset=1 (repeat starts at pair 1)
-    "171,170,22,21,22,21,22,63,22,63,22,21,22,63,22,21,22,21,22,21,22,21,"
-    "22,63,22,63,22,21,22,63,22,21,22,21,22,63,22,63,22,63,22,21,22,63,22,21,22,21,22,21,22,21,"
-    "22,21,22,21,22,63,22,21,22,63,22,63,22,63,22,1779,"  # ← frame 1 (ends with long gap)
-    "171,170,22,63,22,3650\r"  # ← single repeat frame
-)
-
-IR_VOLUME_DOWN = (
-    "sendir,1:3,1,37878,1,1,"
-    "171,170,22,21,22,21,22,63,22,63,22,21,22,63,22,21,22,21,22,21,22,21,"
-    "22,63,22,63,22,21,22,63,22,21,22,21,22,21,22,63,22,63,22,21,22,63,22,21,22,21,22,21,22,63,"
-    "22,21,22,21,22,63,22,21,22,63,22,63,22,63,22,1778,"
-    "171,170,22,63,22,3648\r"
-)
-
-IR_MUTE = (
-    "sendir,1:3,1,37878,1,1,171,170,22,21,22,21,22,63,22,63,22,21,22,63,22,21,22,21,22,21,22,21,"
-    "22,63,22,63,22,21,22,63,22,21,22,21,22,63,22,63,22,63,22,63,22,63,22,21,22,21,22,21,22,21,"
-    "22,21,22,21,22,21,22,21,22,63,22,63,22,63,22,1779,171,170,22,63,22,3651,171,170,22,63,22,4848\r"
-)
-
 
 def create_connection() -> socket.socket:
     return socket.create_connection((config.WF2IR_HOST, config.WF2IR_PORT), timeout=5)
@@ -53,30 +34,341 @@ def learn():
         print(recv(s))
 
 
-async def command(text: str) -> None:
-    if RunMode.get() == RunMode.Testing:
-        return
-    else:
-        reader, writer = await aio.open_connection(config.WF2IR_HOST, config.WF2IR_PORT)
+# How long we wait to connect, and for the WF2IR to acknowledge a command, beyond the time
+# it takes to transmit the command's IR.
+CONNECT_TIMEOUT = 5.0
+REPLY_TIMEOUT = 5.0
+
+# After a failed connect, we retry with exponential backoff between RECONNECT_MIN_BACKOFF
+# and RECONNECT_MAX_BACKOFF seconds.
+RECONNECT_MIN_BACKOFF = 1.0
+RECONNECT_MAX_BACKOFF = 30.0
+
+# Back-to-back IR commands can run together, so the soundbar misses some.  We leave a
+# gap between the end of one command (its completeir) and the start of the next.  The gap
+# starts at INITIAL_GAP, the fixed sleep we used to use, shrinks by SHRINK after each
+# command that went through, and grows by BACKOFF when a command didn't: the WF2IR said
+# busyIR, or the user's behavior suggests that the soundbar missed a command.  The gap
+# that failed becomes a floor, so we don't keep shrinking back into trouble.  After
+# FLOOR_DECAY_AFTER commands in a row go through, the floor comes back down by
+# FLOOR_MARGIN, so that a back off doesn't slow the IR for good.
+INITIAL_GAP = 0.25
+MIN_GAP = 0.02
+MAX_GAP = 1.0
+SHRINK = 0.9
+BACKOFF = 2.0
+FLOOR_MARGIN = 1.25
+FLOOR_DECAY_AFTER = 20
+
+# The user's behavior only hints at a missed command: toggling mute straight back, or
+# pressing volume down right after up, is also how the user changes their mind.  So we
+# only back off when a second hint follows within MISSED_WINDOW seconds.
+MISSED_WINDOW = 60.0
+
+# How many times we resend a command that the WF2IR was too busy to send.
+BUSY_RETRIES = 3
+
+
+def reply_id(line: str) -> int | None:
+    # completeir,1:3,<ID> and busyIR,1:3,<ID>
+    try:
+        return int(line.rsplit(",", 1)[1])
+    except (IndexError, ValueError):
+        return None
+
+
+@dataclass(slots=True)
+class RttStats:
+    count: int = 0
+    total_ms: float = 0.0
+    last_ms: float = 0.0
+    max_ms: float = 0.0
+
+    def record(self, ms: float) -> None:
+        self.count += 1
+        self.total_ms += ms
+        self.last_ms = ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def status(self) -> JSON:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / max(self.count, 1), 1),
+            "last_ms": round(self.last_ms, 1),
+            "max_ms": round(self.max_ms, 1),
+        }
+
+
+class BusyError(RuntimeError):
+    pass
+
+
+@dataclass(slots=True)
+class Pacing:
+    gap: float = INITIAL_GAP
+    floor: float = MIN_GAP
+    last_done_at: float = 0.0
+    successes: int = 0
+    # Commands that went through since the floor last changed.
+    streak: int = 0
+    busy: int = 0
+    missed_hints: int = 0
+    last_missed_hint_at: float | None = None
+    missed: int = 0
+    waits: int = 0
+    wait_ms: float = 0.0
+
+    async def wait(self) -> None:
+        delay = self.last_done_at + self.gap - time.monotonic()
+        if delay > 0:
+            self.waits += 1
+            self.wait_ms += delay * 1000
+            await aio.sleep(delay)
+
+    def done(self) -> None:
+        self.last_done_at = time.monotonic()
+
+    def succeeded(self) -> None:
+        self.successes += 1
+        self.streak += 1
+        if self.streak >= FLOOR_DECAY_AFTER and self.floor > MIN_GAP:
+            self.floor = max(MIN_GAP, self.floor / FLOOR_MARGIN)
+            self.streak = 0
+        self.gap = max(self.floor, self.gap * SHRINK)
+
+    def back_off(self) -> None:
+        self.streak = 0
+        self.floor = min(MAX_GAP, max(self.floor, self.gap * FLOOR_MARGIN))
+        self.gap = min(MAX_GAP, max(self.floor, self.gap * BACKOFF))
+        log(f"IR gap backed off to {self.gap * 1000:.0f}ms")
+
+    def missed_hint(self) -> None:
+        now = time.monotonic()
+        self.missed_hints += 1
+        last = self.last_missed_hint_at
+        if last is not None and now - last < MISSED_WINDOW:
+            self.missed += 1
+            self.last_missed_hint_at = None
+            self.back_off()
+        else:
+            self.last_missed_hint_at = now
+
+    def status(self) -> JSON:
+        return {
+            "gap_ms": round(self.gap * 1000, 1),
+            "floor_ms": round(self.floor * 1000, 1),
+            "successes": self.successes,
+            "busy": self.busy,
+            "missed_hints": self.missed_hints,
+            "missed": self.missed,
+            "waits": self.waits,
+            "wait_ms": round(self.wait_ms),
+        }
+
+
+@dataclass(slots=True)
+class Wf2ir:
+    host: str = config.WF2IR_HOST
+    port: int = config.WF2IR_PORT
+    writer: aio.StreamWriter | None = None
+    reader_task: Task[None] | None = field(default=None, repr=False)
+    connect_lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+    disconnected_event: Event = Event.field()
+    keep_alive_task: Task[NoReturn] | None = field(default=None, repr=False)
+    # Commands awaiting their completeir, by ID.
+    pending: dict[int, asyncio.Future[str]] = field(
+        default_factory=dict[int, asyncio.Future[str]], repr=False
+    )
+    connects: int = 0
+    connect_failures: int = 0
+    errors: int = 0
+    last_error: str | None = None
+    rtt: RttStats = field(default_factory=RttStats)
+    pacing: Pacing = field(default_factory=Pacing)
+
+    @classmethod
+    def field(cls):
+        return dataclasses.field(default_factory=Wf2ir, metadata=json_field.omit)
+
+    async def connect(self) -> aio.StreamWriter:
+        t0 = time.perf_counter()
+        connection = await aio.wait_for(
+            resolver.open_connection(self.host, self.port), timeout=CONNECT_TIMEOUT
+        )
+        if connection is None:
+            fail(f"timed out connecting to {self.host}")
+        reader, writer = connection
+        self.writer = writer
+        self.connects += 1
+        self.disconnected_event.clear()
+        self.reader_task = Task[None].create(
+            "Wf2ir.read_forever", self.read_forever(reader, writer)
+        )
+        log(f"connected to {self.host} ({(time.perf_counter() - t0) * 1000:.0f}ms)")
+        startup.mark("wf2ir connected")
+        return writer
+
+    async def get_writer(self) -> aio.StreamWriter:
+        async with self.connect_lock:
+            if self.writer is not None:
+                return self.writer
+            try:
+                return await self.connect()
+            except Exception as e:
+                self.connect_failures += 1
+                self.last_error = repr(e)
+                raise
+
+    async def read_forever(
+        self, reader: aio.StreamReader, writer: aio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                line = (await reader.readuntil(b"\r")).decode("ascii").strip()
+                self.handle_reply(line)
+        # Whatever ends the reader, the connection is unusable and must be dropped.
+        except Exception as e:  # noqa: BLE001
+            self.lost(writer, repr(e))
+
+    def handle_reply(self, line: str) -> None:
+        if False:
+            debug_print(line)
+        if line.startswith("completeir"):
+            future = self.pending.pop(reply_id(line) or 0, None)
+            if future is not None and not future.done():
+                future.set_result(line)
+        elif line.startswith("busyIR"):
+            future = self.pending.pop(reply_id(line) or 0, None)
+            if future is not None and not future.done():
+                future.set_exception(BusyError(line))
+        elif line.startswith("ERR"):
+            # Error replies don't say which command failed; fail the oldest.
+            self.errors += 1
+            self.last_error = line
+            for id in list(self.pending)[:1]:
+                future = self.pending.pop(id)
+                if not future.done():
+                    future.set_exception(RuntimeError(line))
+        else:
+            log(f"unexpected reply from {self.host}", reply=line)
+
+    def lost(self, writer: aio.StreamWriter | None, error: str | None) -> None:
+        # writer is the connection that was lost.  If we've since reconnected, e.g. a
+        # stale reader noticing its connection closed, the current one is fine.
+        if writer is None or writer is not self.writer:
+            return
+        log(f"lost connection to {self.host}", error=error)
+        self.writer = None
+        self.last_error = error
+        writer.close()
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError(error))
+        self.pending.clear()
+        self.disconnected_event.set()
+
+    async def keep_alive_forever(self) -> NoReturn:
+        backoff = RECONNECT_MIN_BACKOFF
+        while True:
+            if self.writer is None:
+                try:
+                    await self.get_writer()
+                    backoff = RECONNECT_MIN_BACKOFF
+                except (OSError, RuntimeError) as e:
+                    log(
+                        f"could not connect to {self.host}, retry in {backoff:.0f}s",
+                        error=e,
+                    )
+                    await aio.sleep(backoff)
+                    backoff = min(2 * backoff, RECONNECT_MAX_BACKOFF)
+                    continue
+            await self.disconnected_event.wait()
+
+    def keep_alive(self) -> None:
+        if self.keep_alive_task is None:
+            self.keep_alive_task = Task[NoReturn].create(
+                "Wf2ir.keep_alive", self.keep_alive_forever()
+            )
+
+    async def command(self, command: ir.Command) -> None:
+        pacing = self.pacing
+        attempts = 0
+        while True:
+            attempts += 1
+            await pacing.wait()
+            try:
+                await self.send(command)
+            except BusyError:
+                pacing.busy += 1
+                pacing.back_off()
+                if attempts > BUSY_RETRIES:
+                    raise
+                continue
+            finally:
+                pacing.done()
+            pacing.succeeded()
+            return
+
+    async def send(self, command: ir.Command) -> None:
+        writer = await self.get_writer()
+        id = command.id
+        if id in self.pending:
+            fail(f"command {id} is already pending")
+        future = aio.event_loop.create_future()
+        self.pending[id] = future
+        recorder.record(recorder.Kind.IR, command.code)
+        t0 = time.perf_counter()
         try:
-            writer.write(text.encode("ascii"))
+            writer.write(command.data)
             await writer.drain()
-            await reader.readuntil(b"\r")
-            # data.decode("ascii", errors="strict").strip()
-        finally:
-            writer.close()
-            await writer.wait_closed()
-            # We sleep a bit to make the IR more reliable.
-            await aio.sleep(0.25)
+            reply = await aio.wait_for(
+                future, timeout=command.transmit_seconds + REPLY_TIMEOUT
+            )
+        except BusyError:
+            raise
+        except Exception as e:
+            self.pending.pop(id, None)
+            self.lost(writer, repr(e))
+            raise
+        if reply is None:
+            # The connection may be dead without our having heard; start over.
+            self.pending.pop(id, None)
+            self.lost(writer, "reply timeout")
+            fail(f"{self.host} did not acknowledge command {id}")
+        self.rtt.record((time.perf_counter() - t0) * 1000)
 
+    def missed(self) -> None:
+        self.pacing.missed_hint()
 
-async def volume_up():
-    await command(IR_VOLUME_UP)
+    async def press(self, code: ir.Code, times: int) -> None:
+        # Send times presses in as few sendirs as possible.
+        while times > 0:
+            repeat = min(times, ir.MAX_REPEAT)
+            await self.command(ir.burst(code, repeat))
+            times -= repeat
 
+    async def change_volume(self, by: int) -> None:
+        if by > 0:
+            await self.press(ir.VOLUME_UP, by)
+        elif by < 0:
+            await self.press(ir.VOLUME_DOWN, -by)
 
-async def volume_down():
-    await command(IR_VOLUME_DOWN)
+    async def mute(self) -> None:
+        await self.press(ir.MUTE, 1)
 
+    def status(self) -> JSON:
+        return {
+            "connected": self.writer is not None,
+            "connects": self.connects,
+            "connect_failures": self.connect_failures,
+            "errors": self.errors,
+            "error": self.last_error,
+            "rtt": self.rtt.status(),
+            "pacing": self.pacing.status(),
+        }
 
-async def mute():
-    await command(IR_MUTE)
+    async def close(self) -> None:
+        if self.keep_alive_task is not None:
+            self.keep_alive_task.cancel()
+            self.keep_alive_task = None
+        self.lost(self.writer, None)
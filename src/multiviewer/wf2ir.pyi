@@ -1,6 +1,7 @@
 """
 The Global Cache WF2IR is connected to the WiFi network, and can send IR sequences to the
-soundbar.  The volume module uses it for controlling volume (+, -, mute).
+soundbar.  The volume module uses it for controlling volume (+, -, mute), over a
+persistent connection.
 """
 
 # Local package
@@ -9,6 +10,35 @@ from .base import *
 def learn() -> None:
     """Enter IR learn mode briefly and print prompts/results."""
 
-async def volume_up() -> None: ...
-async def volume_down() -> None: ...
-async def mute() -> None: ...
+@dataclass(slots=True)
+class Wf2ir:
+    """
+    A long-lived connection to the WF2IR, reconnected in the background.  Each command
+    waits for the WF2IR's completeir acknowledgement, which it matches by sendir ID, so
+    that a command costs only the IR transmit time, not a TCP handshake.  Commands are
+    paced: the gap between them adapts to what the WF2IR and soundbar accept.
+    """
+
+    host: str = ...
+    port: int = ...
+
+    @classmethod
+    def field(cls) -> Wf2ir: ...
+    def keep_alive(self) -> None:
+        """Connect in the background, and reconnect whenever the connection drops."""
+
+    async def change_volume(self, by: int) -> None:
+        """
+        Presses volume up (by > 0) or down (by < 0) abs(by) times, as a burst: one sendir
+        with a repeat count, rather than one sendir per press.
+        """
+
+    async def mute(self) -> None: ...
+    def missed(self) -> None:
+        """
+        Says that the user's behavior hints that the soundbar missed a command.  When
+        hints recur, we leave more time between commands.
+        """
+
+    def status(self) -> JSON: ...
+    async def close(self) -> None: ...
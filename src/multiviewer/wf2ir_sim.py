@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+# Standard library
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+# Local package
+from . import aio, ir
+from .base import *
+from .tv import TV
+from .volume import Volume
+from .wf2ir import Wf2ir
+
+VERSION = "710-1005-05"
+
+
+@dataclass(slots=True)
+class Soundbar:
+    volume: int = 0
+    muted: bool = False
+    presses: int = 0
+    # Presses that came too soon after the previous one, and so were missed.
+    missed: int = 0
+
+    def press(self, code: ir.Code) -> None:
+        self.presses += 1
+        frame = code.frames[0]
+        for known in (ir.VOLUME_UP, ir.VOLUME_DOWN, ir.MUTE):
+            if frame == known.frames[0]:
+                match known.name:
+                    case "volume_up":
+                        self.volume += 1
+                        self.muted = False
+                    case "volume_down":
+                        self.volume -= 1
+                        self.muted = False
+                    case _:
+                        self.muted = not self.muted
+
+
+@dataclass(slots=True)
+class Simulator:
+    host: str = "127.0.0.1"
+    port: int = 0
+    # Scales the time it takes to transmit each sendir's IR, e.g. 0 for tests.
+    time_scale: float = 1.0
+    # The soundbar misses the first press of a sendir that starts sooner than this many
+    # seconds after the previous one finished.
+    min_gap: float = 0.0
+    soundbar: Soundbar = field(default_factory=Soundbar)
+    server: asyncio.Server | None = field(default=None, repr=False)
+    connections: set[asyncio.Task[Any]] = field(
+        default_factory=set[asyncio.Task[Any]], repr=False
+    )
+    transmitting: bool = False
+    done_at: float = 0.0
+    sendirs: int = 0
+    busy: int = 0
+
+    async def start(self) -> None:
+        self.server = await asyncio.start_server(self.serve, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+        # Let connections finish, rather than be cancelled mid-read at shutdown.
+        for task in list(self.connections):
+            task.cancel()
+        await asyncio.gather(*self.connections, return_exceptions=True)
+
+    def wf2ir(self) -> Wf2ir:
+        return Wf2ir(host=self.host, port=self.port)
+
+    def volume(self) -> Volume:
+        return Volume(should_send_commands_to_device=True, wf2ir=self.wf2ir())
+
+    async def serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        if task is not None:
+            self.connections.add(task)
+        try:
+            while True:
+                line = (await reader.readuntil(b"\r")).decode("ascii").strip()
+                if line.startswith("sendir,"):
+                    # Transmitting takes a while; meanwhile, we keep reading commands.
+                    aio.Task[None].create("Simulator.sendir", self.sendir(line, writer))
+                else:
+                    writer.write(self.reply(line).encode("ascii"))
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+            if task is not None:
+                self.connections.discard(task)
+
+    def reply(self, line: str) -> str:
+        match line.split(","):
+            case ["getversion", *_]:
+                return f"{VERSION}\r"
+            case ["getdevices"]:
+                return "device,0,0 WIFI\rdevice,1,3 IR\rendlistdevices\r"
+            case _:
+                return "ERR_0:0,001\r"
+
+    async def sendir(self, line: str, writer: asyncio.StreamWriter) -> None:
+        fields = line.split(",")
+        connector, id = fields[1], fields[2]
+        try:
+            code = ir.decode_sendir("sendir", line)
+            repeat = int(fields[4])
+        except (RuntimeError, ValueError, IndexError):
+            writer.write(b"ERR_1:3,003\r")
+            return
+        if self.transmitting:
+            self.busy += 1
+            writer.write(f"busyIR,{connector},{id}\r".encode("ascii"))
+            return
+        self.transmitting = True
+        self.sendirs += 1
+        if time.monotonic() - self.done_at < self.min_gap:
+            self.soundbar.missed += 1
+            repeat -= 1
+        for _ in range(repeat):
+            self.soundbar.press(code)
+        await aio.sleep(code.transmit_seconds(int(fields[4])) * self.time_scale)
+        self.transmitting = False
+        self.done_at = time.monotonic()
+        writer.write(f"completeir,{connector},{id}\r".encode("ascii"))
+
+    def status(self) -> JSON:
+        return {
+            "sendirs": self.sendirs,
+            "busy": self.busy,
+            "soundbar": {
+                "volume": self.soundbar.volume,
+                "muted": self.soundbar.muted,
+                "presses": self.soundbar.presses,
+                "missed": self.soundbar.missed,
+            },
+        }
+
+
+async def benchmark(args: argparse.Namespace) -> JSON:
+    sim = Simulator(time_scale=args.time_scale, min_gap=args.min_gap)
+    await sim.start()
+    volume = sim.volume()
+    results: dict[str, JSON] = {}
+    # Switching between TVs whose volume deltas differ by diff.
+    for diff in args.diffs:
+        volume.adjust_volume(TV.TV1, diff)
+        volume.set_for_tv(TV.TV2)
+        await volume.synced()
+        t0 = time.perf_counter()
+        volume.set_for_tv(TV.TV1)
+        await volume.synced()
+        burst_ms = (time.perf_counter() - t0) * 1000
+        volume.set_for_tv(TV.TV2)
+        await volume.synced()
+        # The same difference, one sendir per step.
+        t0 = time.perf_counter()
+        for _ in range(diff):
+            await volume.wf2ir.change_volume(1)
+        per_step_ms = (time.perf_counter() - t0) * 1000
+        await volume.wf2ir.change_volume(-diff)
+        volume.adjust_volume(TV.TV1, -diff)
+        results[str(diff)] = {
+            "burst_ms": round(burst_ms),
+            "per_step_ms": round(per_step_ms),
+        }
+    result: JSON = {
+        "diffs": results,
+        "simulator": sim.status(),
+        "wf2ir": volume.wf2ir.status(),
+    }
+    await volume.shutdown()
+    await sim.close()
+    return result
+
+
+async def serve(args: argparse.Namespace) -> None:
+    sim = Simulator(
+        host=args.host, port=args.port, time_scale=args.time_scale, min_gap=args.min_gap
+    )
+    await sim.start()
+    log(f"WF2IR simulator listening on {sim.host}:{sim.port}")
+    while True:
+        await aio.sleep(10)
+        log("WF2IR simulator", status=json.dumps(sim.status()))
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Simulate a WF2IR and soundbar")
+    mode_group = parser.add_mutually_exclusive_group(required=True)
+    mode_group.add_argument("--serve", action="store_true", help="Run the simulator")
+    mode_group.add_argument(
+        "--benchmark", action="store_true", help="Benchmark volume changes"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4998)
+    parser.add_argument("--time-scale", type=float, default=1.0)
+    parser.add_argument("--min-gap", type=float, default=0.0)
+    parser.add_argument("--diffs", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args(argv)
+    RunMode.set(RunMode.Daemon if args.serve else RunMode.Testing)
+    if args.serve:
+        aio.run_event_loop(serve(args))
+        return
+    result: list[JSON] = []
+
+    async def run() -> None:
+        result.append(await benchmark(args))
+
+    aio.run_event_loop(run())
+    print(json.dumps(result[0], indent=2))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,49 @@
+"""
+A stand-in for the WF2IR (and the soundbar it controls), for benchmarking and testing the
+volume path end to end.  It speaks the iTach TCP protocol's getversion, getdevices, and
+sendir, replying completeir once the IR would have been transmitted (per the pulse
+timings, scaled by time_scale), or busyIR if it is still transmitting.  Run it with:
+
+    python -m multiviewer.wf2ir_sim --serve
+    python -m multiviewer.wf2ir_sim --benchmark
+"""
+
+# Standard library
+import argparse
+
+# Local package
+from .base import *
+from .volume import Volume
+from .wf2ir import Wf2ir
+
+@dataclass(slots=True)
+class Soundbar:
+    volume: int = ...
+    muted: bool = ...
+    presses: int = ...
+    missed: int = ...
+
+@dataclass(slots=True)
+class Simulator:
+    host: str = ...
+    port: int = ...
+    time_scale: float = ...
+    min_gap: float = ...
+    soundbar: Soundbar = ...
+    sendirs: int = ...
+    busy: int = ...
+
+    async def start(self) -> None:
+        """Starts listening, on an ephemeral port if port is 0."""
+
+    async def close(self) -> None: ...
+    def wf2ir(self) -> Wf2ir:
+        """A WF2IR connection to the simulator."""
+
+    def volume(self) -> Volume:
+        """A Volume that sends its commands to the simulator."""
+
+    def status(self) -> JSON: ...
+
+async def benchmark(args: argparse.Namespace) -> JSON: ...
+def main(argv: list[str] | None = None) -> None: ...
@@ -5,16 +5,44 @@
 
 from __future__ import annotations
 
+import gc
 import inspect
 import json
 import sys
+import tempfile
 import time
 import traceback
-from typing import no_type_check
-
-from multiviewer import aio, mv
+from datetime import datetime
+from types import SimpleNamespace
+from typing import cast, no_type_check
+
+from pyatv.const import DeviceState, PowerState
+from pyatv.support.state_producer import StateProducer
+
+from multiviewer import (
+    aio,
+    atv_pyatv,
+    codec,
+    ir,
+    latency,
+    loop_monitor,
+    mv,
+    mv_screen_fsm,
+    profiler,
+    recorder,
+    resolver,
+)
+from multiviewer.atv import ATVs
+from multiviewer.atv_backend import AtvBackend, AtvDevice, AtvListener
+from multiviewer.atv_fake import FAKE_APPS, FakeBackend
 from multiviewer.base import *
+from multiviewer.journal import FsyncPolicy, Journal
+from multiviewer.jtech import Color, Hdmi, Power, Submode
+from multiviewer.jtech_output import JtechOutput, Pbp, WindowContents
 from multiviewer.mv import Multiviewer
+from multiviewer.mv_screen import MvScreen
+from multiviewer.tv import TV
+from multiviewer.wf2ir_sim import Simulator
 
 RunMode.set(RunMode.Testing)
 
@@ -520,6 +548,303 @@ async def _():
     await tv_do("Reset; Remote; Play_pause; Play_pause")
 
 
+@test("Apple TV presses are coalesced")
+async def _():
+    await mv.synced(the_mv())
+    stats = the_mv().atvs.atv(TV.TV1).stats
+    coalesced = stats.coalesced
+    completed = stats.completed
+    await tv_do("Reset; Remote; Down; Down; Down; Play_pause; Play_pause; Up")
+    await mv.synced(the_mv())
+    expect(stats.coalesced - coalesced, 4)
+    expect(stats.completed - completed, 4)
+
+
+@test("Apple TV sleep supersedes a pending wake")
+async def _():
+    await mv.synced(the_mv())
+    atv = the_mv().atvs.atv(TV.TV2)
+    stats = atv.stats
+    dropped = stats.dropped_superseded
+    completed = stats.completed
+    atv.wake()
+    atv.down()
+    atv.sleep()
+    await mv.synced(the_mv())
+    expect(stats.dropped_superseded - dropped, 2)
+    expect(stats.completed - completed, 1)
+
+
+@test("Apple TV sleep cancels a running wake")
+async def _():
+    atvs = ATVs.with_backend(FakeBackend(power_transition=0.2))
+    atv = atvs.atv(TV.TV1)
+    atv.wake()
+    await aio.sleep(0.05)
+    atv.sleep()
+    await atvs.synced()
+    await aio.sleep(0.3)
+    expect(atv.stats.cancelled, 1)
+    expect(atv.stats.completed, 1)
+    expect(atv.state().power, Power.OFF)
+    await atvs.shutdown()
+
+
+@test("Restart resumes only if the state and the jtech are both on")
+async def _():
+    # A failed probe reports None.
+    for jtech_power, resumed, volume in [
+        (Power.ON, True, "V+1"),
+        (Power.OFF, False, "V+0"),
+        (None, False, "V+0"),
+    ]:
+        m = await mv.create()
+        await mv.do_command_and_update_devices(m, ["Volume_up"])
+        expect(await mv.resume_or_initialize(m, jtech_power), resumed)
+        await mv.synced(m)
+        # Resuming keeps the volume; the power-on sequence resets it.
+        expect(mv.describe_volume(m), volume)
+        await mv.shutdown(m)
+    m = await mv.create()
+    await mv.do_command_and_update_devices(m, ["Power"])
+    expect(await mv.resume_or_initialize(m, Power.ON), False)
+    await mv.shutdown(m)
+
+
+@test("Apple TVs that are already on aren't woken on restart")
+async def _():
+    backend = FakeBackend(power_by_tv={TV.TV1: Power.ON})
+    atvs = ATVs.with_backend(backend)
+    atvs.wake_sleeping()
+    await atvs.synced()
+    status: Any = atvs.status()
+    expect(
+        [status[tv.name]["connection"]["wakes_skipped"] for tv in TV.all()], [1, 0, 0, 0]
+    )
+    expect([atvs.atv(tv).state().power for tv in TV.all()], [Power.ON] * 4)
+    await atvs.shutdown()
+
+
+# A stand-in for a connected pyatv AppleTV, for testing the pyatv adapter.  Its
+# listeners are held by pyatv's own StateProducer, i.e. weakly, as with a real one.
+class FakeAppleTV(StateProducer[Any]):
+    def __init__(self) -> None:
+        super().__init__()
+        self.power = FakePyatvPower()
+        self.push_updater = FakePyatvPushUpdater()
+        self.metadata = SimpleNamespace(app=None)
+        self.remote_control = FakePyatvRemoteControl(self)
+        self.apps = FakePyatvApps(self)
+        self.launches = 0
+
+    def push(self, device_state: DeviceState) -> None:
+        playing = SimpleNamespace(device_state=device_state, title=None)
+        self.push_updater.listener.playstatus_update(self.push_updater, playing)
+
+    def set_app(self, app_id: str | None) -> None:
+        app = None if app_id is None else SimpleNamespace(identifier=app_id)
+        if app is not None:
+            app.name = FAKE_APPS.get(app_id or "")
+        self.metadata.app = app
+        self.push(DeviceState.Idle if app is None else DeviceState.Loading)
+
+    def close(self) -> set[Any]:
+        self.listener.connection_closed()
+        return set()
+
+
+class FakePyatvPower(StateProducer[Any]):
+    # Like a real Apple TV, reports a new power state a little after being asked.
+    def __init__(self) -> None:
+        super().__init__()
+        self.power_state = PowerState.Off
+
+    def set_power_state(self, power_state: PowerState) -> None:
+        old_state = self.power_state
+        self.power_state = power_state
+        self.listener.powerstate_update(old_state, power_state)
+
+    async def turn_on(self) -> None:
+        aio.call_later(0.05, lambda: self.set_power_state(PowerState.On))
+
+    async def turn_off(self) -> None:
+        aio.call_later(0.05, lambda: self.set_power_state(PowerState.Off))
+
+
+class FakePyatvPushUpdater(StateProducer[Any]):
+    def start(self, initial_delay: int = 0) -> None:
+        pass
+
+
+class FakePyatvRemoteControl:
+    def __init__(self, apple_tv: FakeAppleTV) -> None:
+        self.apple_tv = apple_tv
+        self.downs = 0
+        # The down press, counting from 1, that fails, as if the connection dropped.
+        self.failing_down: int | None = None
+
+    async def down(self) -> None:
+        if self.downs + 1 == self.failing_down:
+            self.failing_down = None
+            fail("fake connection dropped")
+        self.downs += 1
+
+    async def home(self) -> None:
+        aio.call_later(0.05, lambda: self.apple_tv.set_app(None))
+
+    async def menu(self) -> None:
+        pass
+
+    async def select(self) -> None:
+        pass
+
+    async def up(self) -> None:
+        pass
+
+
+class FakePyatvApps:
+    def __init__(self, apple_tv: FakeAppleTV) -> None:
+        self.apple_tv = apple_tv
+
+    async def launch_app(self, url: str) -> None:
+        self.apple_tv.launches += 1
+        aio.call_later(0.05, lambda: self.apple_tv.set_app(url))
+
+    async def app_list(self) -> list[Any]:
+        return [
+            SimpleNamespace(identifier=app_id, name=name)
+            for app_id, name in FAKE_APPS.items()
+        ]
+
+
+class FakePyatvBackend(AtvBackend):
+    __slots__ = ("apple_tvs",)
+
+    def __init__(self) -> None:
+        self.apple_tvs = {tv: FakeAppleTV() for tv in TV.all()}
+
+    async def connect(self, tv: TV, listener: AtvListener) -> AtvDevice:
+        return atv_pyatv.attach(cast(Any, self.apple_tvs[tv]), listener)
+
+
+@test("Apple TV updates arrive through pyatv after connect returns")
+async def _():
+    backend = FakePyatvBackend()
+    apple_tv = backend.apple_tvs[TV.TV1]
+    atvs = ATVs.with_backend(backend)
+    atv = atvs.atv(TV.TV1)
+    atv.up()
+    await atvs.synced()
+    gc.collect()
+    apple_tv.power.set_power_state(PowerState.On)
+    apple_tv.set_app("com.netflix.Netflix")
+    expect(atv.state().power, Power.ON)
+    expect(atv.state().app_id, "com.netflix.Netflix")
+    await atvs.shutdown()
+
+
+@test("Apple TV notices a connection lost through pyatv")
+async def _():
+    backend = FakePyatvBackend()
+    apple_tv = backend.apple_tvs[TV.TV1]
+    atvs = ATVs.with_backend(backend)
+    atv = atvs.atv(TV.TV1)
+    atv.up()
+    await atvs.synced()
+    gc.collect()
+    status: Any = atv.status()
+    expect(status["connection"]["state"], "CONNECTED")
+    apple_tv.listener.connection_lost(Exception("gone"))
+    status = atv.status()
+    expect(status["connection"]["state"], "DISCONNECTED")
+    expect(status["connection"]["error"], "Exception('gone')")
+    await atvs.shutdown()
+
+
+@test("Apple TV steps finish on pyatv updates, not timeouts")
+async def _():
+    backend = FakePyatvBackend()
+    atvs = ATVs.with_backend(backend)
+    atv = atvs.atv(TV.TV1)
+    t0 = time.perf_counter()
+    atv.wake()
+    atv.launch("Netflix")
+    await atvs.synced()
+    # Any step that timed out would have taken at least STEP_TIMEOUT.
+    expect(time.perf_counter() - t0 < 1.0, True)
+    status: Any = atv.status()
+    steps = status["connection"]["steps"]
+    expect(
+        sorted(steps),
+        [
+            "launch.launch_app",
+            "screensaver.home1",
+            "screensaver.home2",
+            "wake.turn_on",
+        ],
+    )
+    expect([step["timeouts"] for step in steps.values()], [0] * 4)
+    expect(atv.state().app_id, "com.netflix.Netflix")
+    await atvs.shutdown()
+
+
+@test("Apple TV skips launching an app pyatv says is in the foreground")
+async def _():
+    backend = FakePyatvBackend()
+    apple_tv = backend.apple_tvs[TV.TV1]
+    atvs = ATVs.with_backend(backend)
+    atv = atvs.atv(TV.TV1)
+    atv.up()
+    await atvs.synced()
+    gc.collect()
+    # The user opened Netflix with the Siri remote.
+    apple_tv.set_app("com.netflix.Netflix")
+    atv.launch("Netflix")
+    await atvs.synced()
+    expect(apple_tv.launches, 0)
+    status: Any = atv.status()
+    expect(status["connection"]["launches_skipped"], 1)
+    atv.launch("YouTube")
+    await atvs.synced()
+    expect(apple_tv.launches, 1)
+    expect(atv.state().app_id, "com.google.ios.youtube")
+    await atvs.shutdown()
+
+
+@test("Apple TV retries only the presses of a coalesced job that failed")
+async def _():
+    backend = FakePyatvBackend()
+    remote_control = backend.apple_tvs[TV.TV1].remote_control
+    remote_control.failing_down = 4
+    atvs = ATVs.with_backend(backend)
+    atv = atvs.atv(TV.TV1)
+    for _ in range(5):
+        atv.down()
+    await atvs.synced()
+    expect(remote_control.downs, 5)
+    expect(atv.stats.completed, 5)
+    expect(atv.stats.failed, 0)
+    await atvs.shutdown()
+
+
+@test("Apple TV launches apps by name, once")
+async def _():
+    backend = FakeBackend()
+    atvs = ATVs.with_backend(backend)
+    atv = atvs.atv(TV.TV1)
+    atv.launch("netflix")
+    await atvs.synced()
+    expect(atv.state().app_id, "com.netflix.Netflix")
+    atv.launch("Netflix")
+    await atvs.synced()
+    expect(backend.stats.launches, 1)
+    atv.launch("YouTube")
+    await atvs.synced()
+    expect(backend.stats.launches, 2)
+    expect(atv.state().app_name, "YouTube")
+    await atvs.shutdown()
+
+
 @test("Screensaver")
 async def _():
     await tv_do("Reset; Screensaver")
@@ -541,6 +866,180 @@ async def _():
     await vol_is("V-1")
 
 
+@test("IR codes decode into frames and re-encode as learned")
+async def _():
+    for code, learned in [
+        (ir.VOLUME_UP, ir.LEARNED_VOLUME_UP),
+        (ir.VOLUME_DOWN, ir.LEARNED_VOLUME_DOWN),
+        (ir.MUTE, ir.LEARNED_MUTE),
+    ]:
+        frame = code.frames[0]
+        expect(isinstance(frame, ir.Frame) and frame.protocol, ir.Protocol.SAMSUNG)
+        expect(code.sendir(id=1), learned)
+    expect(ir.burst(ir.VOLUME_UP, 3).data.startswith(b"sendir,1:3,103,37878,3,1,"), True)
+
+
+def dataclasses_json_of(o: Any) -> str:
+    return o.to_json()
+
+
+@test("Generated codecs match dataclasses_json")
+async def _():
+    m = the_mv()
+    expect(codec.to_json(m), dataclasses_json_of(m))
+    decoded = codec.from_json(Multiviewer, codec.to_json(m))
+    expect(codec.to_json(decoded), codec.to_json(m))
+    await mv.shutdown(decoded)
+    screen = MvScreen()
+    screen.num_active_windows = 2
+    expect(codec.from_json(MvScreen, dataclasses_json_of(screen)), screen)
+    output = JtechOutput(
+        layout=Pbp(
+            submode=Submode.W1_PROMINENT,
+            w1=WindowContents(Hdmi.H1, Color.RED),
+            w2=WindowContents(Hdmi.H3, None),
+        ),
+        audio_from=Hdmi.H3,
+    )
+    expect(codec.to_json(output), dataclasses_json_of(output))
+    expect(codec.from_json(JtechOutput, dataclasses_json_of(output)), output)
+
+
+@test("Volume syncs through a simulated WF2IR")
+async def _():
+    sim = Simulator(time_scale=0.01)
+    await sim.start()
+    volume = sim.volume()
+    volume.adjust_volume(TV.TV1, 7)
+    volume.set_for_tv(TV.TV1)
+    await volume.synced()
+    expect(sim.soundbar.volume, 7)
+    expect(sim.sendirs, 1)
+    volume.adjust_volume(TV.TV2, -3)
+    volume.set_for_tv(TV.TV2)
+    await volume.synced()
+    expect(sim.soundbar.volume, -3)
+    volume.toggle_mute()
+    await volume.synced()
+    expect(sim.soundbar.muted, True)
+    await volume.shutdown()
+    await sim.close()
+
+
+@test("IR pacing backs off on repeated hints of a missed command, then recovers")
+async def _():
+    sim = Simulator(time_scale=0.01)
+    await sim.start()
+    volume = sim.volume()
+    status: Any = volume.status()
+    min_floor_ms = status["wf2ir"]["pacing"]["floor_ms"]
+    # Muting and straight back is just the user changing their mind.
+    volume.toggle_mute()
+    await volume.synced()
+    volume.toggle_mute()
+    await volume.synced()
+    status = volume.status()
+    expect(status["wf2ir"]["pacing"]["missed_hints"], 1)
+    expect(status["wf2ir"]["pacing"]["missed"], 0)
+    # But so soon after, up and straight back down suggests the soundbar missed a press.
+    volume.adjust_volume(TV.TV1, 1)
+    volume.adjust_volume(TV.TV1, -1)
+    status = volume.status()
+    expect(status["wf2ir"]["pacing"]["missed_hints"], 2)
+    expect(status["wf2ir"]["pacing"]["missed"], 1)
+    expect(status["wf2ir"]["pacing"]["floor_ms"] > min_floor_ms, True)
+    # The floor comes back down as commands go through.
+    pacing: Any = cast(Any, volume).wf2ir.pacing
+    for _ in range(1000):
+        pacing.succeeded()
+    status = volume.status()
+    expect(status["wf2ir"]["pacing"]["floor_ms"], min_floor_ms)
+    await volume.shutdown()
+    await sim.close()
+
+
+@test("A stale WF2IR reader doesn't close a newer connection")
+async def _():
+    sim = Simulator(time_scale=0.01)
+    await sim.start()
+    wf2ir: Any = sim.wf2ir()
+    await wf2ir.mute()
+    old_writer = wf2ir.writer
+    # Drop the connection, as a timed out send does, and reconnect.
+    wf2ir.lost(old_writer, "reply timeout")
+    await wf2ir.mute()
+    # The old connection's reader may only notice that it closed after that.
+    wf2ir.lost(old_writer, "IncompleteReadError")
+    status: Any = wf2ir.status()
+    expect(status["connected"], True)
+    await wf2ir.mute()
+    expect(wf2ir.connects, 2)
+    await wf2ir.close()
+    await sim.close()
+
+
+@test("Journaled commands are replayed on load")
+async def _():
+    with tempfile.TemporaryDirectory() as d:
+        path = Path(d) / "state.json"
+        m1 = await mv.load(path)
+        mv.start_journal(m1, path)
+
+        async def replayed() -> str:
+            m = await mv.load(path)
+            mv.update_devices(m)
+            output = await mv.describe_jtech_output(m)
+            await mv.shutdown(m)
+            return output
+
+        for command in ["Activate_tv", "E", "Activate_tv", "S"]:
+            await mv.do_command_and_update_devices(m1, [command])
+        expect(await replayed(), await mv.describe_jtech_output(m1))
+        # After a snapshot, only later commands are replayed.
+        mv.snapshot(m1)
+        await mv.do_command_and_update_devices(m1, ["W"])
+        expect(await replayed(), await mv.describe_jtech_output(m1))
+        await mv.shutdown(m1)
+
+
+@test("Journal records overlapping commands in the order they're applied")
+async def _():
+    with tempfile.TemporaryDirectory() as d:
+        path = Path(d) / "state.json"
+        m1 = await mv.load(path)
+        mv.start_journal(m1, path)
+        power = aio.Task[JSON].create(
+            "Power", mv.do_command_and_update_devices(m1, ["Power"])
+        )
+        await aio.sleep(0)
+        # Power is now off, and Power is waiting for the Apple TVs to go to sleep.  A
+        # snapshot now would include the former but not the latter.
+        mv.snapshot(m1)
+        await mv.do_command_and_update_devices(m1, ["Power"])
+        await power
+        m2 = await mv.load(path)
+        expect(cast(Any, m2).power, Power.ON)
+        expect(cast(Any, m1).power, Power.ON)
+        await mv.shutdown(m2)
+        await mv.shutdown(m1)
+
+
+@test("Journal fsyncs appends between intervals without another append")
+async def _():
+    with tempfile.TemporaryDirectory() as d:
+        j = Journal.open(Path(d) / "state.json", seq=0)
+        j.fsync_policy = FsyncPolicy.INTERVAL
+        j.fsync_interval = 0.05
+        j.append(datetime.now(), ["E"], None)
+        j.append(datetime.now(), ["S"], None)
+        status: Any = j.status()
+        expect(status["fsyncs"], 1)
+        await aio.sleep(0.1)
+        status = j.status()
+        expect(status["fsyncs"], 2)
+        j.close()
+
+
 @test("Mute")
 async def _():
     await tv_do("Reset; Mute")
@@ -590,11 +1089,135 @@ async def _():
     await tv_do("Reset; Remote", "{}")
 
 
+@test("Status works with the power off, and isn't a press")
+async def _():
+    m = the_mv()
+    await tv_do("Reset; Power")
+    status: Any = await mv.do_command_and_update_devices(m, ["Status"])
+    expect("atvs" in status, True)
+    profile: Any = await mv.do_command_and_update_devices(m, ["Profile"])
+    expect("profiling" in profile, True)
+    await tv_do("Power; Remote")
+    await mv.do_command_and_update_devices(m, ["Status"])
+    # A second after the first Remote, this is a single tap.
+    expect(await mv.do_command_and_update_devices(m, ["Remote"]), {})
+    mv.advance_clock(m, 1.0)
+
+
 @test("Info")
 async def _():
     await tv_do("Reset; Info", '"QUAD(2) A1 [H1]G [H2]A [H3]A [H4]A V+0"')
 
 
+@test("Profiler samples the event loop")
+async def _():
+    with tempfile.TemporaryDirectory() as d:
+        profiler.start(profiler.Mode.SAMPLING, interval=0.001, directory=Path(d))
+        t0 = time.perf_counter()
+        while time.perf_counter() - t0 < 0.05:
+            await aio.sleep(0)
+        result: Any = profiler.stop()
+        expect(result["summary"]["samples"] > 0, True)
+        expect(Path(result["path"]).read_text().count(";") > 0, True)
+    expect(profiler.status(), {"profiling": False})
+
+
+@test("The packed kernel agrees with MvScreen")
+async def _():
+    machine = mv_screen_fsm.explore_fsm(max_states=2000)
+    expect(mv_screen_fsm.check_kernel(machine), len(machine.entries) * 24)
+    kernel_machine = mv_screen_fsm.explore_fsm(max_states=2000, kernel=True)
+    expect(kernel_machine.summary(), machine.summary())
+
+
+@test("The binary FSM format round-trips through mmap")
+async def _():
+    machine = mv_screen_fsm.explore_fsm(max_states=500)
+    with tempfile.TemporaryDirectory() as d:
+        path = Path(d) / "fsm.bin"
+        machine.write(path)
+        mapped = mv_screen_fsm.load_fsm(path)
+        expect(mapped.summary(), machine.summary())
+        state, transitions = machine.entries[7]
+        expect(mapped.states[7], state)
+        expect(list(mapped.transitions_of(7)), transitions)
+        mapped.close()
+
+
+@test("Malformed binary FSM files fail to load")
+async def _():
+    data = mv_screen_fsm.explore_fsm(max_states=500).to_bytes()
+    header = mv_screen_fsm.HEADER.size
+    with tempfile.TemporaryDirectory() as d:
+        path = Path(d) / "fsm.bin"
+        errors: list[str] = []
+        for contents in [b"", data[: header - 1], b"X" + data[1:], data[:-4]]:
+            path.write_bytes(contents)
+            try:
+                mv_screen_fsm.load_fsm(path).close()
+                errors.append("loaded")
+            except RuntimeError as e:
+                errors.append("truncated" if "truncated" in str(e) else "not FSM")
+        expect(errors, ["not FSM", "not FSM", "not FSM", "truncated"])
+
+
+@test("Latency is tracked per command against the SLO")
+async def _():
+    now = time.monotonic()
+    latency.reached(latency.Request("Test_fast", now))
+    latency.reached(latency.Request("Test_slow", now - 1))
+    latency.superseded(latency.Request("Test_slow", now))
+    status: Any = latency.status()
+    fast, slow = status["commands"]["Test_fast"], status["commands"]["Test_slow"]
+    expect((fast["reached"], fast["violations"]), (1, 0))
+    expect((slow["reached"], slow["superseded"], slow["violations"]), (1, 1, 1))
+    expect(slow["max_ms"] >= 1000, True)
+
+
+@test("Flight recorder keeps the latest events and rate-limits dumps")
+async def _():
+    r = recorder.Recorder(capacity=3)
+    for i in range(5):
+        r.record(recorder.Kind.JTECH_SEND, f"line {i}")
+    expect([line.split()[-1] for line in r.lines()], ["2", "3", "4"])
+    with tempfile.TemporaryDirectory() as d:
+        path = r.dump("jtech mismatch", Path(d))
+        expect(r.dump("jtech mismatch", Path(d)), None)
+        await aio.sleep(0.1)
+        assert path is not None
+        text = path.read_text()
+        expect(text.splitlines()[-1].endswith("JTECH_SEND line 4"), True)
+    status: Any = r.status()
+    expect(status["dumps_suppressed"], 1)
+
+
+@test("Loop monitor catches a blocking task")
+async def _():
+    monitor = loop_monitor.Monitor(interval=0.01, threshold=0.05)
+    monitor.start()
+
+    async def block() -> None:
+        time.sleep(0.15)  # noqa: ASYNC251
+
+    await aio.sleep(0.02)
+    await aio.Task[None].create("blocker", block())
+    await aio.sleep(0.05)
+    monitor.stop()
+    status: Any = monitor.status()
+    expect(status["stalls"], 1)
+    expect(status["offenders"][0]["task"], "blocker")
+    expect(status["offenders"][0]["at"].startswith("tests.py:"), True)
+
+
+@test("Resolver caches lookups")
+async def _():
+    await resolver.resolve("localhost")
+    expect(await resolver.resolve("localhost"), "127.0.0.1")
+    expect(
+        '"lookups": 1, "failures": 0, "hits": 1' in json.dumps(resolver.status()), True
+    )
+
+
 @test("Power")
 async def _():
     # Change state before turning off, verify it survives power cycle, and that